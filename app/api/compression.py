@@ -0,0 +1,134 @@
+"""
+Compressed request bodies (Content-Encoding) for the ingest routes.
+
+The request body is decompressed incrementally while it is read, so both
+buffered routes (`request.body()` / JSON) and streaming routes
+(`request.stream()`) see plain bytes. Two guards protect against
+decompression bombs:
+- an absolute ceiling on the decompressed size (settings.MAX_BODY_BYTES);
+- a maximum expansion ratio (decompressed / compressed), which also covers
+  streaming routes that lift the absolute ceiling.
+"""
+
+from __future__ import annotations
+
+import zlib
+from typing import AsyncIterator, Callable, Iterator
+
+from fastapi import HTTPException, Request
+
+from app.core.settings import settings
+
+try:
+    import zstandard
+except ImportError:  # zstd é opcional
+    zstandard = None
+
+# Tamanho máximo de saída por chamada ao descompressor
+_OUT_CHUNK = 64 * 1024
+
+# Fatia de entrada do zstd (o decompressobj não limita a saída por chamada)
+_ZSTD_IN_CHUNK = 1024
+
+# Folga do limite de razão (bodies pequenos comprimem pouco)
+_RATIO_SLACK_BYTES = 64 * 1024
+
+
+class _ZlibDecoder:
+    # gzip e deflate (wbits: 16+ = gzip, positivo = zlib)
+    def __init__(self, wbits: int) -> None:
+        self._d = zlib.decompressobj(wbits=wbits)
+
+    def feed(self, data: bytes) -> Iterator[bytes]:
+        while data:
+            out = self._d.decompress(data, _OUT_CHUNK)
+            if out:
+                yield out
+            data = self._d.unconsumed_tail
+
+    def finish(self) -> Iterator[bytes]:
+        out = self._d.flush()
+        if out:
+            yield out
+        if not self._d.eof:
+            raise zlib.error("truncated stream")
+
+
+class _ZstdDecoder:
+    def __init__(self) -> None:
+        self._d = zstandard.ZstdDecompressor().decompressobj()
+
+    def feed(self, data: bytes) -> Iterator[bytes]:
+        for i in range(0, len(data), _ZSTD_IN_CHUNK):
+            out = self._d.decompress(data[i:i + _ZSTD_IN_CHUNK])
+            if out:
+                yield out
+
+    def finish(self) -> Iterator[bytes]:
+        return iter(())
+
+
+def supported_encodings() -> dict[str, Callable[[], object]]:
+    encodings = {
+        "gzip": lambda: _ZlibDecoder(16 + zlib.MAX_WBITS),
+        "x-gzip": lambda: _ZlibDecoder(16 + zlib.MAX_WBITS),
+        "deflate": lambda: _ZlibDecoder(zlib.MAX_WBITS),
+    }
+    if zstandard is not None:
+        encodings["zstd"] = _ZstdDecoder
+    return encodings
+
+
+class DecompressedRequest(Request):
+    # Teto absoluto do corpo descomprimido (None = só o limite de razão)
+    max_decompressed_bytes: int | None = None
+
+    def content_encoding(self) -> str:
+        return (self.headers.get("content-encoding") or "").strip().lower()
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        # Corpo já lido (body()/json()): já está descomprimido
+        if hasattr(self, "_body"):
+            yield self._body
+            yield b""
+            return
+
+        encoding = self.content_encoding()
+        if encoding in ("", "identity"):
+            async for chunk in super().stream():
+                yield chunk
+            return
+
+        factory = supported_encodings().get(encoding)
+        if factory is None:
+            raise HTTPException(status_code=415, detail="unsupported_content_encoding")
+        decoder = factory()
+
+        limit = self.max_decompressed_bytes
+        max_ratio = settings.INGEST_MAX_DECOMPRESSION_RATIO
+        total_in = 0
+        total_out = 0
+
+        def check(out: bytes) -> bytes:
+            nonlocal total_out
+            total_out += len(out)
+            if limit is not None and total_out > limit:
+                raise HTTPException(status_code=413, detail="decompressed_body_too_large")
+            if total_out > total_in * max_ratio + _RATIO_SLACK_BYTES:
+                raise HTTPException(status_code=413, detail="decompression_ratio_exceeded")
+            return out
+
+        try:
+            async for chunk in super().stream():
+                total_in += len(chunk)
+                for out in decoder.feed(chunk):
+                    yield check(out)
+            for out in decoder.finish():
+                yield check(out)
+        except HTTPException:
+            raise
+        except Exception:
+            # zlib.error / zstandard.ZstdError: corpo corrompido ou truncado
+            raise HTTPException(status_code=400, detail="invalid_compressed_body")
+
+        yield b""
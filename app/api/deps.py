@@ -6,19 +6,22 @@ and security guards used across the API.
 """
 
 from fastapi import Header, HTTPException, Request, Depends, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.security import verify_api_key, decode_token
-from app.infra.db.repositories.source_repo import get_source_by_name
+from app.core.security import decode_token
+from app.infra.db.repositories.source_repo import CachedSource, source_registry
 from app.infra.db.repositories.security_event_repo import create_security_event
 from app.infra.db.repositories.user_repo import get_user_by_id
-from app.infra.db.session import get_db
+from app.infra.db.session import get_async_db
+from app.services.ingest_quota import QuotaCostExceedsBurst, ingest_quota
 
 # Dependencia para autenticação de fontes via API key
 def require_api_key_for_ingest(
     request: Request,
     db: Session,
     source: str,
+    cost: int = 1,
 ):
     # API key enviada no header (case-insensitive)
     x_api_key = request.headers.get("X-API-Key")
@@ -54,21 +57,49 @@ def require_api_key_for_ingest(
     if not x_api_key:
         deny("missing X-API-Key", "AUTH_FAILED")
 
-    # 2) Fonte precisa existir e estar ativa
-    src = get_source_by_name(db, source)
+    # 2) Fonte precisa existir e estar ativa (cache de fontes → banco só em miss)
+    src = source_registry.resolve(db, source)
     if not src or src.status != "active":
         deny("invalid source", "AUTH_FAILED")
 
-    # 3) API key deve bater com o hash salvo
-    if not verify_api_key(x_api_key, src.api_key_hash):
+    # 3) API key deve bater com o hash salvo (chaves já verificadas são memorizadas)
+    if not source_registry.verify_key(src, x_api_key):
         deny("invalid api key", "AUTH_FAILED")
 
+    # 4) Cota da fonte: token bucket compartilhado entre workers (custo = eventos da chamada)
+    require_quota(db, src, cost)
+
     # Autenticação OK → retorna a fonte autenticada
     return src
 
+# Cobrança da cota de uma fonte já autenticada (também usada por chunk no stream)
+def require_quota(db: Session, src: CachedSource, cost: int) -> None:
+    try:
+        retry_after = ingest_quota.acquire(db, src, cost)
+    except QuotaCostExceedsBurst:
+        # Nunca caberia no bucket: o cliente precisa dividir o lote
+        raise HTTPException(status_code=413, detail="batch_exceeds_quota_burst")
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=429,
+            detail="quota_exceeded",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+# Mesma autenticação para rotas async (repositórios síncronos sobre a conexão async)
+async def authenticate_ingest(
+    request: Request,
+    db: AsyncSession,
+    source: str,
+    cost: int = 1,
+):
+    return await db.run_sync(
+        lambda session: require_api_key_for_ingest(request=request, db=session, source=source, cost=cost)
+    )
+
 # Dependencia para autenticacao de usuarios via JWT
-def get_current_user(
-    db: Session = Depends(get_db),
+async def get_current_user(
+    db: AsyncSession = Depends(get_async_db),
     authorization: str | None = Header(default=None),
 ):
     # Header Authorization obrigatório
@@ -98,7 +129,7 @@ def get_current_user(
         )
 
     # Busca usuário no banco
-    user = get_user_by_id(db, user_id)
+    user = await db.run_sync(get_user_by_id, user_id)
     if not user or not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -112,7 +143,7 @@ def require_roles(allowed: list[str]):
     # Conjunto de papéis permitidos
     allowed_set = set(allowed)
 
-    def _dep(request: Request, user=Depends(get_current_user)):
+    async def _dep(request: Request, user=Depends(get_current_user)):
         # Verifica se o papel do usuário é permitido
         if user.role not in allowed_set:
             raise HTTPException(
@@ -0,0 +1,57 @@
+"""
+Binary request encodings for the ingest routes.
+
+MessagePack (`application/msgpack`) and, optionally, CBOR (`application/cbor`)
+bodies are decoded into plain Python objects that FastAPI then validates
+against the same Pydantic models used for JSON (IngestRequest, list of
+IngestRequest), so the persistence path is identical.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable
+
+try:
+    import msgpack
+except ImportError:  # sem msgpack → application/msgpack responde 415
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:  # CBOR é opcional
+    cbor2 = None
+
+MSGPACK_MEDIA_TYPES = {"application/msgpack", "application/x-msgpack", "application/vnd.msgpack"}
+CBOR_MEDIA_TYPES = {"application/cbor"}
+
+
+class UnsupportedEncoding(Exception):
+    pass
+
+
+def media_type(content_type: str | None) -> str:
+    # Ignora parâmetros (ex: "; charset=utf-8")
+    return (content_type or "").split(";")[0].strip().lower()
+
+
+def is_binary_encoding(content_type: str | None) -> bool:
+    mt = media_type(content_type)
+    return mt in MSGPACK_MEDIA_TYPES or mt in CBOR_MEDIA_TYPES
+
+
+def _decode_msgpack(body: bytes) -> Any:
+    # timestamp=3: extensão Timestamp do msgpack vira datetime (UTC)
+    return msgpack.unpackb(body, raw=False, timestamp=3, strict_map_key=True)
+
+
+def _decode_cbor(body: bytes) -> Any:
+    return cbor2.loads(body)
+
+
+def decoder_for(content_type: str | None) -> Callable[[bytes], Any]:
+    mt = media_type(content_type)
+    if mt in MSGPACK_MEDIA_TYPES and msgpack is not None:
+        return _decode_msgpack
+    if mt in CBOR_MEDIA_TYPES and cbor2 is not None:
+        return _decode_cbor
+    raise UnsupportedEncoding(mt)
@@ -0,0 +1,69 @@
+"""
+Route class for the ingest router.
+
+Normalizes ingest request bodies before FastAPI parses them:
+- Content-Encoding (gzip/deflate/zstd) is decompressed while streaming;
+- binary encodings (MessagePack/CBOR) are decoded to the same Python
+  objects a JSON body would produce, so validation and persistence stay
+  identical across formats.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable
+
+from fastapi import HTTPException, Request, Response
+from fastapi.routing import APIRoute
+
+from app.api.compression import DecompressedRequest
+from app.api.encodings import UnsupportedEncoding, decoder_for, is_binary_encoding
+from app.core.settings import settings
+
+# Chave no scope com o content-type binário original
+_BODY_ENCODING_KEY = "ingest.body_encoding"
+
+
+class IngestHTTPRequest(DecompressedRequest):
+    async def json(self) -> Any:
+        encoding = self.scope.get(_BODY_ENCODING_KEY)
+        if encoding is None:
+            return await super().json()
+
+        body = await self.body()
+        try:
+            return decoder_for(encoding)(body)
+        except Exception:
+            raise HTTPException(status_code=400, detail="invalid_body_encoding")
+
+
+class IngestRoute(APIRoute):
+    """
+    Buffered routes get the absolute decompressed-size ceiling
+    (MAX_BODY_BYTES); streaming handlers may lift it via
+    `request.max_decompressed_bytes = None`.
+    """
+
+    def get_route_handler(self) -> Callable:
+        original_route_handler = super().get_route_handler()
+
+        async def custom_route_handler(request: Request) -> Response:
+            content_type = request.headers.get("content-type")
+            if is_binary_encoding(content_type):
+                try:
+                    decoder_for(content_type)
+                except UnsupportedEncoding:
+                    raise HTTPException(status_code=415, detail="unsupported_media_type")
+
+                # FastAPI só entrega o corpo ao Pydantic para content-types JSON:
+                # guarda o encoding original e expõe o corpo como JSON (json() decodifica)
+                request.scope[_BODY_ENCODING_KEY] = content_type
+                request.scope["headers"] = [
+                    (k, b"application/json" if k == b"content-type" else v)
+                    for k, v in request.scope["headers"]
+                ]
+
+            request = IngestHTTPRequest(request.scope, request.receive)
+            request.max_decompressed_bytes = settings.MAX_BODY_BYTES
+            return await original_route_handler(request)
+
+        return custom_route_handler
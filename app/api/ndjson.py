@@ -0,0 +1,67 @@
+"""
+NDJSON request parsing.
+
+Incremental line splitting over the ASGI body stream, so a request with
+millions of events is processed at bounded memory (one line + one chunk).
+"""
+
+from __future__ import annotations
+
+from typing import AsyncIterator
+
+NDJSON_MEDIA_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+
+
+def is_ndjson(content_type: str | None) -> bool:
+    # Ignora parâmetros (ex: "; charset=utf-8")
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    return media_type in NDJSON_MEDIA_TYPES
+
+
+async def iter_lines(
+    chunks: AsyncIterator[bytes],
+    max_line_bytes: int,
+) -> AsyncIterator[tuple[int, bytes | None]]:
+    """
+    Yields (line_number, line) for each non-empty line of the stream.
+
+    Lines longer than `max_line_bytes` are yielded as None and their bytes
+    are discarded without being buffered.
+    """
+    buf = bytearray()
+    overflow = False
+    line_no = 0
+
+    async for chunk in chunks:
+        start = 0
+        while True:
+            nl = chunk.find(b"\n", start)
+            if nl == -1:
+                # Linha continua no próximo chunk
+                if not overflow:
+                    buf += chunk[start:]
+                    if len(buf) > max_line_bytes:
+                        overflow = True
+                        buf.clear()
+                break
+
+            piece = chunk[start:nl]
+            start = nl + 1
+            line_no += 1
+
+            if overflow or len(buf) + len(piece) > max_line_bytes:
+                yield line_no, None
+            else:
+                buf += piece
+                line = bytes(buf).strip()
+                if line:
+                    yield line_no, line
+
+            buf.clear()
+            overflow = False
+
+    # Última linha sem "\n" final
+    if overflow:
+        yield line_no + 1, None
+    elif buf.strip():
+        yield line_no + 1, bytes(buf).strip()
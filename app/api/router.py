@@ -16,6 +16,8 @@ from app.api.routes import audit
 from app.api.routes import security_events
 from app.api.routes import metrics
 from app.api.routes import ready
+from app.api.routes import rules
+from app.api.routes import reprocess
 
 
 # Router principal da API
@@ -30,4 +32,6 @@ api_router.include_router(ingest.router)
 api_router.include_router(audit.router)
 api_router.include_router(security_events.router)
 api_router.include_router(metrics.router)
-api_router.include_router(ready.router)
\ No newline at end of file
+api_router.include_router(ready.router)
+api_router.include_router(rules.router)
+api_router.include_router(reprocess.router)
\ No newline at end of file
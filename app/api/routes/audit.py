@@ -8,9 +8,9 @@ Restricted to auditor and admin roles.
 from datetime import datetime
 
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.infra.db.session import get_db
+from app.infra.db.session import get_async_db
 from app.api.deps import require_roles
 from app.infra.db.repositories.audit_repo import list_audit_logs
 
@@ -20,7 +20,7 @@ router = APIRouter(prefix="/api/v1", tags=["audit"])
 
 
 @router.get("/audit")
-def get_audit(
+async def get_audit(
     # Filtros opcionais
     trusted_event_id: int | None = Query(default=None),
     user_id: int | None = Query(default=None),
@@ -32,7 +32,7 @@ def get_audit(
     page_size: int = Query(default=50, ge=1, le=200),
 
     # Dependências
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(require_roles(["auditor", "admin"])),
 ):
     # Converte datas ISO para datetime (se fornecidas)
@@ -40,7 +40,7 @@ def get_audit(
     dt = datetime.fromisoformat(date_to.replace("Z", "+00:00")) if date_to else None
 
     # Busca logs de auditoria no repositório
-    total, rows = list_audit_logs(
+    total, rows = await list_audit_logs(
         db,
         trusted_event_id=trusted_event_id,
         user_id=user_id,
@@ -1,28 +1,350 @@
-from fastapi import APIRouter, Depends, Request
+from typing import Any, Awaitable, Callable
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.api.deps import require_api_key_for_ingest
-from app.api.schemas.ingest import IngestRequest
-from app.infra.db.session import get_db
-from app.services.ingest_service import ingest_event
+from app.api.compression import DecompressedRequest
+from app.api.deps import authenticate_ingest, require_quota
+from app.api.ingest_route import IngestRoute
+from app.api.ndjson import is_ndjson, iter_lines
+from app.api.schemas.ingest import (
+    IngestBatchResponse,
+    IngestRequest,
+    IngestStreamResponse,
+    IngestValidateResponse,
+)
+from app.core.settings import settings
+from app.core.utils import new_request_id
+from app.infra.db.repositories.source_repo import CachedSource
+from app.infra.db.session import get_async_db, get_db
+from app.services.admission import AdmissionTimeout, fair_admission
+from app.services.idempotency import IdempotencyError, idempotency_store, request_fingerprint
+from app.services.ingest_coalescer import ingest_coalescer
+from app.services.ingest_quota import ingest_quota
+from app.services.cpu_stage import cpu_stage, to_prepared, to_request, validation_error_detail
+from app.services.ingest_service import Prepared, ingest_batch, ingest_event, validate_only
+from app.services.spool_worker import spool_worker
 
 # Router do módulo de ingestão
-router = APIRouter(prefix="/api/v1", tags=["ingest"])
+# (aceita corpos gzip/deflate/zstd via Content-Encoding e JSON/MessagePack/CBOR)
+router = APIRouter(prefix="/api/v1", tags=["ingest"], route_class=IngestRoute)
+
+# Status HTTP dos erros de Idempotency-Key
+_IDEMPOTENCY_ERRORS = {
+    "invalid_idempotency_key": 400,
+    "idempotency_key_in_progress": 409,
+    "idempotency_key_reused": 422,
+}
+
+async def _admitted(src: CachedSource, cost: int, run: Callable[[], Awaitable[dict]]) -> dict:
+    # Sob saturação, espera a vez da fonte (DRR ponderado por ingest_weight)
+    if not settings.INGEST_ADMISSION_ENABLED:
+        return await run()
+    try:
+        async with fair_admission.slot_async(src.name, src.ingest_weight, cost):
+            return await run()
+    except AdmissionTimeout:
+        raise HTTPException(status_code=503, detail="admission_timeout", headers={"Retry-After": "1"})
+
+async def _idempotent(
+    request: Request,
+    response: Response,
+    db: AsyncSession,
+    src: CachedSource,
+    reqs: list[IngestRequest],
+    run: Callable[[], Awaitable[dict]],
+    status_code: int = 200,
+) -> dict:
+    async def charged() -> dict:
+        # Cota cobrada só quando a chamada executa: o replay de uma chave não consome tokens
+        await db.run_sync(require_quota, src, len(reqs))
+        return await run()
+
+    # Sem Idempotency-Key: executa normalmente
+    key = request.headers.get("Idempotency-Key")
+    if key is None:
+        return await charged()
+
+    # Mesma fonte + chave → resposta gravada da primeira chamada (run não executa de novo)
+    fingerprint = request_fingerprint(request.url.path, [r.model_dump(mode="json") for r in reqs])
+    try:
+        status, body, replayed = await idempotency_store.run_async(db, src.id, key, fingerprint, charged, status_code)
+    except IdempotencyError as e:
+        raise HTTPException(status_code=_IDEMPOTENCY_ERRORS[e.reason], detail=e.reason)
+
+    response.status_code = status
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return body
 
 @router.post("/ingest")
-def ingest(
+async def ingest(
     req: IngestRequest,              # Payload validado pelo Pydantic
     request: Request,                # Request bruto (headers, IP, etc.)
-    db: Session = Depends(get_db)    # Sessão do banco
+    response: Response,              # Status/headers da resposta (replay de Idempotency-Key)
+    db: AsyncSession = Depends(get_async_db),   # Sessão async (autenticação, cota, idempotência)
+    work_db: Session = Depends(get_db),         # Sessão síncrona do serviço de ingestão (threadpool)
 ):
-    # valida api key (401 se falhar)
-    require_api_key_for_ingest(request=request,db=db, source=req.source)
-    
+    # valida api key (401 se falhar); a cota é cobrada em _idempotent
+    src = await authenticate_ingest(request=request, db=db, source=req.source, cost=0)
+
     # IP do cliente (pode ser None em alguns ambientes)
     client_ip = request.client.host if request.client else None
 
     # User-Agent enviado pelo cliente
     user_agent = request.headers.get("user-agent")
 
-    # Delegação da lógica para a camada de serviço
-    return ingest_event(db, req, client_ip, user_agent)
+    async def run() -> dict:
+        # Micro-batching: agrupa requisições concorrentes em uma única transação
+        if settings.INGEST_COALESCE_ENABLED:
+            async def coalesced() -> dict:
+                # Devolve a conexão ao pool enquanto aguarda o flush do lote
+                await db.close()
+                return await ingest_coalescer.submit_async(req, client_ip, user_agent)
+
+            return await _admitted(src, 1, coalesced)
+
+        # Delegação da lógica para a camada de serviço (CPU e I/O fora do event loop)
+        return await _admitted(src, 1, lambda: run_in_threadpool(ingest_event, work_db, req, client_ip, user_agent))
+
+    return await _idempotent(request, response, db, src, [req], run)
+
+@router.post("/ingest/batch", response_model=IngestBatchResponse)
+async def ingest_batch_route(
+    reqs: list[IngestRequest],       # Lista de eventos validados pelo Pydantic
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    work_db: Session = Depends(get_db),
+):
+    # Lote vazio ou acima do limite configurado
+    if not reqs:
+        raise HTTPException(status_code=400, detail="empty_batch")
+    if len(reqs) > settings.INGEST_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail="batch_too_large")
+
+    # Um lote pertence a uma única fonte (uma API key)
+    sources = {r.source for r in reqs}
+    if len(sources) != 1:
+        raise HTTPException(status_code=400, detail="batch_mixed_sources")
+
+    # Autentica a fonte uma única vez para o lote inteiro (a cota, um token por evento, é cobrada em _idempotent)
+    src = await authenticate_ingest(request=request, db=db, source=reqs[0].source, cost=0)
+
+    client_ip = request.client.host if request.client else None
+    user_agent = request.headers.get("user-agent")
+
+    async def run() -> dict:
+        # Canonicalização, hash e validação do lote: numa thread, sem travar o event loop
+        return await _admitted(
+            src, len(reqs), lambda: run_in_threadpool(ingest_batch, work_db, reqs, client_ip, user_agent)
+        )
+
+    return await _idempotent(request, response, db, src, reqs, run)
+
+@router.post("/ingest/validate", response_model=IngestValidateResponse)
+async def ingest_validate(
+    request: Request,
+    payload: Any = Body(...),        # Um evento ou uma lista (cada item é validado separadamente)
+    db: AsyncSession = Depends(get_async_db),
+    work_db: Session = Depends(get_db),
+):
+    # Dry-run: mesma validação da ingestão, sem gravar nada
+    items = [payload] if isinstance(payload, dict) else payload
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="invalid_body")
+    if not items:
+        raise HTTPException(status_code=400, detail="empty_batch")
+    if len(items) > settings.INGEST_VALIDATE_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail="batch_too_large")
+
+    # Uma única fonte (uma API key) por chamada
+    sources = {it.get("source") for it in items if isinstance(it, dict)}
+    sources = {s for s in sources if isinstance(s, str) and s}
+    if len(sources) > 1:
+        raise HTTPException(status_code=400, detail="batch_mixed_sources")
+    if not sources:
+        raise HTTPException(status_code=400, detail="missing_source")
+
+    # Autentica pelo cache de fontes (banco só em miss)
+    src = await authenticate_ingest(request=request, db=db, source=sources.pop(), cost=len(items))
+
+    # Itens fora do contrato ficam INVALID; os demais passam pelas regras
+    results: list[dict] = []
+    parsed: list[tuple[int, IngestRequest]] = []
+    for index, item in enumerate(items):
+        try:
+            parsed.append((index, IngestRequest.model_validate(item)))
+            results.append({"index": index, "status": "VALID"})
+        except ValidationError as e:
+            results.append({
+                "index": index,
+                "status": "INVALID",
+                "detail": [
+                    {"loc": list(err["loc"]), "msg": err["msg"], "type": err["type"]}
+                    for err in e.errors()
+                ],
+            })
+
+    if parsed:
+        outcomes = await run_in_threadpool(validate_only, work_db, src.id, [req for _, req in parsed])
+        for (index, _), outcome in zip(parsed, outcomes):
+            results[index].update(outcome)
+            if outcome["errors"]:
+                results[index]["status"] = "REJECTED"
+
+    statuses = [r["status"] for r in results]
+    return {
+        "total": len(results),
+        "valid": statuses.count("VALID"),
+        "rejected": statuses.count("REJECTED"),
+        "invalid": statuses.count("INVALID"),
+        "duplicates": sum(1 for r in results if r.get("duplicate")),
+        "items": results,
+    }
+
+@router.post("/ingest/async", status_code=202)
+async def ingest_async(
+    req: IngestRequest,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Modo opcional: só disponível com o spool habilitado
+    if not settings.INGEST_SPOOL_ENABLED or not spool_worker.started:
+        raise HTTPException(status_code=503, detail="async_ingest_disabled")
+
+    # Autenticação e validação de schema continuam síncronas (cota cobrada em _idempotent)
+    src = await authenticate_ingest(request=request, db=db, source=req.source, cost=0)
+
+    async def run() -> dict:
+        # request_id devolvido agora e reaproveitado quando o evento for gravado
+        request_id = new_request_id()
+        # Append com fsync: fora do event loop
+        await run_in_threadpool(spool_worker.enqueue, {
+            "request_id": request_id,
+            "client_ip": request.client.host if request.client else None,
+            "user_agent": request.headers.get("user-agent"),
+            "event": req.model_dump(mode="json"),
+        })
+        return {"status": "QUEUED", "request_id": request_id}
+
+    return await _idempotent(request, response, db, src, [req], run, status_code=202)
+
+@router.post("/ingest/stream", response_model=IngestStreamResponse)
+async def ingest_stream(
+    request: Request,
+    source: str = Query(..., min_length=1),   # Fonte de todas as linhas do stream
+    db: AsyncSession = Depends(get_async_db),
+    work_db: Session = Depends(get_db),
+):
+    # Corpo NDJSON: um IngestRequest por linha
+    if not is_ndjson(request.headers.get("content-type")):
+        raise HTTPException(status_code=415, detail="unsupported_media_type")
+
+    # Autentica a fonte uma única vez para o stream inteiro; a cota é cobrada por chunk
+    src = await authenticate_ingest(request=request, db=db, source=source, cost=0)
+
+    client_ip = request.client.host if request.client else None
+    user_agent = request.headers.get("user-agent")
+
+    # Stream não tem teto absoluto: a memória é limitada por linha/chunk
+    # (bombas de descompressão continuam barradas pelo limite de razão)
+    if isinstance(request, DecompressedRequest):
+        request.max_decompressed_bytes = None
+
+    summary = {"total": 0, "accepted": 0, "rejected": 0, "duplicates": 0, "invalid": 0, "errors": []}
+    max_errors = settings.INGEST_STREAM_MAX_ERRORS
+
+    def add_error(error: dict) -> None:
+        # Lista de erros limitada; os contadores continuam exatos
+        if len(summary["errors"]) < max_errors:
+            summary["errors"].append(error)
+        else:
+            summary["errors_truncated"] = True
+
+    async def flush(chunk: list[tuple[int, IngestRequest]], prepared: list[Prepared] | None = None) -> None:
+        # Um token por evento do chunk; sem saldo o stream para com 429
+        # (chunks anteriores já gravados; o reenvio é deduplicado por external_id)
+        await db.run_sync(require_quota, src, len(chunk))
+        # Persiste um chunk em uma transação (mesma lógica do /ingest/batch)
+        result = await run_in_threadpool(
+            ingest_batch, work_db, [req for _, req in chunk], client_ip, user_agent, prepared
+        )
+        summary["accepted"] += result["accepted"]
+        summary["rejected"] += result["rejected"]
+        summary["duplicates"] += result["duplicates"]
+        for (line_no, _), item in zip(chunk, result["items"]):
+            if item["status"] == "REJECTED":
+                add_error({
+                    "line": line_no,
+                    "error": "REJECTED",
+                    "raw_id": item["raw_id"],
+                    "error_count": item.get("error_count"),
+                })
+
+    async def prepare_and_flush(raw: list[tuple[int, bytes]]) -> None:
+        # Estágio de CPU: parse, canonicalização, hash e validação nos workers
+        results = await cpu_stage.prepare_async([line for _, line in raw], src.id, source)
+        chunk: list[tuple[int, IngestRequest]] = []
+        prepared: list[Prepared] = []
+        for (line_no, _), result in zip(raw, results):
+            if result[0] == "INVALID":
+                summary["invalid"] += 1
+                add_error({"line": line_no, **result[1]})
+                continue
+            chunk.append((line_no, to_request(result[1])))
+            prepared.append(to_prepared(result))
+        if chunk:
+            await flush(chunk, prepared)
+
+    use_cpu_stage = cpu_stage.enabled
+    # Chunks nunca maiores que a rajada da cota (senão nenhum caberia no bucket)
+    chunk_size = settings.INGEST_STREAM_CHUNK_SIZE
+    max_cost = ingest_quota.max_cost(src)
+    if max_cost is not None:
+        chunk_size = min(chunk_size, max_cost)
+    raw_chunk: list[tuple[int, bytes]] = []
+    chunk: list[tuple[int, IngestRequest]] = []
+    async for line_no, line in iter_lines(request.stream(), settings.INGEST_STREAM_MAX_LINE_BYTES):
+        summary["total"] += 1
+
+        if line is None:
+            summary["invalid"] += 1
+            add_error({"line": line_no, "error": "line_too_long"})
+            continue
+
+        if use_cpu_stage:
+            raw_chunk.append((line_no, line))
+            if len(raw_chunk) >= chunk_size:
+                await prepare_and_flush(raw_chunk)
+                raw_chunk = []
+            continue
+
+        try:
+            req = IngestRequest.model_validate_json(line)
+        except ValidationError as e:
+            summary["invalid"] += 1
+            add_error({"line": line_no, **validation_error_detail(e)})
+            continue
+
+        # A API key autentica apenas a fonte informada na query
+        if req.source != source:
+            summary["invalid"] += 1
+            add_error({"line": line_no, "error": "source_mismatch"})
+            continue
+
+        chunk.append((line_no, req))
+        if len(chunk) >= chunk_size:
+            await flush(chunk)
+            chunk = []
+
+    if raw_chunk:
+        await prepare_and_flush(raw_chunk)
+    if chunk:
+        await flush(chunk)
+
+    return summary
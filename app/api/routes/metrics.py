@@ -17,6 +17,7 @@ from app.api.schemas.metrics import MetricsResponse
 from app.infra.db.repositories.metrics_repo import get_metrics
 from app.core.http_metrics import snapshot as http_snapshot
 from app.core.http_metrics import routes_snapshot
+from app.core.pipeline_metrics import snapshot as pipeline_snapshot
 
 router = APIRouter(prefix="/api/v1", tags=["metrics"])
 
@@ -52,5 +53,6 @@ def metrics(
     data = get_metrics(db, date_from=df, date_to=dt, source_id=source_id, top_n=top_n)
     data["http"] = http_snapshot()
     data["http_routes"] = routes_snapshot()
+    data["pipeline"] = pipeline_snapshot()
 
     return data
\ No newline at end of file
@@ -6,9 +6,9 @@ Restricted to analyst and admin roles.
 """
 
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.infra.db.session import get_db
+from app.infra.db.session import get_async_db
 from app.infra.db.repositories.rejection_repo import list_rejections
 from app.api.schemas.rejection import PageResponse, RejectionItem
 from app.api.deps import require_roles
@@ -19,7 +19,7 @@ router = APIRouter(prefix="/api/v1", tags=["rejections"])
 
 
 @router.get("/rejections", response_model=PageResponse)
-def get_rejections(
+async def get_rejections(
     # Filtros opcionais
     category: str | None = Query(default=None),
     severity: str | None = Query(default=None),
@@ -29,11 +29,11 @@ def get_rejections(
     page_size: int = Query(default=50, ge=1, le=200),
 
     # Dependências
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(require_roles(["analyst", "admin"])),
 ):
     # Busca rejeições no repositório com paginação
-    total, rows = list_rejections(
+    total, rows = await list_rejections(
         db,
         category=category,
         severity=severity,
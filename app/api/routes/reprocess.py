@@ -0,0 +1,51 @@
+"""
+Reprocess endpoint.
+
+Admin-only re-validation of REJECTED raw events after a rule change.
+Each call handles at most REPROCESS_API_MAX_ROWS rows in one transaction
+and returns `last_id` to continue; large backlogs go through the
+`app.scripts.reprocess` command.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.api.deps import require_roles
+from app.api.schemas.reprocess import ReprocessRequest, ReprocessResponse
+from app.core.settings import settings
+from app.infra.db.repositories.source_repo import source_registry
+from app.infra.db.session import get_db
+from app.services.reprocess_service import ReprocessFilter, reprocess
+
+
+# Router do módulo de reprocessamento
+router = APIRouter(prefix="/api/v1", tags=["reprocess"])
+
+
+@router.post("/reprocess", response_model=ReprocessResponse)
+def post_reprocess(
+    payload: ReprocessRequest,
+    db: Session = Depends(get_db),
+    user=Depends(require_roles(["admin"])),
+):
+    # Resolve nome da fonte para source_id
+    source_id = None
+    if payload.source is not None:
+        src = source_registry.resolve(db, payload.source)
+        if not src:
+            raise HTTPException(status_code=404, detail="source_not_found")
+        source_id = src.id
+
+    flt = ReprocessFilter(source_id, payload.received_from, payload.received_to, payload.rule)
+    max_rows = min(payload.max_rows or settings.REPROCESS_API_MAX_ROWS, settings.REPROCESS_API_MAX_ROWS)
+
+    # Leitura e escrita na mesma sessão: um único commit no fim
+    result = reprocess(
+        db, db, flt,
+        after_id=payload.after_id,
+        chunk_size=min(max_rows, 1000),
+        max_rows=max_rows,
+    )
+    db.commit()
+
+    return ReprocessResponse(**result)
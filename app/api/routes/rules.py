@@ -0,0 +1,190 @@
+"""
+Validation rules endpoints.
+
+Admin-only management of declarative validation rule sets (live and
+shadow candidates, with the candidates' divergence counters), of the
+reference data used by "reference" rules and of attribute schemas per
+schema_version, applied by the ingest routes without a deploy.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.api.deps import require_roles
+from app.api.schemas.rules import (
+    AttributeSchemaItem,
+    AttributeSchemaUpsertRequest,
+    ReferenceDatasetItem,
+    ReferenceUpdateRequest,
+    RuleSetItem,
+    RuleSetUpsertRequest,
+    ShadowDivergenceItem,
+)
+from app.domain.attribute_schema import SchemaError, compile_attribute_schema
+from app.domain.rules import RuleError, compile_rules
+from app.infra.db.models.source_system import SourceSystem
+from app.infra.db.repositories.reference_repo import (
+    count_reference_values,
+    reference_cache,
+    upsert_reference_values,
+)
+from app.infra.db.repositories.rule_repo import list_rule_sets, upsert_rule_set
+from app.infra.db.repositories.schema_repo import list_attribute_schemas, upsert_attribute_schema
+from app.infra.db.repositories.shadow_repo import list_divergences
+from app.infra.db.repositories.source_repo import source_registry
+from app.infra.db.session import get_db
+
+
+# Router do módulo de regras de validação
+router = APIRouter(prefix="/api/v1", tags=["rules"])
+
+
+def _source_names(db: Session, rows) -> dict[int, str]:
+    ids = {r.source_id for r in rows if r.source_id is not None}
+    if not ids:
+        return {}
+    return dict(db.query(SourceSystem.id, SourceSystem.name).filter(SourceSystem.id.in_(ids)).all())
+
+
+def _resolve_source_id(db: Session, name: str | None) -> int | None:
+    # Resolve nome da fonte para source_id (None = todas as fontes)
+    if name is None:
+        return None
+    src = source_registry.resolve(db, name)
+    if not src:
+        raise HTTPException(status_code=404, detail="source_not_found")
+    return src.id
+
+
+def _to_item(row, source_names: dict[int, str]) -> RuleSetItem:
+    return RuleSetItem(
+        id=row.id,
+        source=source_names.get(row.source_id) if row.source_id is not None else None,
+        schema_version=row.schema_version,
+        stage=row.stage,
+        rules=row.rules,
+        version=row.version,
+        is_active=row.is_active,
+        updated_at=row.updated_at.isoformat(),
+    )
+
+
+@router.get("/rules", response_model=list[RuleSetItem])
+def get_rules(
+    db: Session = Depends(get_db),
+    user=Depends(require_roles(["admin"])),
+):
+    rows = list_rule_sets(db)
+    names = _source_names(db, rows)
+    return [_to_item(r, names) for r in rows]
+
+
+@router.put("/rules", response_model=RuleSetItem)
+def put_rules(
+    payload: RuleSetUpsertRequest,
+    db: Session = Depends(get_db),
+    user=Depends(require_roles(["admin"])),
+):
+    # Regras inválidas são recusadas antes de gravar (compilação completa)
+    try:
+        compile_rules(payload.rules, references=reference_cache.lookup_for(None))
+    except RuleError as e:
+        raise HTTPException(status_code=422, detail=f"invalid_rules: {e}")
+
+    source_id = _resolve_source_id(db, payload.source)
+    row = upsert_rule_set(db, source_id, payload.schema_version, payload.rules, payload.is_active, payload.stage)
+    db.commit()
+    db.refresh(row)
+
+    return _to_item(row, {source_id: payload.source} if source_id is not None else {})
+
+
+@router.get("/rules/shadow", response_model=list[ShadowDivergenceItem])
+def get_shadow_divergences(
+    rule_set_id: int | None = Query(default=None),
+    db: Session = Depends(get_db),
+    user=Depends(require_roles(["admin"])),
+):
+    rows = list_divergences(db, rule_set_id)
+    names = _source_names(db, rows)
+    return [
+        ShadowDivergenceItem(
+            rule_set_id=r.rule_set_id,
+            rule_set_version=r.rule_set_version,
+            source=names.get(r.source_id),
+            rule=r.rule,
+            evaluated=r.evaluated,
+            would_reject=r.would_reject,
+            would_accept=r.would_accept,
+            last_seen_at=r.last_seen_at.isoformat(),
+        )
+        for r in rows
+    ]
+
+
+@router.get("/reference", response_model=list[ReferenceDatasetItem])
+def get_reference_datasets(
+    db: Session = Depends(get_db),
+    user=Depends(require_roles(["admin"])),
+):
+    return [ReferenceDatasetItem(dataset=d, values=n) for d, n in count_reference_values(db)]
+
+
+@router.post("/reference/{dataset}")
+def post_reference_values(
+    dataset: str,
+    payload: ReferenceUpdateRequest,
+    db: Session = Depends(get_db),
+    user=Depends(require_roles(["admin"])),
+):
+    source_id = _resolve_source_id(db, payload.source)
+    added = upsert_reference_values(db, dataset, source_id, payload.add)
+    removed = upsert_reference_values(db, dataset, source_id, payload.remove, is_active=False)
+    db.commit()
+
+    # Este processo enxerga a alteração na próxima validação (os demais no refresh)
+    reference_cache.mark_stale()
+
+    return {"dataset": dataset, "added": added, "removed": removed}
+
+
+def _to_schema_item(row, source_names: dict[int, str]) -> AttributeSchemaItem:
+    return AttributeSchemaItem(
+        id=row.id,
+        source=source_names.get(row.source_id) if row.source_id is not None else None,
+        schema_version=row.schema_version,
+        json_schema=row.json_schema,
+        version=row.version,
+        is_active=row.is_active,
+        updated_at=row.updated_at.isoformat(),
+    )
+
+
+@router.get("/schemas", response_model=list[AttributeSchemaItem])
+def get_attribute_schemas(
+    db: Session = Depends(get_db),
+    user=Depends(require_roles(["admin"])),
+):
+    rows = list_attribute_schemas(db)
+    names = _source_names(db, rows)
+    return [_to_schema_item(r, names) for r in rows]
+
+
+@router.put("/schemas", response_model=AttributeSchemaItem)
+def put_attribute_schema(
+    payload: AttributeSchemaUpsertRequest,
+    db: Session = Depends(get_db),
+    user=Depends(require_roles(["admin"])),
+):
+    # Schema precisa compilar antes de ser gravado
+    try:
+        compile_attribute_schema(payload.json_schema)
+    except SchemaError as e:
+        raise HTTPException(status_code=422, detail=f"invalid_schema: {e}")
+
+    source_id = _resolve_source_id(db, payload.source)
+    row = upsert_attribute_schema(db, source_id, payload.schema_version, payload.json_schema, payload.is_active)
+    db.commit()
+    db.refresh(row)
+
+    return _to_schema_item(row, {source_id: payload.source} if source_id is not None else {})
@@ -8,9 +8,9 @@ Restricted to auditor and admin roles.
 from datetime import datetime
 
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.infra.db.session import get_db
+from app.infra.db.session import get_async_db
 from app.api.deps import require_roles
 from app.api.schemas.security_events import PageResponse, SecurityEventItem
 from app.infra.db.repositories.security_event_repo import list_security_events
@@ -21,7 +21,7 @@ router = APIRouter(prefix="/api/v1", tags=["security-events"])
 
 
 @router.get("/security-events", response_model=PageResponse)
-def get_security_events(
+async def get_security_events(
     # Filtros opcionais
     severity: str | None = Query(default=None),
     event_type: str | None = Query(default=None),
@@ -35,7 +35,7 @@ def get_security_events(
     page_size: int = Query(default=50, ge=1, le=200),
 
     # Dependências
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(require_roles(["auditor", "admin"])),
 ):
     # Converte datas ISO para datetime (se fornecidas)
@@ -43,7 +43,7 @@ def get_security_events(
     dt = datetime.fromisoformat(date_to.replace("Z", "+00:00")) if date_to else None
 
     # Busca eventos de segurança no repositório com paginação
-    total, rows = list_security_events(
+    total, rows = await list_security_events(
         db,
         severity=severity,
         event_type=event_type,
@@ -8,10 +8,11 @@ controlled updates with full audit logging.
 from datetime import datetime
 
 from fastapi import APIRouter, Depends, Query, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.infra.db.session import get_db
-from app.infra.db.repositories.source_repo import get_source_by_name
+from app.infra.db.session import get_async_db, get_db
+from app.infra.db.repositories.source_repo import source_registry
 from app.infra.db.repositories.trusted_repo import list_trusted, get_trusted_by_id
 from app.infra.db.repositories.audit_repo import create_audit_log
 from app.api.schemas.trusted import PageResponse, TrustedItem, TrustedPatchRequest
@@ -22,7 +23,7 @@ from app.api.deps import require_roles
 router = APIRouter(prefix="/api/v1", tags=["trusted"])
 
 @router.get("/trusted", response_model=PageResponse)
-def get_trusted(
+async def get_trusted(
     # Filtros opcionais
     source: str | None = Query(default=None),
     external_id: str | None = Query(default=None),
@@ -35,14 +36,14 @@ def get_trusted(
     page_size: int = Query(default=50, ge=1, le=200),
 
     # Dependências
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(require_roles(["operator", "analyst", "admin"])),
 ):
     source_id = None
 
     # Resolve nome da fonte para source_id
     if source:
-        src = get_source_by_name(db, source)
+        src = await db.run_sync(source_registry.resolve, source)
         if not src:
             # Fonte inexistente → resposta vazia
             return PageResponse(
@@ -58,7 +59,7 @@ def get_trusted(
     dt = datetime.fromisoformat(date_to.replace("Z", "+00:00")) if date_to else None
 
     # Busca eventos confiáveis no repositório
-    total, rows = list_trusted(
+    total, rows = await list_trusted(
         db=db,
         source_id=source_id,
         external_id=external_id,
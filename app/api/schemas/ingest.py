@@ -32,3 +32,62 @@ class IngestRequest(BaseModel):
 
     # Dados adicionais livres do evento
     attributes: dict = Field(default_factory=dict)
+
+
+# Resultado individual de um item do lote
+class IngestBatchItem(BaseModel):
+    index: int                       # Posição do item no lote recebido
+    status: str                      # ACCEPTED | REJECTED | DUPLICATE
+    raw_id: int                      # ID do registro RAW gravado (duplicado contado: RAW original)
+    trusted_id: int | None = None    # ID do TRUSTED (somente ACCEPTED)
+    error_count: int | None = None   # Quantidade de rejeições (somente REJECTED)
+    request_id: str                  # Identificador de rastreio do item
+    replayed: bool = False           # Reenvio idêntico: resultado original, nada foi gravado
+
+
+# Resposta da ingestão em lote
+class IngestBatchResponse(BaseModel):
+    total: int
+    accepted: int
+    rejected: int
+    duplicates: int
+    items: list[IngestBatchItem]
+
+
+# Resultado individual da validação sem persistência (dry-run)
+class IngestValidateItem(BaseModel):
+    index: int                       # Posição do item no corpo recebido
+    status: str                      # VALID | REJECTED | INVALID
+    errors: list[dict] = Field(default_factory=list)  # Rejeições que a ingestão gravaria (REJECTED)
+    detail: list[dict] | None = None # Erros de validação do Pydantic (somente INVALID)
+    duplicate: bool = False          # Dica: external_id já ingerido ou repetido no corpo
+
+
+# Resposta da validação sem persistência (dry-run)
+class IngestValidateResponse(BaseModel):
+    total: int
+    valid: int
+    rejected: int
+    invalid: int                     # Itens que nem chegam às regras (payload fora do contrato)
+    duplicates: int
+    items: list[IngestValidateItem]
+
+
+# Erro de uma linha do stream NDJSON
+class IngestStreamError(BaseModel):
+    line: int                        # Número da linha no corpo recebido (1-based)
+    error: str                       # invalid_json | validation_error | line_too_long | source_mismatch | REJECTED
+    detail: list[dict] | None = None # Erros de validação do Pydantic (quando houver)
+    raw_id: int | None = None        # ID do RAW gravado (somente REJECTED)
+    error_count: int | None = None   # Quantidade de rejeições (somente REJECTED)
+
+
+# Resumo da ingestão NDJSON em streaming
+class IngestStreamResponse(BaseModel):
+    total: int                       # Linhas não vazias lidas
+    accepted: int
+    rejected: int
+    duplicates: int
+    invalid: int                     # Linhas descartadas antes da persistência
+    errors: list[IngestStreamError]
+    errors_truncated: bool = False   # True se a lista de erros atingiu o limite
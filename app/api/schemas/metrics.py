@@ -5,6 +5,8 @@ DTOs for aggregated pipeline metrics, HTTP counters,
 and rejection category ranking.
 """
 
+from typing import Any
+
 from pydantic import BaseModel
 
 class HttpMetrics(BaseModel):
@@ -20,6 +22,18 @@ class TopCategoryItem(BaseModel):
 class HttpRouteStats(BaseModel):
     count: int # Total de requisições para a rota
     avg_ms: float # Tempo médio de resposta para a rota (em ms)
+
+class HistogramStats(BaseModel):
+    count: int # Total de observações
+    sum: float # Soma dos valores observados
+    buckets: dict[str, int] # Contagem por limite superior do bucket
+
+class PipelineMetrics(BaseModel):
+    counters: dict[str, float] = {} # Contadores do pipeline de ingestão
+    gauges: dict[str, float] = {} # Valores instantâneos (ex: profundidade de fila)
+    histograms: dict[str, HistogramStats] = {} # Distribuições (ex: tamanho de lote)
+    collectors: dict[str, dict[str, Any]] = {} # Estatísticas de componentes (ex: caches)
+
 class MetricsResponse(BaseModel):
     total_raw: int # Total de eventos recebidos
     total_trusted: int # Total de eventos aceitos
@@ -30,4 +44,5 @@ class MetricsResponse(BaseModel):
     
     http: HttpMetrics  # Métricas HTTP agregadas (uptime + contadores)
     http_routes: dict[str, HttpRouteStats] # Métricas de rota
+    pipeline: PipelineMetrics = PipelineMetrics() # Métricas internas do pipeline de ingestão
     
\ No newline at end of file
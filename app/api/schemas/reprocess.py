@@ -0,0 +1,30 @@
+"""
+Reprocess schemas.
+
+DTOs for the admin reprocessing of rejected raw events.
+"""
+
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+# Request do POST /reprocess (filtros + paginação por id)
+class ReprocessRequest(BaseModel):
+    source: str | None = None
+    received_from: datetime | None = None
+    received_to: datetime | None = None
+    rule: str | None = None              # só eventos com rejeição vigente dessa regra
+    after_id: int = Field(default=0, ge=0)  # continuação: last_id da chamada anterior
+    max_rows: int | None = Field(default=None, ge=1)
+
+
+# Resultado de uma chamada
+class ReprocessResponse(BaseModel):
+    scanned: int
+    promoted: int          # viraram TRUSTED
+    still_rejected: int
+    changed: int           # continuam REJECTED com outros erros
+    unparseable: int
+    last_id: int
+    done: bool             # False → chamar de novo com after_id=last_id
@@ -0,0 +1,74 @@
+"""
+Validation rule schemas.
+
+DTOs for reading and replacing declarative validation rule sets.
+"""
+
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+
+# Conjunto de regras de um escopo (fonte + schema_version)
+class RuleSetItem(BaseModel):
+    id: int
+    source: str | None           # None = qualquer fonte
+    schema_version: str | None   # None = qualquer versão
+    stage: str                   # live | shadow
+    rules: list[dict]
+    version: int
+    is_active: bool
+    updated_at: str  # ISO
+
+
+# Request do PUT /rules (substitui as regras do escopo)
+class RuleSetUpsertRequest(BaseModel):
+    source: str | None = None
+    schema_version: str | None = Field(default=None, max_length=20)
+    stage: Literal["live", "shadow"] = "live"   # shadow = candidato, sem efeito nas respostas
+    rules: list[dict]
+    is_active: bool = True
+
+
+# Valores ativos por dataset de referência
+class ReferenceDatasetItem(BaseModel):
+    dataset: str
+    values: int
+
+
+# Request do POST /reference/{dataset} (inclusões e remoções)
+class ReferenceUpdateRequest(BaseModel):
+    source: str | None = None    # None = valores válidos para todas as fontes
+    add: list[str] = Field(default_factory=list)
+    remove: list[str] = Field(default_factory=list)
+
+
+# Schema de attributes de um escopo (fonte + schema_version)
+class AttributeSchemaItem(BaseModel):
+    id: int
+    source: str | None           # None = qualquer fonte
+    schema_version: str
+    json_schema: dict
+    version: int
+    is_active: bool
+    updated_at: str  # ISO
+
+
+# Request do PUT /schemas (substitui o schema do escopo)
+class AttributeSchemaUpsertRequest(BaseModel):
+    source: str | None = None
+    schema_version: str = Field(..., min_length=1, max_length=20)
+    json_schema: dict
+    is_active: bool = True
+
+
+# Divergências de um conjunto candidato (rule = "*" → totais da fonte)
+class ShadowDivergenceItem(BaseModel):
+    rule_set_id: int
+    rule_set_version: int
+    source: str | None
+    rule: str
+    evaluated: int
+    would_reject: int   # aceitos hoje, rejeitados pelo candidato
+    would_accept: int   # rejeitados hoje, aceitos pelo candidato
+    last_seen_at: str  # ISO
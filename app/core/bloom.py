@@ -0,0 +1,92 @@
+"""
+Scalable Bloom filter.
+
+Probabilistic set membership with no false negatives: `might_contain`
+returning False means the key was never added. Capacity grows by adding
+stages (each larger and with a tighter error rate), so the compound
+false-positive rate stays bounded by the configured target.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+from threading import Lock
+
+# Crescimento de capacidade e aperto da taxa de erro a cada novo estágio
+_GROWTH = 2
+_TIGHTENING = 0.5
+
+
+class _Stage:
+    def __init__(self, capacity: int, fp_rate: float) -> None:
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        # m = -n ln p / (ln 2)^2 ; k = m/n ln 2
+        self.m = max(8, int(-capacity * math.log(fp_rate) / (math.log(2) ** 2)))
+        self.k = max(1, round(self.m / capacity * math.log(2)))
+        self.bits = bytearray((self.m + 7) // 8)
+        self.count = 0
+
+    def _positions(self, h1: int, h2: int):
+        # Double hashing (Kirsch–Mitzenmacher)
+        m = self.m
+        return ((h1 + i * h2) % m for i in range(self.k))
+
+    def add(self, h1: int, h2: int) -> None:
+        bits = self.bits
+        for pos in self._positions(h1, h2):
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def contains(self, h1: int, h2: int) -> bool:
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(h1, h2))
+
+    def estimated_fp_rate(self) -> float:
+        # (1 - e^(-kn/m))^k com a ocupação atual
+        return (1 - math.exp(-self.k * self.count / self.m)) ** self.k
+
+
+def _hashes(key: str) -> tuple[int, int]:
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+
+class ScalableBloomFilter:
+    def __init__(self, initial_capacity: int = 65536, fp_rate: float = 0.001) -> None:
+        self.initial_capacity = max(1, int(initial_capacity))
+        self.fp_rate = float(fp_rate)
+        self._lock = Lock()
+        self._stages = [_Stage(self.initial_capacity, self.fp_rate * _TIGHTENING)]
+
+    def add(self, key: str) -> None:
+        h1, h2 = _hashes(key)
+        with self._lock:
+            stage = self._stages[-1]
+            if stage.count >= stage.capacity:
+                # Estágio cheio → novo estágio maior e mais rigoroso
+                stage = _Stage(stage.capacity * _GROWTH, stage.fp_rate * _TIGHTENING)
+                self._stages.append(stage)
+            stage.add(h1, h2)
+
+    def might_contain(self, key: str) -> bool:
+        h1, h2 = _hashes(key)
+        with self._lock:
+            return any(stage.contains(h1, h2) for stage in self._stages)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(s.count for s in self._stages)
+
+    def memory_bytes(self) -> int:
+        with self._lock:
+            return sum(len(s.bits) for s in self._stages)
+
+    def estimated_fp_rate(self) -> float:
+        # Taxa composta: 1 - Π(1 - p_i)
+        with self._lock:
+            ok = 1.0
+            for s in self._stages:
+                ok *= 1 - s.estimated_fp_rate()
+            return 1 - ok
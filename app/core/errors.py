@@ -27,7 +27,8 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     if rid:
         payload["request_id"] = rid
 
-    return JSONResponse(status_code=exc.status_code, content=payload)
+    # Headers do erro (ex.: Retry-After no 429) seguem na resposta
+    return JSONResponse(status_code=exc.status_code, content=payload, headers=exc.headers)
 
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     # Tratamento para erros de validação (422)
@@ -0,0 +1,99 @@
+"""
+In-memory ingest pipeline metrics.
+
+Counters, gauges and fixed-bucket histograms for the ingest pipeline
+(batching, caches, queues), plus pluggable collectors for components
+that compute their own stats on demand.
+Thread-safe via a lock.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Callable
+
+_lock = Lock()
+
+# Buckets padrão (limites superiores, inclusivos)
+DEFAULT_BUCKETS: tuple[float, ...] = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+# Estrutura de um histograma com buckets fixos
+@dataclass
+class Histogram:
+    buckets: tuple[float, ...]
+    counts: list[int] = field(default_factory=list)
+    count: int = 0
+    total: float = 0.0
+
+    def __post_init__(self) -> None:
+        # Um contador por bucket + overflow (+Inf)
+        self.counts = [0] * (len(self.buckets) + 1)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += float(value)
+
+
+_counters: dict[str, float] = {}
+_gauges: dict[str, float] = {}
+_histograms: dict[str, Histogram] = {}
+_collectors: dict[str, Callable[[], dict]] = {}
+
+
+def incr(name: str, value: float = 1) -> None:
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def set_gauge(name: str, value: float) -> None:
+    with _lock:
+        _gauges[name] = float(value)
+
+
+def observe(name: str, value: float, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+    with _lock:
+        h = _histograms.get(name)
+        if h is None:
+            h = Histogram(buckets=buckets)
+            _histograms[name] = h
+        h.observe(value)
+
+
+def register_collector(name: str, fn: Callable[[], dict]) -> None:
+    # Componentes que calculam as próprias estatísticas (ex: caches)
+    with _lock:
+        _collectors[name] = fn
+
+
+def snapshot() -> dict:
+    # "Foto" consistente das métricas do pipeline
+    with _lock:
+        histograms = {}
+        for name, h in _histograms.items():
+            labels = [str(b) for b in h.buckets] + ["+Inf"]
+            histograms[name] = {
+                "count": h.count,
+                "sum": round(h.total, 3),
+                "buckets": dict(zip(labels, h.counts)),
+            }
+        out = {
+            "counters": dict(_counters),
+            "gauges": dict(_gauges),
+            "histograms": histograms,
+        }
+        collectors = dict(_collectors)
+
+    # Coletores rodam fora do lock (podem ter locks próprios)
+    out["collectors"] = {name: fn() for name, fn in collectors.items()}
+    return out
+
+
+def reset() -> None:
+    # Zera contadores/gauges/histogramas (útil em testes)
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _histograms.clear()
@@ -17,6 +17,9 @@ class Settings:
  
         # Banco
         self.DATABASE_URL: str = os.getenv("DATABASE_URL", "").strip()
+        # Pool da engine async (rotas async: ingestão e listagens)
+        self.DB_ASYNC_POOL_SIZE: int = int(os.getenv("DB_ASYNC_POOL_SIZE", "20"))
+        self.DB_ASYNC_MAX_OVERFLOW: int = int(os.getenv("DB_ASYNC_MAX_OVERFLOW", "10"))
 
         # JWT (Auth/Login)
         self.JWT_ALG: str = os.getenv("JWT_ALG", "HS256").strip()
@@ -50,6 +53,100 @@ class Settings:
 
         # Rate limit
         self.LOGIN_RATE_LIMIT: str = os.getenv("LOGIN_RATE_LIMIT", "5/minute").strip()
+
+        # Ingestão em lote
+        self.INGEST_BATCH_MAX_ITEMS: int = int(os.getenv("INGEST_BATCH_MAX_ITEMS", "1000"))
+
+        # Validação sem persistência (/ingest/validate)
+        self.INGEST_VALIDATE_MAX_ITEMS: int = int(os.getenv("INGEST_VALIDATE_MAX_ITEMS", "5000"))
+
+        # Cotas de ingestão por fonte (token bucket configurado em source_system)
+        self.INGEST_QUOTA_ENABLED: bool = os.getenv("INGEST_QUOTA_ENABLED", "true").strip().lower() == "true"
+
+        # Admissão justa (DRR por fonte) quando as transações de ingestão saturam
+        self.INGEST_ADMISSION_ENABLED: bool = (
+            os.getenv("INGEST_ADMISSION_ENABLED", "false").strip().lower() == "true"
+        )
+        self.INGEST_ADMISSION_CONCURRENCY: int = int(os.getenv("INGEST_ADMISSION_CONCURRENCY", "10"))
+        self.INGEST_ADMISSION_QUANTUM: int = int(os.getenv("INGEST_ADMISSION_QUANTUM", "100"))
+        self.INGEST_ADMISSION_TIMEOUT_SECONDS: float = float(os.getenv("INGEST_ADMISSION_TIMEOUT_SECONDS", "10"))
+
+        # Idempotency-Key nas rotas de ingestão (resposta gravada por fonte + chave)
+        self.IDEMPOTENCY_TTL_SECONDS: float = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+        self.IDEMPOTENCY_CACHE_MAX_ENTRIES: int = int(os.getenv("IDEMPOTENCY_CACHE_MAX_ENTRIES", "10000"))
+        self.IDEMPOTENCY_CACHE_TTL_SECONDS: float = float(os.getenv("IDEMPOTENCY_CACHE_TTL_SECONDS", "600"))
+        self.IDEMPOTENCY_WAIT_SECONDS: float = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "30"))
+        self.IDEMPOTENCY_LOCK_SECONDS: float = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))
+
+        # Estágio de CPU em processos (parse/hash/validação do /ingest/stream e do bulk_load; 0 = desligado)
+        self.INGEST_CPU_WORKERS: int = int(os.getenv("INGEST_CPU_WORKERS", "0"))
+        self.INGEST_CPU_CHUNK_SIZE: int = int(os.getenv("INGEST_CPU_CHUNK_SIZE", "250"))
+
+        # Ingestão NDJSON em streaming (/ingest/stream)
+        self.INGEST_STREAM_CHUNK_SIZE: int = int(os.getenv("INGEST_STREAM_CHUNK_SIZE", "500"))
+        self.INGEST_STREAM_MAX_LINE_BYTES: int = int(os.getenv("INGEST_STREAM_MAX_LINE_BYTES", "65536"))
+        self.INGEST_STREAM_MAX_ERRORS: int = int(os.getenv("INGEST_STREAM_MAX_ERRORS", "1000"))
+
+        # Corpos comprimidos (Content-Encoding): razão máxima descomprimido/comprimido
+        self.INGEST_MAX_DECOMPRESSION_RATIO: int = int(os.getenv("INGEST_MAX_DECOMPRESSION_RATIO", "100"))
+
+        # Reenvio idêntico (mesmo hash de payload) devolve o resultado original
+        self.INGEST_HASH_REPLAY_ENABLED: bool = (
+            os.getenv("INGEST_HASH_REPLAY_ENABLED", "false").strip().lower() == "true"
+        )
+        self.INGEST_HASH_CACHE_SIZE: int = int(os.getenv("INGEST_HASH_CACHE_SIZE", "10000"))
+        self.INGEST_HASH_CACHE_TTL_SECONDS: float = float(os.getenv("INGEST_HASH_CACHE_TTL_SECONDS", "600"))
+
+        # Duplicados: "row" (RAW completo com status DUPLICATE) ou "counter" (duplicate_tracker)
+        self.INGEST_DUPLICATE_MODE: str = os.getenv("INGEST_DUPLICATE_MODE", "row").strip().lower()
+        # No modo contador, mantém o RAW completo quando o payload difere do original
+        self.INGEST_DUPLICATE_KEEP_CHANGED: bool = (
+            os.getenv("INGEST_DUPLICATE_KEEP_CHANGED", "false").strip().lower() == "true"
+        )
+
+        # Bloom filter de chaves já vistas (pré-filtro das consultas de existência)
+        self.INGEST_BLOOM_ENABLED: bool = os.getenv("INGEST_BLOOM_ENABLED", "true").strip().lower() == "true"
+        self.INGEST_BLOOM_INITIAL_CAPACITY: int = int(os.getenv("INGEST_BLOOM_INITIAL_CAPACITY", "65536"))
+        self.INGEST_BLOOM_FP_RATE: float = float(os.getenv("INGEST_BLOOM_FP_RATE", "0.001"))
+
+        # Micro-batching de /ingest (agrupa requisições concorrentes em uma transação)
+        self.INGEST_COALESCE_ENABLED: bool = os.getenv("INGEST_COALESCE_ENABLED", "false").strip().lower() == "true"
+        self.INGEST_COALESCE_WINDOW_MS: float = float(os.getenv("INGEST_COALESCE_WINDOW_MS", "5"))
+        self.INGEST_COALESCE_MAX_BATCH: int = int(os.getenv("INGEST_COALESCE_MAX_BATCH", "100"))
+
+        # Ingestão assíncrona (202) com spool local durável
+        self.INGEST_SPOOL_ENABLED: bool = os.getenv("INGEST_SPOOL_ENABLED", "false").strip().lower() == "true"
+        self.INGEST_SPOOL_DIR: str = os.getenv("INGEST_SPOOL_DIR", "/var/lib/app/spool").strip()
+        self.INGEST_SPOOL_SEGMENT_BYTES: int = int(os.getenv("INGEST_SPOOL_SEGMENT_BYTES", str(16 * 1024 * 1024)))
+        self.INGEST_SPOOL_SEAL_MS: float = float(os.getenv("INGEST_SPOOL_SEAL_MS", "200"))
+        self.INGEST_SPOOL_CHUNK_SIZE: int = int(os.getenv("INGEST_SPOOL_CHUNK_SIZE", "500"))
+        self.INGEST_SPOOL_DRAIN_TIMEOUT_S: float = float(os.getenv("INGEST_SPOOL_DRAIN_TIMEOUT_S", "30"))
+
+        # Regras de validação compiladas por (fonte, schema_version)
+        self.RULES_CACHE_MAX_ENTRIES: int = int(os.getenv("RULES_CACHE_MAX_ENTRIES", "1024"))
+        self.RULES_CACHE_TTL_SECONDS: float = float(os.getenv("RULES_CACHE_TTL_SECONDS", "30"))
+
+        # Validadores compilados de attributes por (fonte, schema_version)
+        self.SCHEMA_CACHE_MAX_ENTRIES: int = int(os.getenv("SCHEMA_CACHE_MAX_ENTRIES", "2048"))
+        self.SCHEMA_CACHE_TTL_SECONDS: float = float(os.getenv("SCHEMA_CACHE_TTL_SECONDS", "300"))
+
+        # Dados de referência em memória: refresh incremental e recarga completa
+        self.REFERENCE_REFRESH_SECONDS: float = float(os.getenv("REFERENCE_REFRESH_SECONDS", "30"))
+        self.REFERENCE_FULL_RELOAD_SECONDS: float = float(os.getenv("REFERENCE_FULL_RELOAD_SECONDS", "600"))
+
+        # Validação shadow de conjuntos candidatos (fila limitada, descarta sob carga)
+        self.SHADOW_VALIDATION_ENABLED: bool = (
+            os.getenv("SHADOW_VALIDATION_ENABLED", "false").strip().lower() == "true"
+        )
+        self.SHADOW_QUEUE_SIZE: int = int(os.getenv("SHADOW_QUEUE_SIZE", "1000"))
+        self.SHADOW_FLUSH_SECONDS: float = float(os.getenv("SHADOW_FLUSH_SECONDS", "5"))
+
+        # Reprocessamento via API: linhas por chamada (uma transação)
+        self.REPROCESS_API_MAX_ROWS: int = int(os.getenv("REPROCESS_API_MAX_ROWS", "5000"))
+
+        # Cache de fontes / API keys (em memória, por processo)
+        self.SOURCE_CACHE_MAX_ENTRIES: int = int(os.getenv("SOURCE_CACHE_MAX_ENTRIES", "1024"))
+        self.SOURCE_CACHE_TTL_SECONDS: float = float(os.getenv("SOURCE_CACHE_TTL_SECONDS", "60"))
         
     CORS_ORIGINS: str = os.getenv("CORS_ORIGINS", "").strip()
 
@@ -0,0 +1,58 @@
+"""
+One-shot signal shared by threads and async handlers.
+
+Background threads (coalescer flush, admission dispatch) complete work
+that async route handlers wait for. A threading.Event would make the
+handler block the event loop; Signal can be waited on from a thread
+(`wait`) or awaited from a coroutine (`wait_async`) without holding a
+thread.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+
+
+def _resolve(fut: asyncio.Future) -> None:
+    if not fut.done():
+        fut.set_result(True)
+
+
+class Signal:
+    def __init__(self) -> None:
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        # Coroutines aguardando: (loop, future) acordados via call_soon_threadsafe
+        self._futures: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    def is_set(self) -> bool:
+        return self._event.is_set()
+
+    def set(self) -> None:
+        with self._lock:
+            self._event.set()
+            futures, self._futures = self._futures, []
+        for loop, fut in futures:
+            loop.call_soon_threadsafe(_resolve, fut)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self._event.wait(timeout)
+
+    async def wait_async(self, timeout: float | None = None) -> bool:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        with self._lock:
+            if self._event.is_set():
+                return True
+            entry = (loop, fut)
+            self._futures.append(entry)
+        try:
+            await asyncio.wait_for(fut, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return self._event.is_set()
+        finally:
+            with self._lock:
+                if entry in self._futures:
+                    self._futures.remove(entry)
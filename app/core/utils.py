@@ -6,23 +6,58 @@ Small helper functions for request tracing and deterministic payload hashing.
 
 import hashlib
 import json
+import re
 import uuid
 
+try:
+    import orjson
+except ImportError:  # orjson é opcional: sem ele usa o json da stdlib
+    orjson = None
+
+# orjson formata alguns floats de outro jeito que o json da stdlib
+# (1e16 vs 1e+16, 0.00001 vs 1e-05): nesses casos usa a stdlib
+_ORJSON_FLOAT_MISMATCH = re.compile(rb"[0-9][eE]|0\.0000")
+
+_ORJSON_OPTIONS = (
+    orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_PASSTHROUGH_SUBCLASS
+    if orjson is not None else 0
+)
+
 def new_request_id() -> str:
     # Gera um identificador único para a requisição
     return uuid.uuid4().hex
 
-def payload_hash(payload: dict) -> str:
+def _canonical_json_stdlib(payload: dict) -> bytes:
     # Serializa o payload de forma determinística
     # sort_keys garante ordem fixa das chaves
     # default=str evita erro com tipos não serializáveis (ex: datetime)
-    raw = json.dumps(
+    return json.dumps(
         payload,
         sort_keys=True,
         separators=(",", ":"),
         ensure_ascii=False,
         default=str,
-    )
+    ).encode("utf-8")
 
+def canonical_json(payload: dict) -> bytes:
+    # Forma canônica (UTF-8) usada no payload_raw e no payload_hash.
+    # Com orjson o resultado é byte a byte igual ao da stdlib (hashes antigos continuam válidos).
+    if orjson is not None:
+        try:
+            raw = orjson.dumps(payload, default=str, option=_ORJSON_OPTIONS)
+        except (orjson.JSONEncodeError, TypeError):
+            # Inteiros > 64 bits, chaves não-str etc.
+            return _canonical_json_stdlib(payload)
+        if not _ORJSON_FLOAT_MISMATCH.search(raw):
+            return raw
+    return _canonical_json_stdlib(payload)
+
+def canonical_payload(payload: dict) -> tuple[str, str]:
+    # Uma única serialização para o texto gravado e para o hash SHA-256
+    raw = canonical_json(payload)
+    return raw.decode("utf-8"), hashlib.sha256(raw).hexdigest()
+
+def payload_hash(payload: dict) -> str:
     # Gera hash SHA-256 do payload
-    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+    return hashlib.sha256(canonical_json(payload)).hexdigest()
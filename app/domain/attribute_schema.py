@@ -0,0 +1,162 @@
+"""
+Attribute schemas.
+
+Compiles a JSON Schema (subset) describing an event's `attributes` into a
+Pydantic TypeAdapter once, then validates attributes of one event or of a
+whole batch in a single call, producing rejection dicts with category
+SCHEMA and the JSON path of the offending value in `field`.
+
+Supported keywords: type (object, array, string, integer, number,
+boolean, null, or a list of them), properties, required,
+additionalProperties (bool or schema), items, enum, minLength, maxLength,
+pattern, minimum, maximum, minItems, maxItems. Types are strict at every
+level, including array items and free-form maps (no "1" -> 1 coercion).
+"""
+
+from __future__ import annotations
+
+from typing import Annotated, Any, Literal, Optional, Union
+
+from pydantic import ConfigDict, Field, TypeAdapter, ValidationError, create_model
+
+# Tamanhos das colunas de rejection (field / message)
+_MAX_FIELD = 120
+_MAX_MESSAGE = 500
+
+_SCALARS: dict[str, Any] = {
+    "string": str,
+    "integer": int,
+    "number": float,
+    "boolean": bool,
+    "null": type(None),
+}
+
+
+class SchemaError(ValueError):
+    """Invalid or unsupported attribute schema (raised at compile time)."""
+
+
+def _constraints(schema: dict, kind: str) -> dict:
+    # Palavras-chave do JSON Schema → argumentos de Field
+    keys = {
+        "string": {"minLength": "min_length", "maxLength": "max_length", "pattern": "pattern"},
+        "integer": {"minimum": "ge", "maximum": "le"},
+        "number": {"minimum": "ge", "maximum": "le"},
+        "array": {"minItems": "min_length", "maxItems": "max_length"},
+    }.get(kind, {})
+    return {arg: schema[key] for key, arg in keys.items() if key in schema}
+
+
+def _type_for(schema: Any, name: str) -> Any:
+    if not isinstance(schema, dict):
+        raise SchemaError(f"{name}: schema must be an object")
+
+    if "enum" in schema:
+        values = schema["enum"]
+        if not isinstance(values, list) or not values:
+            raise SchemaError(f"{name}: enum must be a non-empty list")
+        return Literal[tuple(values)]
+
+    kinds = schema.get("type", "object")
+    if isinstance(kinds, list):
+        if not kinds:
+            raise SchemaError(f"{name}: empty type list")
+        # "null" vira Optional (sem etiqueta de união no caminho do erro)
+        types = [_type_for({**schema, "type": k}, name) for k in kinds if k != "null"]
+        if not types:
+            return type(None)
+        joined = Union[tuple(types)] if len(types) > 1 else types[0]
+        return Optional[joined] if "null" in kinds else joined
+
+    if kinds == "object":
+        return _object_type(schema, name)
+    if kinds == "array":
+        item = _type_for(schema["items"], f"{name}[]") if "items" in schema else Any
+        return Annotated[list[item], Field(**_constraints(schema, "array"))]
+    if kinds in _SCALARS:
+        constraints = _constraints(schema, kinds)
+        return Annotated[_SCALARS[kinds], Field(**constraints)] if constraints else _SCALARS[kinds]
+    raise SchemaError(f"{name}: unsupported type {kinds!r}")
+
+
+def _object_type(schema: dict, name: str) -> Any:
+    properties = schema.get("properties", {})
+    required = set(schema.get("required", []))
+    extra = schema.get("additionalProperties", True)
+    if not isinstance(properties, dict):
+        raise SchemaError(f"{name}: properties must be an object")
+
+    # Sem properties e additionalProperties com schema → mapa livre tipado
+    if not properties and isinstance(extra, dict):
+        return dict[str, _type_for(extra, f"{name}.*")]
+
+    # Nomes internos f0, f1... com alias: qualquer chave JSON vira campo válido
+    fields: dict[str, Any] = {}
+    for i, (prop, prop_schema) in enumerate(properties.items()):
+        prop_type = _type_for(prop_schema, f"{name}.{prop}")
+        if prop in required:
+            fields[f"f{i}"] = (prop_type, Field(..., alias=prop))
+        else:
+            fields[f"f{i}"] = (Optional[prop_type], Field(default=None, alias=prop))
+
+    config = ConfigDict(strict=True, extra="allow" if extra is not False else "forbid")
+    return create_model("Attributes", __config__=config, **fields)
+
+
+def _json_path(loc: tuple, skip: int) -> str:
+    # ("customer", "items", 0, "sku") → $.attributes.customer.items[0].sku
+    path = "$.attributes"
+    for part in loc[skip:]:
+        path += f"[{part}]" if isinstance(part, int) else f".{part}"
+    return path
+
+
+def _error(err: dict, skip: int) -> dict:
+    return {
+        "category": "SCHEMA",
+        "field": _json_path(err["loc"], skip)[:_MAX_FIELD],
+        "rule": err["type"],
+        "message": err["msg"][:_MAX_MESSAGE],
+        "severity": "HIGH",
+    }
+
+
+class AttributeValidator:
+    """Compiled attribute schema (single event and batch adapters)."""
+
+    def __init__(self, json_schema: dict, version: int = 0) -> None:
+        attributes_type = _type_for(json_schema, "attributes")
+        self.version = version
+        self._one = TypeAdapter(attributes_type)
+        self._many = TypeAdapter(list[attributes_type])
+
+    def validate(self, attributes: Any) -> list[dict]:
+        try:
+            # strict na chamada: vale também para list/dict internos (não só campos de modelos)
+            self._one.validate_python(attributes, strict=True)
+        except ValidationError as e:
+            return [_error(err, 0) for err in e.errors(include_url=False)]
+        return []
+
+    def validate_batch(self, attributes: list) -> list[list[dict]]:
+        # Uma chamada para o lote inteiro; loc[0] é o índice do item
+        errors: list[list[dict]] = [[] for _ in attributes]
+        try:
+            self._many.validate_python(attributes, strict=True)
+        except ValidationError as e:
+            for err in e.errors(include_url=False):
+                errors[err["loc"][0]].append(_error(err, 1))
+        return errors
+
+
+def compile_attribute_schema(json_schema: Any, version: int = 0) -> AttributeValidator:
+    # SchemaError para schemas inválidos ou não suportados
+    if not isinstance(json_schema, dict):
+        raise SchemaError("schema must be an object")
+    try:
+        return AttributeValidator(json_schema, version)
+    except SchemaError:
+        raise
+    except Exception as e:
+        # Ex.: regex inválida em pattern, limites com tipo errado
+        raise SchemaError(str(e)) from None
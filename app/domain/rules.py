@@ -0,0 +1,315 @@
+"""
+Declarative validation rules.
+
+Rule sets are lists of JSON rule specs compiled once into evaluators and
+applied either to one event (`validate`) or to a whole batch column-wise
+(`validate_batch`), producing the same rejection dicts as validate_event.
+
+Rule spec (every rule also accepts "rule", "message", "severity",
+"category" and an optional cross-field "when" condition):
+
+    {"type": "allowed_values", "field": "event_type", "values": ["ORDER"]}
+    {"type": "regex", "field": "entity_id", "pattern": "ent-[0-9]+"}
+    {"type": "range", "field": "attributes.amount", "min": 0, "max": 100000}
+    {"type": "required", "keys": ["currency", "amount"]}
+    {"type": "compare", "field": "attributes.paid", "op": "<=", "other": "attributes.amount"}
+    {"type": "reference", "field": "entity_id", "dataset": "entity_catalog"}
+    {"when": {"field": "event_type", "equals": "PAYMENT"}, ...}
+    {"when": {"field": "event_status", "in": ["DONE", "FAILED"]}, ...}
+
+Fields are event fields (event_type, entity_id, ...) or dotted paths into
+attributes ("attributes.customer.id"). Absent values only fail "required"
+rules; regex uses full match. "reference" rules check the value against
+a reference dataset through the lookup given to compile_rules (category
+REFERENCE by default).
+"""
+
+from __future__ import annotations
+
+import operator
+import re
+from dataclasses import dataclass
+from typing import Any, Callable
+
+_COMPARE_OPS: dict[str, Callable[[Any, Any], bool]] = {
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">=": operator.ge,
+    ">": operator.gt,
+}
+
+
+class RuleError(ValueError):
+    """Invalid rule spec (raised at compile time)."""
+
+
+# === Acesso a campos ===
+
+def _field_getter(path: str) -> Callable[[Any], Any]:
+    # "event_type" → atributo do evento; "attributes.a.b" → caminho no dict de attributes
+    if not isinstance(path, str) or not path:
+        raise RuleError("field must be a non-empty string")
+    head, *rest = path.split(".")
+
+    def get(event: Any) -> Any:
+        value = event.get(head) if isinstance(event, dict) else getattr(event, head, None)
+        for key in rest:
+            if not isinstance(value, dict):
+                return None
+            value = value.get(key)
+        return value
+
+    return get
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _member(value: Any, options: frozenset) -> bool:
+    # Valores não hasheáveis (listas/objetos vindos do payload) nunca pertencem ao conjunto
+    try:
+        return value in options
+    except TypeError:
+        return False
+
+
+def _option_set(values: list, what: str) -> frozenset:
+    try:
+        return frozenset(values)
+    except TypeError:
+        raise RuleError(f"{what} must contain only scalar values") from None
+
+
+# === Regras compiladas ===
+
+@dataclass(frozen=True)
+class CompiledRule:
+    field: str
+    error: dict
+    get: Callable[[Any], Any]
+    check: Callable[[Any], bool]
+    when: Callable[[Any], bool] | None = None
+    # Avaliação de uma coluna inteira (lista de valores → lista de ok)
+    check_column: Callable[[list], list[bool]] | None = None
+
+    def failed(self, event: Any) -> bool:
+        if self.when is not None and not self.when(event):
+            return False
+        return not self.check(self.get(event))
+
+    def failed_indexes(self, events: list) -> list[int]:
+        # Índices dos eventos do lote que violam a regra
+        if self.when is not None:
+            idx = [i for i, ev in enumerate(events) if self.when(ev)]
+            column = [self.get(events[i]) for i in idx]
+        else:
+            idx = range(len(events))
+            column = [self.get(ev) for ev in events]
+        if self.check_column is not None:
+            ok = self.check_column(column)
+        else:
+            check = self.check
+            ok = [check(v) for v in column]
+        return [i for i, passed in zip(idx, ok) if not passed]
+
+
+def _compile_when(spec: Any) -> Callable[[Any], bool]:
+    if not isinstance(spec, dict) or "field" not in spec:
+        raise RuleError("when must be an object with a field")
+    get = _field_getter(spec["field"])
+    if "equals" in spec:
+        expected = spec["equals"]
+        return lambda ev: get(ev) == expected
+    if "in" in spec:
+        options = _option_set(spec["in"], "when.in")
+        return lambda ev: _member(get(ev), options)
+    if spec.get("present") is not None:
+        present = bool(spec["present"])
+        return lambda ev: (get(ev) is not None) == present
+    raise RuleError("when needs one of: equals, in, present")
+
+
+def _allowed_values(spec: dict):
+    values = spec.get("values")
+    if not isinstance(values, list) or not values:
+        raise RuleError("allowed_values needs a non-empty values list")
+    allowed = _option_set(values, "allowed_values")
+
+    def check(v: Any) -> bool:
+        return v is None or _member(v, allowed)
+
+    def check_column(column: list) -> list[bool]:
+        # Coluna inteira num único laço (sem uma chamada de check por valor)
+        ok = []
+        for v in column:
+            try:
+                ok.append(v is None or v in allowed)
+            except TypeError:
+                ok.append(False)
+        return ok
+
+    return check, check_column
+
+
+def _regex(spec: dict):
+    try:
+        pattern = re.compile(spec["pattern"])
+    except (KeyError, TypeError, re.error) as e:
+        raise RuleError(f"regex needs a valid pattern ({e})") from None
+    fullmatch = pattern.fullmatch
+    return (lambda v: v is None or (isinstance(v, str) and fullmatch(v) is not None)), None
+
+
+def _range(spec: dict):
+    lo, hi = spec.get("min"), spec.get("max")
+    if lo is None and hi is None:
+        raise RuleError("range needs min and/or max")
+    if not all(b is None or _is_number(b) for b in (lo, hi)):
+        raise RuleError("range bounds must be numbers")
+
+    def check(v: Any) -> bool:
+        if v is None:
+            return True
+        if not _is_number(v):
+            return False
+        return (lo is None or v >= lo) and (hi is None or v <= hi)
+
+    return check, None
+
+
+def _required(spec: dict):
+    return (lambda v: v is not None), None
+
+
+def _compare(spec: dict):
+    op = _COMPARE_OPS.get(spec.get("op"))
+    if op is None:
+        raise RuleError(f"compare op must be one of {sorted(_COMPARE_OPS)}")
+    # Comparação entre dois campos: o check recebe o evento inteiro
+    left = _field_getter(spec["field"])
+    right = _field_getter(spec.get("other"))
+
+    def check(event: Any) -> bool:
+        a, b = left(event), right(event)
+        if a is None or b is None:
+            return True
+        try:
+            return bool(op(a, b))
+        except TypeError:
+            return False
+
+    return check, None
+
+
+def _reference(spec: dict, references: Callable[[str, Any], bool] | None):
+    dataset = spec.get("dataset")
+    if not isinstance(dataset, str) or not dataset:
+        raise RuleError("reference needs a dataset")
+    if references is None:
+        raise RuleError("reference rules need a reference lookup")
+    # Consulta O(1) ao cache de referência (valor ausente não é avaliado)
+    return (lambda v: v is None or references(dataset, v)), None
+
+
+_BUILDERS = {
+    "allowed_values": _allowed_values,
+    "regex": _regex,
+    "range": _range,
+    "required": _required,
+    "compare": _compare,
+    "reference": _reference,
+}
+
+# Categoria padrão por tipo de regra
+_CATEGORIES = {"reference": "REFERENCE"}
+
+
+def _compile_rule(spec: Any, references: Callable[[str, Any], bool] | None = None) -> list[CompiledRule]:
+    if not isinstance(spec, dict):
+        raise RuleError("rule must be an object")
+    kind = spec.get("type")
+    builder = _BUILDERS.get(kind)
+    if builder is None:
+        raise RuleError(f"unknown rule type: {kind!r}")
+
+    # "required" aceita uma lista de chaves de attributes (uma regra por chave)
+    if kind == "required" and "keys" in spec:
+        keys = spec["keys"]
+        if not isinstance(keys, list) or not keys:
+            raise RuleError("required needs a non-empty keys list")
+        return [
+            rule
+            for key in keys
+            for rule in _compile_rule({**{k: v for k, v in spec.items() if k != "keys"}, "field": f"attributes.{key}"})
+        ]
+
+    field = spec.get("field")
+    get = _field_getter(field)
+    check, check_column = builder(spec, references) if kind == "reference" else builder(spec)
+    when = _compile_when(spec["when"]) if "when" in spec else None
+    if kind == "compare":
+        # O check de compare lê os dois campos do próprio evento
+        get = lambda ev: ev  # noqa: E731
+
+    error = {
+        "category": spec.get("category", _CATEGORIES.get(kind, "BUSINESS")),
+        "field": field,
+        "rule": spec.get("rule", kind.upper()),
+        "message": spec.get("message", f"{field} inválido"),
+        "severity": spec.get("severity", "MEDIUM"),
+    }
+    return [CompiledRule(field, error, get, check, when, check_column)]
+
+
+class RuleSet:
+    """
+    Compiled, immutable rule set.
+
+    `validate_batch` evaluates one rule at a time over the whole batch
+    (one column per rule); each event's errors keep the rule order, so the
+    result equals calling `validate` per event.
+    """
+
+    def __init__(self, rules: list[CompiledRule], version: int = 0, datasets: frozenset[str] = frozenset()) -> None:
+        self.rules = tuple(rules)
+        self.version = version
+        # Datasets de referência consultados pelas regras
+        self.datasets = datasets
+        # Linha de validation_rule_set de origem (None = regras padrão)
+        self.rule_set_id: int | None = None
+
+    def validate(self, event: Any) -> list[dict]:
+        return [dict(rule.error) for rule in self.rules if rule.failed(event)]
+
+    def validate_batch(self, events: list) -> list[list[dict]]:
+        errors: list[list[dict]] = [[] for _ in events]
+        for rule in self.rules:
+            for i in rule.failed_indexes(events):
+                errors[i].append(dict(rule.error))
+        return errors
+
+
+def compile_rules(
+    specs: Any,
+    version: int = 0,
+    references: Callable[[str, Any], bool] | None = None,
+) -> RuleSet:
+    """
+    Compiles a list of rule specs (RuleError on the first invalid one).
+
+    `references(dataset, value) -> bool` answers "reference" rules; it is
+    bound to the source the rule set is compiled for.
+    """
+    if not isinstance(specs, list):
+        raise RuleError("rules must be a list")
+    compiled: list[CompiledRule] = []
+    for pos, spec in enumerate(specs):
+        try:
+            compiled.extend(_compile_rule(spec, references))
+        except RuleError as e:
+            raise RuleError(f"rule {pos}: {e}") from None
+    datasets = frozenset(s["dataset"] for s in specs if s.get("type") == "reference")
+    return RuleSet(compiled, version, datasets)
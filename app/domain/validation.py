@@ -2,35 +2,39 @@
 Event validation rules.
 
 Business-rule validation for event type and event status values.
+These are the default rules, used when no rule set is configured for the
+source/schema_version (see app.domain.rules and validation_rule_set).
 """
 
+from app.domain.rules import compile_rules
+
 # Conjuntos de valores permitidos
 ALLOWED_STATUS = {"NEW", "PROCESSING", "DONE", "FAILED"}
 ALLOWED_TYPES = {"ORDER", "PAYMENT", "SHIPMENT"}
 
-def validate_event(event_type: str, event_status: str) -> list[dict]:
-    # Lista de erros de validação encontrados
-    errors = []
+# Regras padrão no formato declarativo (mesmos erros de sempre)
+DEFAULT_RULES = [
+    {
+        "type": "allowed_values",
+        "field": "event_type",
+        "values": sorted(ALLOWED_TYPES),
+        "rule": "ALLOWED_TYPES",
+        "message": "event_type inválido",
+        "severity": "HIGH",
+    },
+    {
+        "type": "allowed_values",
+        "field": "event_status",
+        "values": sorted(ALLOWED_STATUS),
+        "rule": "ALLOWED_STATUS",
+        "message": "event_status inválido",
+        "severity": "HIGH",
+    },
+]
 
-    # Valida se o tipo do evento é permitido
-    if event_type not in ALLOWED_TYPES:
-        errors.append({
-            "category": "BUSINESS",
-            "field": "event_type",
-            "rule": "ALLOWED_TYPES",
-            "message": "event_type inválido",
-            "severity": "HIGH",
-        })
+default_rule_set = compile_rules(DEFAULT_RULES)
 
-    # Valida se o status do evento é permitido
-    if event_status not in ALLOWED_STATUS:
-        errors.append({
-            "category": "BUSINESS",
-            "field": "event_status",
-            "rule": "ALLOWED_STATUS",
-            "message": "event_status inválido",
-            "severity": "HIGH",
-        })
 
-    # Retorna todas as violações encontradas
-    return errors
+def validate_event(event_type: str, event_status: str) -> list[dict]:
+    # Valida tipo e status com as regras padrão
+    return default_rule_set.validate({"event_type": event_type, "event_status": event_status})
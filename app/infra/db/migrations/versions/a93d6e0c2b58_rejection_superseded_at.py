@@ -0,0 +1,32 @@
+"""
+Adds rejection.superseded_at and a REJECTED id index on raw_ingestion.
+
+Reprocessing marks the previous rejections of a RAW as superseded instead
+of deleting them, and scans REJECTED rows by id range.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# Identificação da migration
+revision: str = "a93d6e0c2b58"
+down_revision: Union[str, None] = "f5c19b7d3a42"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("rejection", sa.Column("superseded_at", sa.DateTime(timezone=True), nullable=True))
+    op.create_index(
+        "ix_raw_ingestion_rejected_id",
+        "raw_ingestion",
+        ["id"],
+        postgresql_where=sa.text("processing_status = 'REJECTED'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_raw_ingestion_rejected_id", table_name="raw_ingestion")
+    op.drop_column("rejection", "superseded_at")
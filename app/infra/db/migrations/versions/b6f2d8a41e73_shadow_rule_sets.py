@@ -0,0 +1,66 @@
+"""
+Adds shadow rule sets and the shadow_divergence table.
+
+validation_rule_set gains a stage ("live" / "shadow"); candidate rule sets
+are evaluated off the request path and their divergences from the live
+decision are counted in shadow_divergence.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# Identificação da migration
+revision: str = "b6f2d8a41e73"
+down_revision: Union[str, None] = "a93d6e0c2b58"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "validation_rule_set",
+        sa.Column("stage", sa.String(length=10), server_default="live", nullable=False),
+    )
+    op.drop_index("uq_validation_rule_set_scope", table_name="validation_rule_set")
+    op.create_index(
+        "uq_validation_rule_set_scope",
+        "validation_rule_set",
+        [sa.text("coalesce(source_id, 0)"), sa.text("coalesce(schema_version, '')"), "stage"],
+        unique=True,
+    )
+
+    op.create_table(
+        "shadow_divergence",
+        sa.Column(
+            "rule_set_id",
+            sa.BigInteger(),
+            sa.ForeignKey("validation_rule_set.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("rule_set_version", sa.Integer(), nullable=False),
+        sa.Column("source_id", sa.BigInteger(), sa.ForeignKey("source_system.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("rule", sa.String(length=120), nullable=False),
+        sa.Column("evaluated", sa.BigInteger(), server_default="0", nullable=False),
+        sa.Column("would_reject", sa.BigInteger(), server_default="0", nullable=False),
+        sa.Column("would_accept", sa.BigInteger(), server_default="0", nullable=False),
+        sa.Column("first_seen_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("last_seen_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint(
+            "rule_set_id", "rule_set_version", "source_id", "rule", name="pk_shadow_divergence"
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("shadow_divergence")
+    op.drop_index("uq_validation_rule_set_scope", table_name="validation_rule_set")
+    op.execute("DELETE FROM validation_rule_set WHERE stage <> 'live'")
+    op.create_index(
+        "uq_validation_rule_set_scope",
+        "validation_rule_set",
+        [sa.text("coalesce(source_id, 0)"), sa.text("coalesce(schema_version, '')")],
+        unique=True,
+    )
+    op.drop_column("validation_rule_set", "stage")
@@ -0,0 +1,61 @@
+"""
+Database-enforced dedup for raw_ingestion.
+
+Adds a partial unique index on (source_id, external_id) covering only
+non-DUPLICATE rows, so concurrent submissions of the same event are
+classified by INSERT ... ON CONFLICT instead of SELECT-then-INSERT.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# Identificação da migration
+revision: str = "b88f3228c0a4"
+down_revision: Union[str, None] = "6991eb44c131"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 1) Normaliza corridas antigas: mantém um RAW "vivo" por chave (o ACCEPTED,
+    #    se houver, senão o mais antigo) e reclassifica os demais como DUPLICATE
+    #    (senão o índice único falha)
+    op.execute(
+        """
+        UPDATE raw_ingestion r
+           SET processing_status = 'DUPLICATE'
+          FROM (
+                SELECT id,
+                       row_number() OVER (
+                           PARTITION BY source_id, external_id
+                           ORDER BY (processing_status = 'ACCEPTED') DESC, id
+                       ) AS rn
+                  FROM raw_ingestion
+                 WHERE processing_status <> 'DUPLICATE'
+               ) d
+         WHERE r.id = d.id
+           AND d.rn > 1
+        """
+    )
+
+    # 2) Índice único parcial (CONCURRENTLY para não travar escrita em produção)
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "uq_raw_ingestion_source_external_live",
+            "raw_ingestion",
+            ["source_id", "external_id"],
+            unique=True,
+            postgresql_where="processing_status <> 'DUPLICATE'",
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "uq_raw_ingestion_source_external_live",
+            table_name="raw_ingestion",
+            postgresql_concurrently=True,
+        )
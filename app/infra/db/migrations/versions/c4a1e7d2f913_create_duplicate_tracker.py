@@ -0,0 +1,34 @@
+"""
+Creates duplicate_tracker table.
+
+Compact duplicate accounting (counter + last seen per source/external_id)
+for INGEST_DUPLICATE_MODE=counter.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# Identificação da migration
+revision: str = "c4a1e7d2f913"
+down_revision: Union[str, None] = "b88f3228c0a4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "duplicate_tracker",
+        sa.Column("source_id", sa.BigInteger(), sa.ForeignKey("source_system.id", ondelete="RESTRICT"), nullable=False),
+        sa.Column("external_id", sa.String(length=120), nullable=False),
+        sa.Column("duplicate_count", sa.BigInteger(), server_default="0", nullable=False),
+        sa.Column("first_seen_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("last_seen_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("last_request_id", sa.String(length=64), nullable=False),
+        sa.PrimaryKeyConstraint("source_id", "external_id", name="pk_duplicate_tracker"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("duplicate_tracker")
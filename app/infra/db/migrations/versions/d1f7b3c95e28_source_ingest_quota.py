@@ -0,0 +1,36 @@
+"""
+Adds per-source ingest quotas.
+
+source_system gains the token-bucket settings (rate per second and burst,
+NULL = unlimited); source_quota_bucket keeps the shared bucket state.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# Identificação da migration
+revision: str = "d1f7b3c95e28"
+down_revision: Union[str, None] = "c8e4a2f7d619"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("source_system", sa.Column("quota_rate_per_second", sa.Float(), nullable=True))
+    op.add_column("source_system", sa.Column("quota_burst", sa.Integer(), nullable=True))
+
+    op.create_table(
+        "source_quota_bucket",
+        sa.Column("source_id", sa.BigInteger(), sa.ForeignKey("source_system.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("tokens", sa.Float(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("source_id", name="pk_source_quota_bucket"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("source_quota_bucket")
+    op.drop_column("source_system", "quota_burst")
+    op.drop_column("source_system", "quota_rate_per_second")
@@ -0,0 +1,44 @@
+"""
+Creates validation_rule_set table.
+
+Declarative validation rules per source/schema_version, editable at
+runtime (no deploy needed to change ingest validation).
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# Identificação da migration
+revision: str = "d7b3e91a5c20"
+down_revision: Union[str, None] = "c4a1e7d2f913"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "validation_rule_set",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column("source_id", sa.BigInteger(), sa.ForeignKey("source_system.id", ondelete="CASCADE"), nullable=True),
+        sa.Column("schema_version", sa.String(length=20), nullable=True),
+        sa.Column("rules", postgresql.JSONB(), nullable=False),
+        sa.Column("version", sa.Integer(), server_default="1", nullable=False),
+        sa.Column("is_active", sa.Boolean(), server_default=sa.text("true"), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+    )
+    # Um conjunto por escopo (NULL = qualquer fonte / versão)
+    op.create_index(
+        "uq_validation_rule_set_scope",
+        "validation_rule_set",
+        [sa.text("coalesce(source_id, 0)"), sa.text("coalesce(schema_version, '')")],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_validation_rule_set_scope", table_name="validation_rule_set")
+    op.drop_table("validation_rule_set")
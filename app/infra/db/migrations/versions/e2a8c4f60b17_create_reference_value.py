@@ -0,0 +1,51 @@
+"""
+Creates reference_value table.
+
+Reference data (catalogs, per-source allowed values) for "reference"
+validation rules, versioned by a global sequence for incremental refresh.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# Identificação da migration
+revision: str = "e2a8c4f60b17"
+down_revision: Union[str, None] = "d7b3e91a5c20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE SEQUENCE reference_value_version_seq")
+    op.create_table(
+        "reference_value",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column("dataset", sa.String(length=60), nullable=False),
+        sa.Column("source_id", sa.BigInteger(), sa.ForeignKey("source_system.id", ondelete="CASCADE"), nullable=True),
+        sa.Column("value", sa.String(length=120), nullable=False),
+        sa.Column("is_active", sa.Boolean(), server_default=sa.text("true"), nullable=False),
+        sa.Column(
+            "version",
+            sa.BigInteger(),
+            server_default=sa.text("nextval('reference_value_version_seq')"),
+            nullable=False,
+        ),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+    )
+    # Um valor por dataset + fonte (NULL = todas as fontes)
+    op.create_index(
+        "uq_reference_value_scope",
+        "reference_value",
+        ["dataset", sa.text("coalesce(source_id, 0)"), "value"],
+        unique=True,
+    )
+    op.create_index("ix_reference_value_version", "reference_value", ["version"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_reference_value_version", table_name="reference_value")
+    op.drop_index("uq_reference_value_scope", table_name="reference_value")
+    op.drop_table("reference_value")
+    op.execute("DROP SEQUENCE reference_value_version_seq")
@@ -0,0 +1,28 @@
+"""
+Adds source_system.ingest_weight.
+
+Weight of each source in the fair (deficit round robin) admission of
+ingest calls under saturation.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# Identificação da migration
+revision: str = "e9a5c7d13b46"
+down_revision: Union[str, None] = "d1f7b3c95e28"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "source_system",
+        sa.Column("ingest_weight", sa.Integer(), server_default="1", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("source_system", "ingest_weight")
@@ -0,0 +1,44 @@
+"""
+Creates attribute_schema table.
+
+JSON Schemas for event attributes per (source, schema_version), compiled
+once into validators by the ingest service.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# Identificação da migration
+revision: str = "f5c19b7d3a42"
+down_revision: Union[str, None] = "e2a8c4f60b17"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "attribute_schema",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column("source_id", sa.BigInteger(), sa.ForeignKey("source_system.id", ondelete="CASCADE"), nullable=True),
+        sa.Column("schema_version", sa.String(length=20), nullable=False),
+        sa.Column("json_schema", postgresql.JSONB(), nullable=False),
+        sa.Column("version", sa.Integer(), server_default="1", nullable=False),
+        sa.Column("is_active", sa.Boolean(), server_default=sa.text("true"), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+    )
+    # Um schema por escopo (NULL = qualquer fonte)
+    op.create_index(
+        "uq_attribute_schema_scope",
+        "attribute_schema",
+        [sa.text("coalesce(source_id, 0)"), "schema_version"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_attribute_schema_scope", table_name="attribute_schema")
+    op.drop_table("attribute_schema")
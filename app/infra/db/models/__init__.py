@@ -6,3 +6,10 @@ from app.infra.db.models.rejection import Rejection  # noqa: F401
 from app.infra.db.models.user_account import UserAccount  # noqa: F401
 from app.infra.db.models.security_event import SecurityEvent  # noqa: F401
 from .audit_log import AuditLog  # noqa
+from app.infra.db.models.duplicate_tracker import DuplicateTracker  # noqa: F401
+from app.infra.db.models.validation_rule_set import ValidationRuleSet  # noqa: F401
+from app.infra.db.models.reference_value import ReferenceValue  # noqa: F401
+from app.infra.db.models.attribute_schema import AttributeSchema  # noqa: F401
+from app.infra.db.models.shadow_divergence import ShadowDivergence  # noqa: F401
+from app.infra.db.models.idempotency_key import IdempotencyKey  # noqa: F401
+from app.infra.db.models.source_quota_bucket import SourceQuotaBucket  # noqa: F401
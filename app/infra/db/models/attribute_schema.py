@@ -0,0 +1,47 @@
+"""
+Attribute schema model.
+
+JSON Schema for the `attributes` of events of a schema_version, optionally
+specific to one source (NULL source_id = every source).
+"""
+
+from sqlalchemy import BigInteger, Boolean, DateTime, ForeignKey, Index, Integer, String, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+from .base import Base
+
+# Um schema por fonte + schema_version (ou por schema_version para todas as fontes).
+
+class AttributeSchema(Base):
+    __tablename__ = "attribute_schema"
+
+    # Identificador do schema
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+
+    # Escopo (NULL = qualquer fonte)
+    source_id: Mapped[int | None] = mapped_column(
+        BigInteger,
+        ForeignKey("source_system.id", ondelete="CASCADE"),
+        nullable=True,
+    )
+    schema_version: Mapped[str] = mapped_column(String(20), nullable=False)
+
+    # JSON Schema de attributes
+    json_schema: Mapped[dict] = mapped_column(JSONB, nullable=False)
+
+    # Versão incrementada a cada alteração (chave do validador compilado)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, server_default="1")
+    is_active: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default=text("true"))
+
+    # Datas de auditoria
+    created_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=text("now()"), nullable=False)
+    updated_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=text("now()"), nullable=False)
+
+    __table_args__ = (
+        Index(
+            "uq_attribute_schema_scope",
+            text("coalesce(source_id, 0)"),
+            "schema_version",
+            unique=True,
+        ),
+    )
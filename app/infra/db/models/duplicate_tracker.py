@@ -0,0 +1,31 @@
+"""
+Duplicate tracker model.
+
+Compact per-key record of duplicate submissions (counter + last seen),
+used instead of full DUPLICATE raw rows when INGEST_DUPLICATE_MODE=counter.
+"""
+
+from sqlalchemy import BigInteger, String, DateTime, ForeignKey, text
+from sqlalchemy.orm import Mapped, mapped_column
+from .base import Base
+
+# Uma linha por fonte + external_id que já recebeu reenvio.
+
+class DuplicateTracker(Base):
+    __tablename__ = "duplicate_tracker"
+
+    # Chave do evento (mesma chave da deduplicação do RAW)
+    source_id: Mapped[int] = mapped_column(
+        BigInteger,
+        ForeignKey("source_system.id", ondelete="RESTRICT"),
+        primary_key=True,
+    )
+    external_id: Mapped[str] = mapped_column(String(120), primary_key=True)
+
+    # Quantidade de duplicados recebidos
+    duplicate_count: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="0")
+
+    # Primeiro/último reenvio e a requisição mais recente
+    first_seen_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=text("now()"), nullable=False)
+    last_seen_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=text("now()"), nullable=False)
+    last_request_id: Mapped[str] = mapped_column(String(64), nullable=False)
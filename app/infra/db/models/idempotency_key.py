@@ -0,0 +1,35 @@
+"""
+Idempotency key model.
+
+Stored response of an ingest call per source + Idempotency-Key header, so
+client retries get the original response instead of running again.
+"""
+
+from sqlalchemy import BigInteger, SmallInteger, String, DateTime, ForeignKey, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+from .base import Base
+
+# Uma linha por fonte + chave; response NULL = primeira chamada ainda em andamento.
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_key"
+
+    # Escopo da chave: a fonte autenticada
+    source_id: Mapped[int] = mapped_column(
+        BigInteger,
+        ForeignKey("source_system.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    key: Mapped[str] = mapped_column(String(200), primary_key=True)
+
+    # Rota + hash do corpo da primeira chamada (reuso com outro corpo é recusado)
+    request_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+
+    # Resposta gravada (status + corpo JSON)
+    status_code: Mapped[int | None] = mapped_column(SmallInteger, nullable=True)
+    response: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+
+    # Posse da chave pela chamada em andamento e expiração da linha
+    locked_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=text("now()"), nullable=False)
+    expires_at: Mapped[str] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
@@ -4,7 +4,7 @@ Raw ingestion model.
 Immutable storage for incoming events before validation and processing.
 """
 
-from sqlalchemy import BigInteger, String, DateTime, Text, Integer, ForeignKey, text
+from sqlalchemy import BigInteger, String, DateTime, Text, Integer, ForeignKey, Index, text
 from sqlalchemy.orm import Mapped, mapped_column
 from .base import Base
 
@@ -43,3 +43,21 @@ class RawIngestion(Base):
     request_id: Mapped[str] = mapped_column(String(64), nullable=False)
     client_ip: Mapped[str | None] = mapped_column(String(45), nullable=True)
     user_agent: Mapped[str | None] = mapped_column(String(255), nullable=True)
+
+    # Deduplicação garantida pelo banco: no máximo um RAW "vivo"
+    # (não-DUPLICATE) por fonte + external_id
+    __table_args__ = (
+        Index(
+            "uq_raw_ingestion_source_external_live",
+            "source_id",
+            "external_id",
+            unique=True,
+            postgresql_where=text("processing_status <> 'DUPLICATE'"),
+        ),
+        # Varredura por faixa de id dos REJECTED (reprocessamento)
+        Index(
+            "ix_raw_ingestion_rejected_id",
+            "id",
+            postgresql_where=text("processing_status = 'REJECTED'"),
+        ),
+    )
@@ -0,0 +1,63 @@
+"""
+Reference value model.
+
+Reference data consulted by "reference" validation rules: one row per
+(dataset, source, value), e.g. the entity catalog or the event types
+allowed for a source. NULL source_id means valid for every source.
+"""
+
+from sqlalchemy import (
+    BigInteger, Boolean, DateTime, ForeignKey, Index, Sequence, String, text,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+from .base import Base
+
+# Versão global crescente: cada insert/alteração recebe um novo valor,
+# o que permite ao cache em memória buscar só o que mudou.
+REFERENCE_VERSION_SEQ = Sequence("reference_value_version_seq")
+
+
+class ReferenceValue(Base):
+    __tablename__ = "reference_value"
+
+    # Identificador da linha
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+
+    # Conjunto de referência (ex: entity_catalog, source_event_types)
+    dataset: Mapped[str] = mapped_column(String(60), nullable=False)
+
+    # Fonte dona do valor (NULL = todas as fontes)
+    source_id: Mapped[int | None] = mapped_column(
+        BigInteger,
+        ForeignKey("source_system.id", ondelete="CASCADE"),
+        nullable=True,
+    )
+
+    # Valor de referência
+    value: Mapped[str] = mapped_column(String(120), nullable=False)
+
+    # Remoção lógica (o cache precisa enxergar a remoção no refresh incremental)
+    is_active: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default=text("true"))
+
+    # Versão da última alteração
+    version: Mapped[int] = mapped_column(
+        BigInteger,
+        REFERENCE_VERSION_SEQ,
+        server_default=REFERENCE_VERSION_SEQ.next_value(),
+        nullable=False,
+    )
+
+    updated_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=text("now()"), nullable=False)
+
+    __table_args__ = (
+        # Um valor por dataset + fonte (NULL normalizado no índice)
+        Index(
+            "uq_reference_value_scope",
+            "dataset",
+            text("coalesce(source_id, 0)"),
+            "value",
+            unique=True,
+        ),
+        # Refresh incremental: WHERE version > :last
+        Index("ix_reference_value_version", "version"),
+    )
@@ -30,3 +30,6 @@ class Rejection(Base):
     # Severidade e data
     severity: Mapped[str] = mapped_column(String(20), nullable=False, server_default="MEDIUM")
     created_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=text("now()"), nullable=False)
+
+    # Rejeição substituída por reprocessamento (NULL = vigente)
+    superseded_at: Mapped[str | None] = mapped_column(DateTime(timezone=True), nullable=True)
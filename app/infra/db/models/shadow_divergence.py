@@ -0,0 +1,39 @@
+"""
+Shadow divergence model.
+
+Compact counters of how a candidate (shadow) rule set would have decided
+live traffic differently, per candidate version, source and rule.
+"""
+
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Integer, String, text
+from sqlalchemy.orm import Mapped, mapped_column
+from .base import Base
+
+# rule = "*" guarda os totais do conjunto candidato para a fonte.
+
+class ShadowDivergence(Base):
+    __tablename__ = "shadow_divergence"
+
+    # Conjunto candidato (e versão avaliada)
+    rule_set_id: Mapped[int] = mapped_column(
+        BigInteger,
+        ForeignKey("validation_rule_set.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    rule_set_version: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    # Fonte e regra
+    source_id: Mapped[int] = mapped_column(
+        BigInteger,
+        ForeignKey("source_system.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    rule: Mapped[str] = mapped_column(String(120), primary_key=True)
+
+    # Eventos avaliados / aceitos pelo live e rejeitados pelo candidato / o inverso
+    evaluated: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="0")
+    would_reject: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="0")
+    would_accept: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="0")
+
+    first_seen_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=text("now()"), nullable=False)
+    last_seen_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=text("now()"), nullable=False)
@@ -0,0 +1,23 @@
+"""
+Source quota bucket model.
+
+Shared token-bucket state of each source's ingest quota (one row per
+source), updated atomically by every API worker.
+"""
+
+from sqlalchemy import BigInteger, Float, DateTime, ForeignKey, text
+from sqlalchemy.orm import Mapped, mapped_column
+from .base import Base
+
+# Tokens restantes no instante updated_at (a recarga é calculada na própria consulta).
+
+class SourceQuotaBucket(Base):
+    __tablename__ = "source_quota_bucket"
+
+    source_id: Mapped[int] = mapped_column(
+        BigInteger,
+        ForeignKey("source_system.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    tokens: Mapped[float] = mapped_column(Float, nullable=False)
+    updated_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=text("now()"), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import BigInteger, String, DateTime, text
+from sqlalchemy import BigInteger, Float, Integer, String, DateTime, UniqueConstraint, text
 from sqlalchemy.orm import Mapped, mapped_column
 from .base import Base
 
@@ -19,6 +19,18 @@ class SourceSystem(Base):
     # Hash da API Key para autenticação
     api_key_hash: Mapped[str | None] = mapped_column(String(128), nullable=True)
 
+    # Cota de ingestão (token bucket): eventos/s e rajada máxima (NULL = sem cota)
+    quota_rate_per_second: Mapped[float | None] = mapped_column(Float, nullable=True)
+    quota_burst: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+    # Peso da fonte na admissão justa sob saturação (DRR)
+    ingest_weight: Mapped[int] = mapped_column(Integer, nullable=False, server_default="1")
+
     # Datas de auditoria
     created_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=text("now()"), nullable=False)
     updated_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=text("now()"), nullable=False)
+
+    # Nome único (alvo do upsert ON CONFLICT no auto-cadastro de fontes)
+    __table_args__ = (
+        UniqueConstraint("name", name="uq_source_system_name"),
+    )
@@ -0,0 +1,52 @@
+"""
+Validation rule set model.
+
+Declarative validation rules (JSON specs, see app.domain.rules) scoped by
+source and schema_version. NULL scope columns match any source/version.
+"""
+
+from sqlalchemy import BigInteger, Boolean, DateTime, ForeignKey, Index, Integer, String, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+from .base import Base
+
+# Uma linha por escopo (fonte + schema_version); alterada sem deploy pela API.
+
+class ValidationRuleSet(Base):
+    __tablename__ = "validation_rule_set"
+
+    # Identificador do conjunto de regras
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+
+    # Escopo (NULL = qualquer fonte / qualquer versão)
+    source_id: Mapped[int | None] = mapped_column(
+        BigInteger,
+        ForeignKey("source_system.id", ondelete="CASCADE"),
+        nullable=True,
+    )
+    schema_version: Mapped[str | None] = mapped_column(String(20), nullable=True)
+
+    # "live" (aplicado na ingestão) ou "shadow" (candidato avaliado fora do caminho da requisição)
+    stage: Mapped[str] = mapped_column(String(10), nullable=False, server_default="live")
+
+    # Lista de regras declarativas
+    rules: Mapped[list] = mapped_column(JSONB, nullable=False)
+
+    # Versão incrementada a cada alteração e ativação do conjunto
+    version: Mapped[int] = mapped_column(Integer, nullable=False, server_default="1")
+    is_active: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default=text("true"))
+
+    # Datas de auditoria
+    created_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=text("now()"), nullable=False)
+    updated_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=text("now()"), nullable=False)
+
+    # Um conjunto por escopo e estágio (NULLs normalizados no índice)
+    __table_args__ = (
+        Index(
+            "uq_validation_rule_set_scope",
+            text("coalesce(source_id, 0)"),
+            text("coalesce(schema_version, '')"),
+            "stage",
+            unique=True,
+        ),
+    )
@@ -6,6 +6,7 @@ Handles creation and querying of audit logs.
 from datetime import datetime
 
 from sqlalchemy import select, func, desc
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.infra.db.models.audit_log import AuditLog
@@ -41,8 +42,8 @@ def create_audit_log(
     db.flush()
     return row
 
-def list_audit_logs(
-    db: Session,
+async def list_audit_logs(
+    db: AsyncSession,
     *,
     trusted_event_id: int | None,
     user_id: int | None,
@@ -52,7 +53,7 @@ def list_audit_logs(
     page_size: int,
 ):
     """
-    Returns paginated audit logs with optional filters.
+    Returns paginated audit logs with optional filters (async session).
     """
     
     # Base query
@@ -79,7 +80,7 @@ def list_audit_logs(
         count_stmt = count_stmt.where(AuditLog.created_at <= date_to)
 
     # Total para paginação
-    total = db.execute(count_stmt).scalar_one()
+    total = (await db.execute(count_stmt)).scalar_one()
     
     # Ordenação + paginação
     stmt = (
@@ -87,5 +88,5 @@ def list_audit_logs(
         .offset((page - 1) * page_size)
         .limit(page_size)
     )
-    rows = db.execute(stmt).scalars().all()
+    rows = (await db.execute(stmt)).scalars().all()
     return total, rows
\ No newline at end of file
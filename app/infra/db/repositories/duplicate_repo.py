@@ -0,0 +1,48 @@
+"""
+Duplicate tracker repository.
+
+Counter-based duplicate accounting (one row per source + external_id).
+"""
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app.infra.db.models.duplicate_tracker import DuplicateTracker
+
+# Upsert acumulativo: cada reenvio só incrementa o contador.
+
+def record_duplicates(db: Session, source_id: int, hits: dict[str, tuple[int, str]]) -> None:
+    """
+    Increments the duplicate counters of a source.
+
+    `hits` maps external_id -> (number of duplicates, last request_id),
+    already aggregated by the caller (one row per key per statement).
+    Does not commit automatically.
+    """
+    if not hits:
+        return
+    stmt = pg_insert(DuplicateTracker)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DuplicateTracker.source_id, DuplicateTracker.external_id],
+        set_={
+            "duplicate_count": DuplicateTracker.duplicate_count + stmt.excluded.duplicate_count,
+            "last_seen_at": func.now(),
+            "last_request_id": stmt.excluded.last_request_id,
+        },
+    )
+    db.execute(stmt, [
+        {
+            "source_id": source_id,
+            "external_id": ext,
+            "duplicate_count": count,
+            "last_request_id": request_id,
+        }
+        for ext, (count, request_id) in hits.items()
+    ])
+
+def count_duplicates(db: Session, source_id: int | None = None) -> int:
+    # Total de duplicados contabilizados no modo contador
+    q = db.query(func.coalesce(func.sum(DuplicateTracker.duplicate_count), 0))
+    if source_id is not None:
+        q = q.filter(DuplicateTracker.source_id == source_id)
+    return int(q.scalar() or 0)
@@ -0,0 +1,96 @@
+"""
+Idempotency key repository.
+
+Claims a source + Idempotency-Key for the call that runs it, stores its
+response and reads stored responses for retries. Functions do not commit.
+"""
+
+from sqlalchemy import delete, func, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.infra.db.models.idempotency_key import IdempotencyKey
+
+# Posse por linha: a chamada que insere (ou retoma uma linha expirada/abandonada) executa.
+
+def claim_idempotency_key(
+    db: Session,
+    source_id: int,
+    key: str,
+    request_hash: str,
+    ttl_seconds: float,
+    lock_seconds: float,
+) -> bool:
+    """
+    Takes ownership of a key: True if this call must run the request.
+
+    A key is free when it does not exist, has expired, or its owner never
+    stored a response within `lock_seconds` (crashed worker).
+    """
+    stmt = pg_insert(IdempotencyKey).values(
+        source_id=source_id,
+        key=key,
+        request_hash=request_hash,
+        expires_at=func.now() + func.make_interval(0, 0, 0, 0, 0, 0, ttl_seconds),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[IdempotencyKey.source_id, IdempotencyKey.key],
+        set_={
+            "request_hash": stmt.excluded.request_hash,
+            "status_code": None,
+            "response": None,
+            "locked_at": func.now(),
+            "expires_at": stmt.excluded.expires_at,
+        },
+        where=or_(
+            IdempotencyKey.expires_at <= func.now(),
+            (IdempotencyKey.response.is_(None))
+            & (IdempotencyKey.locked_at < func.now() - func.make_interval(0, 0, 0, 0, 0, 0, lock_seconds)),
+        ),
+    ).returning(IdempotencyKey.source_id)
+    return db.execute(stmt).first() is not None
+
+
+def get_idempotency_key(db: Session, source_id: int, key: str) -> IdempotencyKey | None:
+    # Linha ainda válida (com ou sem resposta gravada)
+    return db.execute(
+        select(IdempotencyKey).where(
+            IdempotencyKey.source_id == source_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.expires_at > func.now(),
+        )
+    ).scalar_one_or_none()
+
+
+def store_idempotency_response(db: Session, source_id: int, key: str, status_code: int, response: dict) -> None:
+    db.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.source_id == source_id, IdempotencyKey.key == key)
+        .values(status_code=status_code, response=response)
+    )
+
+
+def release_idempotency_key(db: Session, source_id: int, key: str) -> None:
+    # Chamada falhou sem resposta: libera a chave para uma nova tentativa
+    db.execute(
+        delete(IdempotencyKey).where(
+            IdempotencyKey.source_id == source_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.response.is_(None),
+        )
+    )
+
+
+def purge_expired_idempotency_keys(db: Session, limit: int = 1000) -> int:
+    # Remove linhas expiradas em lotes pequenos (usa o índice de expires_at)
+    ids = (
+        select(IdempotencyKey.source_id, IdempotencyKey.key)
+        .where(IdempotencyKey.expires_at <= func.now())
+        .limit(limit)
+    )
+    result = db.execute(
+        delete(IdempotencyKey).where(
+            tuple_(IdempotencyKey.source_id, IdempotencyKey.key).in_(ids)
+        )
+    )
+    return result.rowcount or 0
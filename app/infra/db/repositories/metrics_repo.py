@@ -14,6 +14,7 @@ from sqlalchemy.orm import Session
 from app.infra.db.models.raw_ingestion import RawIngestion
 from app.infra.db.models.trusted_event import TrustedEvent
 from app.infra.db.models.rejection import Rejection
+from app.infra.db.repositories.duplicate_repo import count_duplicates
 
 
 def _apply_date_filter(q, model, date_from: Optional[datetime], date_to: Optional[datetime]):
@@ -55,7 +56,7 @@ def get_metrics(
     total_trusted = int(q_trusted.scalar() or 0)
 
     # === REJEICTIONS COUNT ===
-    q_rej = db.query(func.count()).select_from(Rejection)
+    q_rej = db.query(func.count()).select_from(Rejection).filter(Rejection.superseded_at.is_(None))
     q_rej = _apply_date_filter(q_rej, Rejection, date_from, date_to)
     total_rejected = int(q_rej.scalar() or 0)
 
@@ -69,8 +70,15 @@ def get_metrics(
         q_dup = q_dup.filter(RawIngestion.processing_status == "DUPLICATE")
         duplicates = int(q_dup.scalar() or 0)
 
+    # Duplicados contabilizados só no contador (INGEST_DUPLICATE_MODE=counter)
+    duplicates += count_duplicates(db, source_id)
+
     # === Principais Categorias de Rejeição ===
-    q_cat = db.query(Rejection.category, func.count().label("count")).select_from(Rejection)
+    q_cat = (
+        db.query(Rejection.category, func.count().label("count"))
+        .select_from(Rejection)
+        .filter(Rejection.superseded_at.is_(None))
+    )
     q_cat = _apply_date_filter(q_cat, Rejection, date_from, date_to)
     q_cat = q_cat.group_by(Rejection.category).order_by(func.count().desc()).limit(top_n)
     top_categories: List[Dict[str, Any]] = [{"category": c, "count": int(n)} for (c, n) in q_cat.all()]
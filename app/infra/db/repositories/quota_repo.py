@@ -0,0 +1,41 @@
+"""
+Source quota repository.
+
+Atomic token-bucket operations on source_quota_bucket: the refill is
+computed from the elapsed time inside the statement, so concurrent API
+workers share one bucket per source without extra coordination.
+Functions do not commit.
+"""
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Tokens disponíveis agora: saldo anterior + recarga desde updated_at, limitado à rajada
+_AVAILABLE = (
+    "LEAST(:burst, b.tokens + GREATEST(0, EXTRACT(EPOCH FROM clock_timestamp() - b.updated_at)) * :rate)"
+)
+
+_TAKE = text(
+    "INSERT INTO source_quota_bucket AS b (source_id, tokens, updated_at) "
+    "VALUES (:source_id, :burst - :cost, clock_timestamp()) "
+    "ON CONFLICT (source_id) DO UPDATE "
+    f"SET tokens = {_AVAILABLE} - :cost, updated_at = clock_timestamp() "
+    f"WHERE {_AVAILABLE} >= :cost "
+    "RETURNING b.tokens"
+)
+
+_PEEK = text(f"SELECT {_AVAILABLE} FROM source_quota_bucket b WHERE b.source_id = :source_id")
+
+
+def take_tokens(db: Session, source_id: int, rate: float, burst: float, cost: float) -> tuple[bool, float]:
+    """
+    Consumes `cost` tokens if available. Returns (allowed, tokens): the
+    balance after consuming, or the current balance when denied.
+    """
+    params = {"source_id": source_id, "rate": rate, "burst": burst, "cost": cost}
+    left = db.execute(_TAKE, params).scalar()
+    if left is not None:
+        return True, float(left)
+    # Negado: a linha não muda (a recarga continua contando a partir de updated_at)
+    available = db.execute(_PEEK, params).scalar()
+    return False, float(available or 0.0)
@@ -4,8 +4,11 @@ Raw ingestion repository.
 Data-access helpers for raw event lookup and persistence.
 """
 
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 from app.infra.db.models.raw_ingestion import RawIngestion
+from app.infra.db.models.trusted_event import TrustedEvent
 
 # Ordenar por id desc garante pegar o mais recente em caso de reenvio.
 
@@ -25,9 +28,132 @@ def find_raw_by_source_external(
         .first()
     )
 
-def insert_raw(db: Session, raw: RawIngestion) -> RawIngestion:
-    # Persiste o evento bruto no banco
-    db.add(raw)
-    db.commit()
-    db.refresh(raw)
-    return raw
+def insert_raw(db: Session, row: dict) -> int:
+    # Persiste o evento bruto (INSERT ... RETURNING id, sem commit/refresh)
+    stmt = insert(RawIngestion).values(**row).returning(RawIngestion.id)
+    return db.execute(stmt).scalar_one()
+
+def _insert_raw_if_new_stmt():
+    # INSERT ... ON CONFLICT DO NOTHING sobre o índice único parcial
+    # (uq_raw_ingestion_source_external_live): o "perdedor" não gera linha
+    return pg_insert(RawIngestion).on_conflict_do_nothing(
+        index_elements=[RawIngestion.source_id, RawIngestion.external_id],
+        index_where=RawIngestion.processing_status != "DUPLICATE",
+    )
+
+def insert_raw_if_new(db: Session, row: dict) -> int | None:
+    """
+    Inserts a non-DUPLICATE raw row unless the (source_id, external_id)
+    key is already taken.
+
+    Returns the new id, or None when the key already exists (the caller
+    classifies the event as DUPLICATE). Does not commit automatically.
+    """
+    stmt = _insert_raw_if_new_stmt().values(**row).returning(RawIngestion.id)
+    return db.execute(stmt).scalar_one_or_none()
+
+def insert_raw_many_if_new(db: Session, rows: list[dict]) -> dict[str, int]:
+    """
+    Multi-row variant of insert_raw_if_new.
+
+    `rows` must have distinct external_ids. Returns {external_id: id} only
+    for the rows actually inserted; missing keys lost the conflict.
+    Does not commit automatically.
+    """
+    if not rows:
+        return {}
+    stmt = _insert_raw_if_new_stmt().returning(RawIngestion.external_id, RawIngestion.id)
+    return {ext: raw_id for ext, raw_id in db.execute(stmt, rows).all()}
+
+def insert_raw_many(db: Session, rows: list[dict]) -> list[int]:
+    """
+    Multi-row insert of raw events.
+
+    Returns the generated ids in the same order as `rows`.
+    Does not commit automatically.
+    """
+    if not rows:
+        return []
+    stmt = insert(RawIngestion).returning(RawIngestion.id, sort_by_parameter_order=True)
+    return list(db.execute(stmt, rows).scalars().all())
+
+def find_live_raws_by_hash(
+    db: Session,
+    source_id: int,
+    payload_hashes: list[str],
+) -> dict[str, dict]:
+    """
+    Looks up the live (non-DUPLICATE) raw rows of a source by payload hash
+    (ix_raw_ingestion_payload_hash), with the TRUSTED id when accepted.
+
+    Returns {payload_hash: outcome} in the same shape as the ingest
+    results (status, raw_id, trusted_id | error_count, request_id).
+    """
+    if not payload_hashes:
+        return {}
+    stmt = (
+        select(
+            RawIngestion.payload_hash,
+            RawIngestion.id,
+            RawIngestion.processing_status,
+            RawIngestion.error_count,
+            RawIngestion.request_id,
+            TrustedEvent.id.label("trusted_id"),
+        )
+        .outerjoin(TrustedEvent, TrustedEvent.raw_ingestion_id == RawIngestion.id)
+        .where(
+            RawIngestion.source_id == source_id,
+            RawIngestion.payload_hash.in_(set(payload_hashes)),
+            RawIngestion.processing_status != "DUPLICATE",
+        )
+    )
+
+    outcomes = {}
+    for row in db.execute(stmt):
+        outcome = {"status": row.processing_status, "raw_id": row.id}
+        if row.processing_status == "ACCEPTED":
+            outcome["trusted_id"] = row.trusted_id
+        elif row.processing_status == "REJECTED":
+            outcome["error_count"] = row.error_count
+        outcome["request_id"] = row.request_id
+        outcomes[row.payload_hash] = outcome
+    return outcomes
+
+def get_raw_states(db: Session, raw_ids: list[int]) -> dict[int, tuple[str, int]]:
+    # Status atual de RAWs por id (PK): {id: (processing_status, error_count)}
+    if not raw_ids:
+        return {}
+    stmt = select(RawIngestion.id, RawIngestion.processing_status, RawIngestion.error_count).where(
+        RawIngestion.id.in_(set(raw_ids))
+    )
+    return {row.id: (row.processing_status, row.error_count) for row in db.execute(stmt)}
+
+def find_live_raws_by_external(
+    db: Session,
+    source_id: int,
+    external_ids: list[str],
+) -> dict[str, tuple[int, str]]:
+    # {external_id: (id, payload_hash)} dos RAWs vivos (não-DUPLICATE) da fonte
+    if not external_ids:
+        return {}
+    rows = db.execute(
+        select(RawIngestion.external_id, RawIngestion.id, RawIngestion.payload_hash).where(
+            RawIngestion.source_id == source_id,
+            RawIngestion.external_id.in_(set(external_ids)),
+            RawIngestion.processing_status != "DUPLICATE",
+        )
+    )
+    return {ext: (raw_id, digest) for ext, raw_id, digest in rows}
+
+def iter_live_external_ids(db: Session, source_id: int, batch_size: int = 10000):
+    # Percorre (em streaming) os external_ids vivos de uma fonte
+    stmt = (
+        select(RawIngestion.external_id)
+        .where(
+            RawIngestion.source_id == source_id,
+            RawIngestion.processing_status != "DUPLICATE",
+        )
+        .execution_options(yield_per=batch_size)
+    )
+    for external_id in db.execute(stmt).scalars():
+        yield external_id
@@ -0,0 +1,205 @@
+"""
+Reference data repository.
+
+Storage of reference values (reference_value) and an in-process cache of
+every active value, bulk-loaded on first use and then refreshed
+incrementally by version, so "reference" validation rules answer in O(1)
+without a query per event.
+"""
+
+from __future__ import annotations
+
+import time
+from threading import Lock
+
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core import pipeline_metrics
+from app.core.settings import settings
+from app.infra.db.models.reference_value import ReferenceValue
+
+
+def upsert_reference_values(
+    db: Session,
+    dataset: str,
+    source_id: int | None,
+    values: list[str],
+    is_active: bool = True,
+) -> int:
+    """
+    Adds (or deactivates, with is_active=False) values of a dataset.
+
+    Every written row gets a new version. Does not commit automatically.
+    """
+    if not values:
+        return 0
+    stmt = pg_insert(ReferenceValue)
+    stmt = stmt.on_conflict_do_update(
+        # Expressão literal do índice uq_reference_value_scope: com o 0 como parâmetro,
+        # o statement preparado (executemany) não casa com o índice
+        index_elements=[ReferenceValue.dataset, text("coalesce(source_id, 0)"), ReferenceValue.value],
+        set_={
+            "is_active": stmt.excluded.is_active,
+            "version": func.nextval("reference_value_version_seq"),
+            "updated_at": func.now(),
+        },
+    )
+    db.execute(stmt, [
+        {"dataset": dataset, "source_id": source_id, "value": v, "is_active": is_active}
+        for v in dict.fromkeys(values)
+    ])
+    return len(values)
+
+
+def count_reference_values(db: Session) -> list[tuple[str, int]]:
+    # Valores ativos por dataset
+    return db.execute(
+        select(ReferenceValue.dataset, func.count())
+        .where(ReferenceValue.is_active.is_(True))
+        .group_by(ReferenceValue.dataset)
+        .order_by(ReferenceValue.dataset)
+    ).all()
+
+
+def _changed_since(db: Session, version: int):
+    return db.execute(
+        select(
+            ReferenceValue.dataset,
+            ReferenceValue.source_id,
+            ReferenceValue.value,
+            ReferenceValue.is_active,
+            ReferenceValue.version,
+        )
+        .where(ReferenceValue.version > version)
+        .order_by(ReferenceValue.version)
+    )
+
+
+class ReferenceCache:
+    """
+    In-memory copy of the active reference values.
+
+    `contains` is a set lookup: (dataset, source_id) and (dataset, None)
+    for values valid for every source. `ensure_fresh` loads everything on
+    first use, then only rows with a version above the last one seen every
+    `refresh_seconds`, plus a full reload every `full_reload_seconds` to
+    pick up rows committed out of version order by concurrent writers.
+    No lock is ever waited on around the query: concurrent callers keep
+    the current snapshot while one of them refreshes it.
+    """
+
+    def __init__(self, refresh_seconds: float, full_reload_seconds: float) -> None:
+        self.refresh_seconds = refresh_seconds
+        self.full_reload_seconds = full_reload_seconds
+        self._lock = Lock()
+        # Refresh em andamento (só tentado sem bloquear)
+        self._refreshing = Lock()
+        self._values: dict[tuple[str, int | None], set[str]] = {}
+        self._version = 0
+        self._loaded = False
+        self._refreshed_at = 0.0
+        self._reloaded_at = 0.0
+
+        # Consultas atendidas pelo cache: valor encontrado / não encontrado
+        self.hits = 0
+        self.misses = 0
+
+    def ensure_fresh(self, db: Session) -> None:
+        now = time.monotonic()
+        if self._loaded and now - self._refreshed_at < self.refresh_seconds:
+            return
+        # Nunca espera por um lock em volta de I/O: via AsyncSession.run_sync a
+        # consulta devolve o event loop, e quem esperasse na mesma thread travaria
+        # o processo. Um refresh por vez; os demais seguem com o snapshot atual
+        # (antes da primeira carga cada chamada lê por conta própria).
+        if not self._refreshing.acquire(blocking=False):
+            if not self._loaded:
+                self._load(db, now, full=True)
+            return
+        try:
+            if self._loaded and now - self._refreshed_at < self.refresh_seconds:
+                return
+            full = not self._loaded or now - self._reloaded_at >= self.full_reload_seconds
+            self._load(db, now, full)
+        finally:
+            self._refreshing.release()
+
+    def _load(self, db: Session, now: float, full: bool) -> None:
+        # Consulta fora de qualquer lock; só a troca do snapshot é protegida
+        values: dict[tuple[str, int | None], set[str]] = {} if full else self._values
+        version = 0 if full else self._version
+
+        changed = 0
+        for row in _changed_since(db, version):
+            bucket = values.setdefault((row.dataset, row.source_id), set())
+            if row.is_active:
+                bucket.add(row.value)
+            else:
+                bucket.discard(row.value)
+            version = max(version, row.version)
+            changed += 1
+
+        with self._lock:
+            # Troca atômica no reload completo (leitores veem o conjunto antigo até aqui)
+            self._values = values
+            self._version = version
+            self._loaded = True
+            self._refreshed_at = now
+            if full:
+                self._reloaded_at = now
+        pipeline_metrics.incr("reference_cache_full_loads_total" if full else "reference_cache_refreshes_total")
+        if changed:
+            pipeline_metrics.incr("reference_cache_rows_loaded_total", changed)
+
+    def contains(self, dataset: str, source_id: int | None, value) -> bool:
+        values = self._values
+        try:
+            found = value in values.get((dataset, None), ()) or (
+                source_id is not None and value in values.get((dataset, source_id), ())
+            )
+        except TypeError:
+            # Lista/objeto do payload (não hasheável) nunca é um valor de referência
+            found = False
+        # Contadores sem lock (aproximados sob concorrência, suficientes para taxa)
+        if found:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return found
+
+    def lookup_for(self, source_id: int | None):
+        # Função (dataset, valor) -> bool ligada à fonte do conjunto de regras
+        return lambda dataset, value: self.contains(dataset, source_id, value)
+
+    def mark_stale(self) -> None:
+        # Próximo ensure_fresh busca as alterações (escritas feitas neste processo)
+        self._refreshed_at = 0.0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values = {}
+            self._version = 0
+            self._loaded = False
+            self._refreshed_at = self._reloaded_at = 0.0
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        values = self._values
+        return {
+            "version": self._version,
+            "datasets": len({dataset for dataset, _ in values}),
+            "values": sum(len(v) for v in values.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+reference_cache = ReferenceCache(
+    refresh_seconds=settings.REFERENCE_REFRESH_SECONDS,
+    full_reload_seconds=settings.REFERENCE_FULL_RELOAD_SECONDS,
+)
+pipeline_metrics.register_collector("reference_cache", reference_cache.stats)
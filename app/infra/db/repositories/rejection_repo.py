@@ -4,42 +4,43 @@ Rejection repository.
 Data-access helpers for inserting and listing rejection records.
 """
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, insert, select
 from app.infra.db.models.rejection import Rejection
 
 # Esse padrão permite retornar total + itens, ideal para API paginada.
 
-def insert_rejections(db: Session, rejections: list[Rejection]) -> None:
-    # Insere várias rejeições de uma vez
-    db.add_all(rejections)
-    db.commit()
+def insert_rejections(db: Session, rows: list[dict]) -> None:
+    # Insere várias rejeições de uma vez (multi-row, sem commit)
+    if rows:
+        db.execute(insert(Rejection), rows)
 
-def list_rejections(
-    db: Session,
+async def list_rejections(
+    db: AsyncSession,
     category: str | None = None,
     severity: str | None = None,
     page: int = 1,
     page_size: int = 50,
 ):
-    # Query base
-    q = db.query(Rejection)
-
-    # Filtros opcionais
+    # Filtros (só rejeições vigentes; sessão async: select 2.0 em vez de Query)
+    conditions = [Rejection.superseded_at.is_(None)]
     if category:
-        q = q.filter(Rejection.category == category)
+        conditions.append(Rejection.category == category)
     if severity:
-        q = q.filter(Rejection.severity == severity)
+        conditions.append(Rejection.severity == severity)
 
     # Total antes da paginação
-    total = q.with_entities(func.count()).scalar() or 0
+    total = (await db.execute(select(func.count()).select_from(Rejection).where(*conditions))).scalar() or 0
 
     # Página atual
-    items = (
-        q.order_by(Rejection.id.desc())
-         .offset((page - 1) * page_size)
-         .limit(page_size)
-         .all()
+    stmt = (
+        select(Rejection)
+        .where(*conditions)
+        .order_by(Rejection.id.desc())
+        .offset((page - 1) * page_size)
+        .limit(page_size)
     )
+    items = (await db.execute(stmt)).scalars().all()
 
     return total, items
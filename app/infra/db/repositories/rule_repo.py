@@ -0,0 +1,161 @@
+"""
+Validation rule set repository.
+
+Storage of declarative rule sets (validation_rule_set) and an in-process
+registry of compiled rule sets per (source_id, schema_version), so rules
+are compiled once and the ingest hot path does not query them per event.
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import event, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.core import pipeline_metrics
+from app.core.cache import TTLCache
+from app.core.settings import settings
+from app.domain.rules import RuleSet, compile_rules
+from app.domain.validation import default_rule_set
+from app.infra.db.models.validation_rule_set import ValidationRuleSet
+from app.infra.db.repositories.reference_repo import reference_cache
+
+# Marca "sem conjunto shadow" no cache (TTLCache devolve None em miss)
+_NO_RULES = RuleSet([])
+
+
+def list_rule_sets(db: Session) -> list[ValidationRuleSet]:
+    return db.execute(
+        select(ValidationRuleSet).order_by(
+            ValidationRuleSet.source_id.nullsfirst(), ValidationRuleSet.schema_version, ValidationRuleSet.stage
+        )
+    ).scalars().all()
+
+
+def upsert_rule_set(
+    db: Session,
+    source_id: int | None,
+    schema_version: str | None,
+    rules: list,
+    is_active: bool = True,
+    stage: str = "live",
+) -> ValidationRuleSet:
+    """
+    Creates or replaces the rule set of a scope and stage, bumping its version.
+
+    Does not commit. Rules must already be valid (see compile_rules).
+    """
+    row = db.execute(
+        select(ValidationRuleSet).where(
+            ValidationRuleSet.source_id.is_(None) if source_id is None else ValidationRuleSet.source_id == source_id,
+            ValidationRuleSet.schema_version.is_(None)
+            if schema_version is None else ValidationRuleSet.schema_version == schema_version,
+            ValidationRuleSet.stage == stage,
+        )
+    ).scalar_one_or_none()
+
+    if row is None:
+        row = ValidationRuleSet(
+            source_id=source_id,
+            schema_version=schema_version,
+            stage=stage,
+            rules=rules,
+            is_active=is_active,
+        )
+        db.add(row)
+    else:
+        row.rules = rules
+        row.is_active = is_active
+        row.version = row.version + 1
+        row.updated_at = func.now()
+    db.flush()
+    return row
+
+
+def find_rule_set(
+    db: Session,
+    source_id: int,
+    schema_version: str,
+    stage: str = "live",
+) -> ValidationRuleSet | None:
+    # Conjunto ativo mais específico: fonte+versão > fonte > versão > global
+    return db.execute(
+        select(ValidationRuleSet)
+        .where(
+            ValidationRuleSet.is_active.is_(True),
+            ValidationRuleSet.stage == stage,
+            or_(ValidationRuleSet.source_id == source_id, ValidationRuleSet.source_id.is_(None)),
+            or_(ValidationRuleSet.schema_version == schema_version, ValidationRuleSet.schema_version.is_(None)),
+        )
+        .order_by(ValidationRuleSet.source_id.nullslast(), ValidationRuleSet.schema_version.nullslast())
+        .limit(1)
+    ).scalar_one_or_none()
+
+
+class RuleRegistry:
+    """
+    Bounded, TTL-based cache of compiled rule sets by (source_id,
+    schema_version).
+
+    Scopes without a configured rule set resolve to the default rules
+    (stage "live") or to None (stage "shadow": nothing to compare).
+    Rule sets with "reference" rules are bound to the source's view of the
+    reference cache, which is kept fresh on every resolve.
+    Changes made through the ORM clear the registry immediately; changes
+    made by other processes are picked up after the TTL.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, stage: str = "live") -> None:
+        self.stage = stage
+        self._rule_sets = TTLCache(max_entries, ttl_seconds)
+
+    def resolve(self, db: Session, source_id: int, schema_version: str) -> RuleSet | None:
+        key = (source_id, schema_version)
+        rule_set = self._rule_sets.get(key)
+        if rule_set is None:
+            row = find_rule_set(db, source_id, schema_version, self.stage)
+            if row is not None:
+                rule_set = compile_rules(row.rules, row.version, reference_cache.lookup_for(source_id))
+                # Identifica o conjunto de origem (divergências do shadow)
+                rule_set.rule_set_id = row.id
+            elif self.stage == "live":
+                rule_set = default_rule_set
+            else:
+                rule_set = _NO_RULES
+            self._rule_sets.set(key, rule_set)
+            pipeline_metrics.incr("validation_rules_compiled_total")
+
+        if rule_set is _NO_RULES:
+            return None
+        # Dados de referência atualizados (carga inicial / refresh incremental)
+        if rule_set.datasets:
+            reference_cache.ensure_fresh(db)
+        return rule_set
+
+    def clear(self) -> None:
+        self._rule_sets.clear()
+
+    def stats(self) -> dict:
+        return self._rule_sets.stats()
+
+
+rule_registry = RuleRegistry(
+    max_entries=settings.RULES_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.RULES_CACHE_TTL_SECONDS,
+)
+pipeline_metrics.register_collector("validation_rules_cache", rule_registry.stats)
+
+# Conjuntos candidatos (shadow), resolvidos só pelo worker de shadow
+shadow_rule_registry = RuleRegistry(
+    max_entries=settings.RULES_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.RULES_CACHE_TTL_SECONDS,
+    stage="shadow",
+)
+
+
+# Qualquer alteração de regras via ORM descarta os conjuntos compilados
+@event.listens_for(ValidationRuleSet, "after_insert")
+@event.listens_for(ValidationRuleSet, "after_update")
+@event.listens_for(ValidationRuleSet, "after_delete")
+def _invalidate_rules(mapper, connection, target: ValidationRuleSet) -> None:
+    rule_registry.clear()
+    shadow_rule_registry.clear()
@@ -0,0 +1,133 @@
+"""
+Attribute schema repository.
+
+Storage of attribute JSON Schemas (attribute_schema) and an in-process
+registry of compiled validators per (source_id, schema_version), so each
+schema is compiled once and reused across requests.
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import event, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.core import pipeline_metrics
+from app.core.cache import TTLCache
+from app.core.settings import settings
+from app.domain.attribute_schema import AttributeValidator, compile_attribute_schema
+from app.infra.db.models.attribute_schema import AttributeSchema
+
+# Marca "sem schema" no cache (TTLCache devolve None em miss)
+_NO_SCHEMA = False
+
+
+def list_attribute_schemas(db: Session) -> list[AttributeSchema]:
+    return db.execute(
+        select(AttributeSchema).order_by(AttributeSchema.source_id.nullsfirst(), AttributeSchema.schema_version)
+    ).scalars().all()
+
+
+def upsert_attribute_schema(
+    db: Session,
+    source_id: int | None,
+    schema_version: str,
+    json_schema: dict,
+    is_active: bool = True,
+) -> AttributeSchema:
+    """
+    Creates or replaces the schema of a scope, bumping its version.
+
+    Does not commit. The schema must already compile.
+    """
+    row = db.execute(
+        select(AttributeSchema).where(
+            AttributeSchema.source_id.is_(None) if source_id is None else AttributeSchema.source_id == source_id,
+            AttributeSchema.schema_version == schema_version,
+        )
+    ).scalar_one_or_none()
+
+    if row is None:
+        row = AttributeSchema(
+            source_id=source_id,
+            schema_version=schema_version,
+            json_schema=json_schema,
+            is_active=is_active,
+        )
+        db.add(row)
+    else:
+        row.json_schema = json_schema
+        row.is_active = is_active
+        row.version = row.version + 1
+        row.updated_at = func.now()
+    db.flush()
+    return row
+
+
+def find_attribute_schema(db: Session, source_id: int, schema_version: str) -> AttributeSchema | None:
+    # Schema ativo da fonte tem precedência sobre o schema global da versão
+    return db.execute(
+        select(AttributeSchema)
+        .where(
+            AttributeSchema.is_active.is_(True),
+            AttributeSchema.schema_version == schema_version,
+            or_(AttributeSchema.source_id == source_id, AttributeSchema.source_id.is_(None)),
+        )
+        .order_by(AttributeSchema.source_id.nullslast())
+        .limit(1)
+    ).scalar_one_or_none()
+
+
+class SchemaRegistry:
+    """
+    Bounded, TTL-based cache of compiled attribute validators.
+
+    Scopes resolve to a validator (or to "no schema") per (source_id,
+    schema_version); compiled validators are kept by (schema id, version),
+    so a scope entry expiring only costs a lookup, not a recompilation.
+    Changes made through the ORM clear the registry immediately.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self._scopes = TTLCache(max_entries, ttl_seconds)
+        self._compiled = TTLCache(max_entries, ttl_seconds)
+
+    def resolve(self, db: Session, source_id: int, schema_version: str) -> AttributeValidator | None:
+        key = (source_id, schema_version)
+        cached = self._scopes.get(key)
+        if cached is not None:
+            return cached or None
+
+        row = find_attribute_schema(db, source_id, schema_version)
+        if row is None:
+            self._scopes.set(key, _NO_SCHEMA)
+            return None
+
+        validator = self._compiled.get((row.id, row.version))
+        if validator is None:
+            validator = compile_attribute_schema(row.json_schema, row.version)
+            self._compiled.set((row.id, row.version), validator)
+            pipeline_metrics.incr("attribute_schemas_compiled_total")
+        self._scopes.set(key, validator)
+        return validator
+
+    def clear(self) -> None:
+        self._scopes.clear()
+        self._compiled.clear()
+
+    def stats(self) -> dict:
+        return {**self._scopes.stats(), "compiled": len(self._compiled)}
+
+
+schema_registry = SchemaRegistry(
+    max_entries=settings.SCHEMA_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.SCHEMA_CACHE_TTL_SECONDS,
+)
+pipeline_metrics.register_collector("attribute_schema_cache", schema_registry.stats)
+
+
+# Alteração de schema via ORM invalida os validadores compilados
+@event.listens_for(AttributeSchema, "after_insert")
+@event.listens_for(AttributeSchema, "after_update")
+@event.listens_for(AttributeSchema, "after_delete")
+def _invalidate_schemas(mapper, connection, target: AttributeSchema) -> None:
+    schema_registry.clear()
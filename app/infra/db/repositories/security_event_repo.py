@@ -8,6 +8,7 @@ from __future__ import annotations
 from typing import Any, Dict, Optional
 from datetime import datetime
 from sqlalchemy import select, func, desc
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 # Imports por side-effect:
@@ -111,8 +112,8 @@ def create_security_event(
         details=details_dict,
     )
 
-def list_security_events(
-    db: Session,
+async def list_security_events(
+    db: AsyncSession,
     *,
     severity: Optional[str] = None,
     event_type: Optional[str] = None,
@@ -150,12 +151,12 @@ def list_security_events(
         stmt = stmt.where(SecurityEvent.created_at <= date_to)
         count_stmt = count_stmt.where(SecurityEvent.created_at <= date_to)
 
-    total = db.execute(count_stmt).scalar_one()
+    total = (await db.execute(count_stmt)).scalar_one()
 
     stmt = (
         stmt.order_by(desc(SecurityEvent.created_at))
         .offset((page - 1) * page_size)
         .limit(page_size)
     )
-    rows = db.execute(stmt).scalars().all()
+    rows = (await db.execute(stmt)).scalars().all()
     return total, rows
\ No newline at end of file
@@ -0,0 +1,65 @@
+"""
+Shadow divergence repository.
+
+Accumulates shadow-validation counters (one row per candidate version,
+source and rule) and lists them for review.
+"""
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.infra.db.models.shadow_divergence import ShadowDivergence
+
+# Upsert acumulativo: o worker grava contadores já agregados em memória.
+
+def record_divergences(db: Session, counters: dict[tuple[int, int, int, str], list[int]]) -> None:
+    """
+    Adds counters keyed by (rule_set_id, rule_set_version, source_id, rule)
+    with values [evaluated, would_reject, would_accept].
+
+    Does not commit automatically.
+    """
+    if not counters:
+        return
+    stmt = pg_insert(ShadowDivergence)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[
+            ShadowDivergence.rule_set_id,
+            ShadowDivergence.rule_set_version,
+            ShadowDivergence.source_id,
+            ShadowDivergence.rule,
+        ],
+        set_={
+            "evaluated": ShadowDivergence.evaluated + stmt.excluded.evaluated,
+            "would_reject": ShadowDivergence.would_reject + stmt.excluded.would_reject,
+            "would_accept": ShadowDivergence.would_accept + stmt.excluded.would_accept,
+            "last_seen_at": func.now(),
+        },
+    )
+    db.execute(stmt, [
+        {
+            "rule_set_id": rule_set_id,
+            "rule_set_version": version,
+            "source_id": source_id,
+            "rule": rule,
+            "evaluated": evaluated,
+            "would_reject": would_reject,
+            "would_accept": would_accept,
+        }
+        for (rule_set_id, version, source_id, rule), (evaluated, would_reject, would_accept) in counters.items()
+    ])
+
+
+def list_divergences(db: Session, rule_set_id: int | None = None) -> list[ShadowDivergence]:
+    q = select(ShadowDivergence)
+    if rule_set_id is not None:
+        q = q.where(ShadowDivergence.rule_set_id == rule_set_id)
+    return db.execute(
+        q.order_by(
+            ShadowDivergence.rule_set_id,
+            ShadowDivergence.rule_set_version.desc(),
+            ShadowDivergence.source_id,
+            ShadowDivergence.rule,
+        )
+    ).scalars().all()
@@ -1,4 +1,23 @@
+"""
+Source system repository.
+
+Lookup and auto-creation of source systems, fronted by an in-process
+registry cache (name -> id/status/api_key_hash) so the ingest hot path
+does not hit `source_system` on every request.
+"""
+
+from __future__ import annotations
+
+import hmac
+from dataclasses import dataclass
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.security import verify_api_key
+from app.core.settings import settings
 from app.infra.db.models.source_system import SourceSystem
 
 # Esse método facilita onboarding automático de novas fontes.
@@ -7,15 +26,131 @@ def get_source_by_name(db: Session, name: str) -> SourceSystem | None:
     # Busca uma fonte pelo nome
     return db.query(SourceSystem).filter(SourceSystem.name == name).first()
 
-def create_source_if_missing(db: Session, name: str) -> SourceSystem:
-    # Retorna a fonte se existir
-    src = get_source_by_name(db, name)
+
+# Snapshot imutável da fonte guardado no cache
+@dataclass(frozen=True)
+class CachedSource:
+    id: int
+    name: str
+    status: str
+    api_key_hash: str | None
+    quota_rate_per_second: float | None = None
+    quota_burst: int | None = None
+    ingest_weight: int = 1
+
+
+def _to_cached(src) -> CachedSource:
+    return CachedSource(
+        id=int(src.id),
+        name=src.name,
+        status=src.status,
+        api_key_hash=src.api_key_hash,
+        quota_rate_per_second=src.quota_rate_per_second,
+        quota_burst=src.quota_burst,
+        ingest_weight=src.ingest_weight or 1,
+    )
+
+
+class SourceRegistry:
+    """
+    Bounded, TTL-based cache of source systems by name.
+
+    Also memoizes API keys already verified against the current hash, so a
+    repeated key skips the SHA-256. Entries are invalidated when the row is
+    updated/deleted through the ORM (deactivation, key rotation) and expire
+    after the TTL for changes made by other processes.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self._sources = TTLCache(max_entries, ttl_seconds)
+        self._verified = TTLCache(max_entries, ttl_seconds)
+
+    def resolve(self, db: Session, name: str) -> CachedSource | None:
+        # Cache primeiro; banco apenas em miss/expiração
+        cached = self._sources.get(name)
+        if cached is not None:
+            return cached
+
+        src = get_source_by_name(db, name)
+        if not src:
+            return None
+
+        cached = _to_cached(src)
+        self._sources.set(name, cached)
+        return cached
+
+    def verify_key(self, src: CachedSource, api_key: str) -> bool:
+        # Chave já verificada contra o hash atual → evita novo SHA-256
+        memo = self._verified.get(src.name)
+        if memo is not None:
+            key_hash, verified_key = memo
+            if key_hash == src.api_key_hash and hmac.compare_digest(verified_key, api_key):
+                return True
+
+        if not verify_api_key(api_key, src.api_key_hash):
+            return False
+
+        self._verified.set(src.name, (src.api_key_hash, api_key))
+        return True
+
+    def invalidate(self, name: str) -> None:
+        self._sources.pop(name)
+        self._verified.pop(name)
+
+    def clear(self) -> None:
+        # Limpa todo o cache (útil em testes)
+        self._sources.clear()
+        self._verified.clear()
+
+
+source_registry = SourceRegistry(
+    max_entries=settings.SOURCE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.SOURCE_CACHE_TTL_SECONDS,
+)
+
+
+# Desativação / rotação de chave via ORM invalidam a entrada imediatamente
+@event.listens_for(SourceSystem, "after_update")
+@event.listens_for(SourceSystem, "after_delete")
+def _invalidate_source(mapper, connection, target: SourceSystem) -> None:
+    # Inclui o nome antigo em caso de renomeação
+    for name in (target.name, *inspect(target).attrs.name.history.deleted):
+        source_registry.invalidate(name)
+
+
+# Colunas do snapshot em cache
+_CACHED_COLUMNS = (
+    SourceSystem.id,
+    SourceSystem.name,
+    SourceSystem.status,
+    SourceSystem.api_key_hash,
+    SourceSystem.quota_rate_per_second,
+    SourceSystem.quota_burst,
+    SourceSystem.ingest_weight,
+)
+
+
+def create_source_if_missing(db: Session, name: str) -> CachedSource:
+    # Retorna a fonte se existir (cache → banco)
+    src = source_registry.resolve(db, name)
     if src:
         return src
 
-    # Cria a fonte caso não exista
-    src = SourceSystem(name=name, status="active")
-    db.add(src)
-    db.commit()
-    db.refresh(src)
-    return src
+    # Upsert sem corrida: se outra requisição criar a fonte ao mesmo tempo,
+    # o ON CONFLICT evita o erro de unicidade (uq_source_system_name)
+    stmt = (
+        pg_insert(SourceSystem)
+        .values(name=name, status="active")
+        .on_conflict_do_nothing(index_elements=[SourceSystem.name])
+        .returning(*_CACHED_COLUMNS)
+    )
+    row = db.execute(stmt).first()
+    if row is None:
+        row = db.execute(
+            select(*_CACHED_COLUMNS)
+            .where(SourceSystem.name == name)
+        ).one()
+
+    # Não entra no cache aqui: a transação ainda pode sofrer rollback.
+    # O próximo resolve() (após o commit) popula o cache.
+    return _to_cached(row)
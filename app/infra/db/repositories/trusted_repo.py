@@ -3,21 +3,32 @@ Trusted event repository.
 
 Handles persistence and querying of validated events.
 """
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func, select
+from sqlalchemy import func, insert, select
 from app.infra.db.models.trusted_event import TrustedEvent
 
 # Filtros são compostos dinamicamente sem quebrar a paginação.
 
-def insert_trusted(db: Session, t: TrustedEvent) -> TrustedEvent:
-    # Persiste um evento confiável
-    db.add(t)
-    db.commit()
-    db.refresh(t)
-    return t
+def insert_trusted(db: Session, row: dict) -> int:
+    # Persiste um evento confiável (INSERT ... RETURNING id, sem commit/refresh)
+    stmt = insert(TrustedEvent).values(**row).returning(TrustedEvent.id)
+    return db.execute(stmt).scalar_one()
 
-def list_trusted(
-    db: Session,
+def insert_trusted_many(db: Session, rows: list[dict]) -> list[int]:
+    """
+    Multi-row insert of trusted events.
+
+    Returns the generated ids in the same order as `rows`.
+    Does not commit automatically.
+    """
+    if not rows:
+        return []
+    stmt = insert(TrustedEvent).returning(TrustedEvent.id, sort_by_parameter_order=True)
+    return list(db.execute(stmt, rows).scalars().all())
+
+async def list_trusted(
+    db: AsyncSession,
     source_id: int | None = None,
     external_id: str | None = None,
     event_status: str | None = None,
@@ -26,31 +37,31 @@ def list_trusted(
     page: int = 1,
     page_size: int = 50,
 ):
-    # Query base
-    q = db.query(TrustedEvent)
-
-    # Filtros opcionais
+    # Filtros opcionais (sessão async: select 2.0 em vez de Query)
+    conditions = []
     if source_id is not None:
-        q = q.filter(TrustedEvent.source_id == source_id)
+        conditions.append(TrustedEvent.source_id == source_id)
     if external_id:
-        q = q.filter(TrustedEvent.external_id == external_id)
+        conditions.append(TrustedEvent.external_id == external_id)
     if event_status:
-        q = q.filter(TrustedEvent.event_status == event_status)
+        conditions.append(TrustedEvent.event_status == event_status)
     if date_from is not None:
-        q = q.filter(TrustedEvent.event_timestamp >= date_from)
+        conditions.append(TrustedEvent.event_timestamp >= date_from)
     if date_to is not None:
-        q = q.filter(TrustedEvent.event_timestamp <= date_to)
+        conditions.append(TrustedEvent.event_timestamp <= date_to)
 
     # Total antes da paginação
-    total = q.with_entities(func.count()).scalar() or 0
+    total = (await db.execute(select(func.count()).select_from(TrustedEvent).where(*conditions))).scalar() or 0
 
     # Página atual
-    items = (
-        q.order_by(TrustedEvent.id.desc())
-         .offset((page - 1) * page_size)
-         .limit(page_size)
-         .all()
+    stmt = (
+        select(TrustedEvent)
+        .where(*conditions)
+        .order_by(TrustedEvent.id.desc())
+        .offset((page - 1) * page_size)
+        .limit(page_size)
     )
+    items = (await db.execute(stmt)).scalars().all()
 
     return total, items
 
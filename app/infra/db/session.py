@@ -1,13 +1,22 @@
 """
 Database session utilities.
 
-SQLAlchemy engine/session setup and FastAPI dependency for DB sessions.
+SQLAlchemy engine/session setup and FastAPI dependencies for DB sessions.
+
+Two engines share the same DATABASE_URL: the sync one backs scripts,
+background threads, sync routes and the ingest service work that async
+routes hand to the threadpool (`get_db`); the async one (psycopg in async
+mode) backs the async hot routes (`get_async_db`), whose short DB waits
+(authentication, quota, idempotency, listings) happen on the event loop.
 """
 
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
+from app.core.settings import settings
+
 # URL de conexão com o banco (vinda do ambiente)
 DATABASE_URL = os.getenv("DATABASE_URL")
 
@@ -22,6 +31,21 @@ SessionLocal = sessionmaker(
     bind=engine,
 )
 
+# Engine async (postgresql+psycopg resolve para o driver async do psycopg)
+async_engine = create_async_engine(
+    DATABASE_URL,
+    pool_pre_ping=True,
+    pool_size=settings.DB_ASYNC_POOL_SIZE,
+    max_overflow=settings.DB_ASYNC_MAX_OVERFLOW,
+)
+
+# Factory de sessões async (objetos continuam legíveis após o commit)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 def get_db():
     # Cria uma sessão por request
     db = SessionLocal()
@@ -30,3 +54,8 @@ def get_db():
     finally:
         # Garante fechamento da sessão
         db.close()
+
+async def get_async_db():
+    # Sessão async por request (rotas async def)
+    async with AsyncSessionLocal() as db:
+        yield db
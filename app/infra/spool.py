@@ -0,0 +1,287 @@
+"""
+Durable local spool for asynchronous ingestion.
+
+Append-only segment files on local disk. Each record is framed as
+[length:uint32][crc32:uint32][payload] (big-endian) and fsync'd before the
+append returns, so an acknowledged event survives a process crash.
+
+Segments move through two states:
+- `seg-<n>.open`: the active segment, still receiving appends
+- `seg-<n>.log`: sealed, ready to be drained into the database
+
+Each process claims its own slot directory (flock), so several uvicorn
+workers can share the same base directory, and a restarted worker picks up
+the segments left behind by the previous one. Slots whose owner died and
+that nobody reclaimed are adopted at startup (`adopt_orphans`) and drained
+by the surviving process.
+
+A frame with a bad CRC does not end the read: the reader resyncs to the
+next valid frame, and the segment is quarantined (`seg-<n>.<ns>.bad`, one
+file per quarantine) instead of being deleted once drained.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import json
+import logging
+import os
+import struct
+import time
+import zlib
+from pathlib import Path
+from threading import Lock
+from typing import Callable, Iterator
+
+logger = logging.getLogger("app.ingest.spool")
+
+# Cabeçalho do registro: tamanho do payload + CRC32
+_HEADER = struct.Struct(">II")
+
+# Limite de slots (um por processo/worker)
+MAX_SLOTS = 64
+
+
+def _fsync_dir(path: Path) -> None:
+    # Garante que a criação/renomeação do arquivo também é durável
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class Spool:
+    def __init__(self, base_dir: str, segment_bytes: int) -> None:
+        self.base_dir = Path(base_dir)
+        self.segment_bytes = int(segment_bytes)
+
+        self.dir: Path | None = None
+        self._lock_fd: int | None = None
+        self._lock = Lock()
+
+        # Slots órfãos reivindicados por este processo (lock mantido até drenar)
+        self._adopted: dict[Path, int] = {}
+
+        # Segmento ativo
+        self._active = None
+        self._active_path: Path | None = None
+        self._active_opened_at = 0.0
+        self._next_seq = 0
+
+    # === Ciclo de vida ===
+
+    def open(self) -> None:
+        # Reserva um slot livre (flock) e sela segmentos abertos de uma execução anterior
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        for slot in range(MAX_SLOTS):
+            slot_dir = self.base_dir / f"slot-{slot}"
+            slot_dir.mkdir(exist_ok=True)
+            fd = os.open(slot_dir / ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                continue
+            self.dir = slot_dir
+            self._lock_fd = fd
+            break
+        else:
+            raise RuntimeError("no free spool slot")
+
+        for path in sorted(self.dir.glob("seg-*.open")):
+            path.rename(path.with_suffix(".log"))
+
+        seqs = [int(p.stem.split("-")[1]) for p in self.dir.glob("seg-*.log")]
+        self._next_seq = max(seqs, default=-1) + 1
+
+    def close(self) -> None:
+        with self._lock:
+            self._seal_locked()
+        if self._lock_fd is not None:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+            os.close(self._lock_fd)
+            self._lock_fd = None
+        for slot_dir in list(self._adopted):
+            self._unadopt(slot_dir)
+
+    def adopt_orphans(self) -> list[Path]:
+        # Slots com segmentos pendentes e lock livre (processo dono morreu): reivindica e sela
+        adopted = []
+        for slot_dir in sorted(self.base_dir.glob("slot-*")):
+            if slot_dir == self.dir or slot_dir in self._adopted:
+                continue
+            fd = os.open(slot_dir / ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                continue
+
+            leftovers = sorted(slot_dir.glob("seg-*.open"))
+            if not leftovers and not any(slot_dir.glob("seg-*.log")):
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+                continue
+
+            for path in leftovers:
+                path.rename(path.with_suffix(".log"))
+            _fsync_dir(slot_dir)
+            self._adopted[slot_dir] = fd
+            adopted.append(slot_dir)
+            logger.warning("adopted orphaned spool slot", extra={"path": str(slot_dir)})
+        return adopted
+
+    def release_drained(self) -> None:
+        # Slot adotado sem segmentos pendentes: devolve o lock (outro processo pode reivindicá-lo)
+        for slot_dir in list(self._adopted):
+            if not any(slot_dir.glob("seg-*.log")):
+                self._unadopt(slot_dir)
+
+    def _unadopt(self, slot_dir: Path) -> None:
+        fd = self._adopted.pop(slot_dir)
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+    # === Escrita ===
+
+    def append(self, record: dict) -> None:
+        payload = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        frame = _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+        with self._lock:
+            if self._active is None:
+                self._open_segment_locked()
+
+            self._active.write(frame)
+            self._active.flush()
+            os.fsync(self._active.fileno())
+
+            # Rotação por tamanho
+            if self._active.tell() >= self.segment_bytes:
+                self._seal_locked()
+
+    def seal(self, min_age_s: float = 0.0) -> None:
+        # Sela o segmento ativo (opcionalmente só se estiver aberto há min_age_s)
+        with self._lock:
+            if self._active is None:
+                return
+            if time.monotonic() - self._active_opened_at < min_age_s:
+                return
+            self._seal_locked()
+
+    def _open_segment_locked(self) -> None:
+        self._active_path = self.dir / f"seg-{self._next_seq:012d}.open"
+        self._next_seq += 1
+        self._active = open(self._active_path, "ab")
+        self._active_opened_at = time.monotonic()
+        _fsync_dir(self.dir)
+
+    def _seal_locked(self) -> None:
+        if self._active is None:
+            return
+        self._active.close()
+        self._active_path.rename(self._active_path.with_suffix(".log"))
+        _fsync_dir(self.dir)
+        self._active = None
+        self._active_path = None
+
+    # === Leitura / drenagem ===
+
+    def sealed_segments(self) -> list[Path]:
+        # Segmentos do próprio slot e dos slots órfãos adotados
+        segments = sorted(self.dir.glob("seg-*.log"))
+        for slot_dir in list(self._adopted):
+            segments.extend(sorted(slot_dir.glob("seg-*.log")))
+        return segments
+
+    def pending_bytes(self) -> int:
+        return sum(p.stat().st_size for p in self.dir.glob("seg-*.*") if p.suffix in (".log", ".open"))
+
+    @staticmethod
+    def read(
+        path: Path,
+        offset: int = 0,
+        on_corrupt: Callable[[int], None] | None = None,
+    ) -> Iterator[tuple[int, dict]]:
+        """
+        Iterates (offset after the record, record) from `offset`.
+
+        A torn tail (incomplete last frame) ends the read. A damaged frame
+        is reported to `on_corrupt` with its offset and the read resumes at
+        the next valid frame.
+        """
+        with open(path, "rb") as f:
+            f.seek(offset)
+            while True:
+                start = f.tell()
+                header = f.read(_HEADER.size)
+                if not header:
+                    return
+                if len(header) < _HEADER.size:
+                    logger.warning("spool segment truncated", extra={"path": str(path)})
+                    return
+                length, crc = _HEADER.unpack(header)
+                payload = f.read(length)
+                if len(payload) == length and zlib.crc32(payload) == crc:
+                    yield f.tell(), json.loads(payload)
+                    continue
+
+                # Frame inválido: procura o próximo cabeçalho com CRC válido
+                f.seek(start + 1)
+                resume = Spool._resync(f.read(), start + 1)
+                if resume is None and len(payload) < length:
+                    # Cauda truncada por crash no meio do append
+                    logger.warning("spool segment truncated", extra={"path": str(path)})
+                    return
+                logger.error("spool segment corrupted", extra={"path": str(path), "offset": start})
+                if on_corrupt is not None:
+                    on_corrupt(start)
+                if resume is None:
+                    return
+                f.seek(resume)
+
+    @staticmethod
+    def _resync(data: bytes, base: int) -> int | None:
+        # Offset absoluto do primeiro frame íntegro em `data` (que começa em `base`)
+        for i in range(len(data) - _HEADER.size + 1):
+            length, crc = _HEADER.unpack_from(data, i)
+            end = i + _HEADER.size + length
+            if end <= len(data) and zlib.crc32(data[i + _HEADER.size:end]) == crc:
+                return base + i
+        return None
+
+    @staticmethod
+    def load_checkpoint(path: Path) -> int:
+        ckpt = path.with_suffix(".ckpt")
+        if not ckpt.exists():
+            return 0
+        return int(ckpt.read_text().strip() or 0)
+
+    @staticmethod
+    def save_checkpoint(path: Path, offset: int) -> None:
+        # Escrita atômica do offset já persistido no banco
+        ckpt = path.with_suffix(".ckpt")
+        tmp = ckpt.with_suffix(".ckpt.tmp")
+        with open(tmp, "w") as f:
+            f.write(str(offset))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, ckpt)
+        _fsync_dir(ckpt.parent)
+
+    @staticmethod
+    def discard(path: Path) -> None:
+        # Segmento totalmente drenado → remove dados e checkpoint
+        path.with_suffix(".ckpt").unlink(missing_ok=True)
+        path.unlink(missing_ok=True)
+
+    @staticmethod
+    def quarantine(path: Path) -> Path:
+        # Segmento com frames corrompidos: mantido como .bad para inspeção (fora da drenagem).
+        # O número do segmento pode voltar a ser usado no slot: sufixo único por quarentena
+        bad = path.with_name(f"{path.stem}.{time.time_ns()}.bad")
+        path.with_suffix(".ckpt").unlink(missing_ok=True)
+        path.rename(bad)
+        _fsync_dir(path.parent)
+        return bad
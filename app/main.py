@@ -6,6 +6,8 @@ Main FastAPI application setup, middleware wiring, and route registration.
 Author: r0b3rT
 """
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, HTTPException
 from fastapi.exceptions import RequestValidationError
 
@@ -28,12 +30,38 @@ from slowapi.errors import RateLimitExceeded
 from slowapi import _rate_limit_exceeded_handler
 
 from app.core.rate_limit import limiter
+from app.services.ingest_coalescer import ingest_coalescer
+from app.services.spool_worker import spool_worker
+from app.services.shadow_validation import shadow_validator
+from app.services.cpu_stage import cpu_stage
+from app.infra.db.session import async_engine
 
 # Configura logging estruturado
 setup_logging(settings.LOG_LEVEL)
 
+# Ciclo de vida: recursos de background do pipeline de ingestão
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup: reprocessa segmentos do spool deixados pela execução anterior
+    if settings.INGEST_SPOOL_ENABLED:
+        spool_worker.start()
+    # Startup: worker da validação shadow (conjuntos candidatos)
+    if settings.SHADOW_VALIDATION_ENABLED:
+        shadow_validator.start()
+    yield
+    # Shutdown: processa eventos pendentes do micro-batching
+    ingest_coalescer.stop()
+    # Shutdown: drena o spool até o prazo (o restante é reprocessado no próximo start)
+    spool_worker.stop(settings.INGEST_SPOOL_DRAIN_TIMEOUT_S)
+    # Shutdown: grava os contadores de shadow acumulados
+    shadow_validator.stop()
+    # Shutdown: encerra os processos do estágio de CPU
+    cpu_stage.stop()
+    # Shutdown: fecha as conexões da engine async
+    await async_engine.dispose()
+
 # Instância principal da aplicação FastAPI
-app = FastAPI(title="Data Pipeline API")
+app = FastAPI(title="Data Pipeline API", lifespan=lifespan)
 
 # === Rate limit (SlowAPI) ===
 app.state.limiter = limiter
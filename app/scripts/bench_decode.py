@@ -0,0 +1,83 @@
+"""
+Decode benchmark for ingest encodings.
+
+Measures parse + IngestRequest validation cost per event for each body
+encoding accepted by the ingest routes (JSON, MessagePack, CBOR), using a
+batch of synthetic events similar to partner traffic.
+
+Usage:
+    python -m app.scripts.bench_decode
+    python -m app.scripts.bench_decode --events 1000 --rounds 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from typing import Callable
+
+from pydantic import TypeAdapter
+
+from app.api.encodings import cbor2, msgpack
+from app.api.schemas.ingest import IngestRequest
+
+_BATCH = TypeAdapter(list[IngestRequest])
+
+
+# Eventos sintéticos (chaves repetitivas, como no tráfego real)
+def _events(n: int) -> list[dict]:
+    return [
+        {
+            "source": "partner_a",
+            "external_id": f"evt-{i:09d}",
+            "schema_version": "v1",
+            "entity_id": f"order-{i % 5000}",
+            "event_type": "ORDER",
+            "event_status": "NEW",
+            "event_timestamp": "2026-02-10T12:00:00Z",
+            "attributes": {"amount": i * 1.5, "currency": "BRL", "channel": "web", "items": [1, 2, 3]},
+        }
+        for i in range(n)
+    ]
+
+
+def _bench(fn: Callable[[], object], rounds: int) -> float:
+    # Melhor rodada (menos ruído de GC/scheduler)
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run(n_events: int, rounds: int) -> None:
+    events = _events(n_events)
+    cases: dict[str, tuple[bytes, Callable[[bytes], object]]] = {}
+
+    body = json.dumps(events).encode("utf-8")
+    cases["json (json.loads + validate)"] = (body, lambda b: _BATCH.validate_python(json.loads(b)))
+    cases["json (validate_json)"] = (body, _BATCH.validate_json)
+
+    if msgpack is not None:
+        cases["msgpack"] = (
+            msgpack.packb(events),
+            lambda b: _BATCH.validate_python(msgpack.unpackb(b, raw=False, timestamp=3)),
+        )
+    if cbor2 is not None:
+        cases["cbor"] = (cbor2.dumps(events), lambda b: _BATCH.validate_python(cbor2.loads(b)))
+
+    print(f"events={n_events} rounds={rounds}")
+    print(f"{'encoding':<32}{'bytes':>12}{'us/event':>12}")
+    for name, (payload, decode) in cases.items():
+        elapsed = _bench(lambda: decode(payload), rounds)
+        print(f"{name:<32}{len(payload):>12}{elapsed / n_events * 1e6:>12.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parse + validate cost per ingest event")
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+    run(args.events, args.rounds)
@@ -0,0 +1,410 @@
+"""
+Bulk backfill loader.
+
+Loads historical events from NDJSON or CSV files (optionally .gz) into
+raw_ingestion / trusted_event / rejection using PostgreSQL COPY, applying
+the same validation rules (per source/schema_version) and dedup semantics as the ingest API:
+- one live RAW per (source, external_id); repeats are stored as DUPLICATE
+  (or counted in duplicate_tracker with INGEST_DUPLICATE_MODE=counter);
+- ACCEPTED events get a TRUSTED row, REJECTED ones get REJECTION rows.
+
+Each chunk is one transaction; a checkpoint file (<file>.ckpt) records the
+last committed line, so an interrupted run resumes where it stopped.
+
+CSV columns: source, external_id, schema_version, entity_id, event_type,
+event_status, event_timestamp, attributes (JSON object, optional).
+
+Usage:
+    docker compose exec api python -m app.scripts.bulk_load data/partner_a.ndjson.gz
+    python -m app.scripts.bulk_load events.csv --chunk-size 20000
+    python -m app.scripts.bulk_load events.ndjson --restart
+    python -m app.scripts.bulk_load events.ndjson --workers 8   # parse/hash/validação em 8 processos
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import gzip
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Iterator
+
+from psycopg import errors as pg_errors
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.api.schemas.ingest import IngestRequest
+from app.core.settings import settings
+from app.core.utils import new_request_id
+from app.infra.db.repositories.duplicate_repo import record_duplicates
+from app.infra.db.repositories.source_repo import create_source_if_missing
+from app.infra.db.session import SessionLocal
+from app.services.cpu_stage import CpuStage, to_prepared, to_request
+from app.services.ingest_service import (
+    Prepared,
+    _canonical,
+    _raw_row,
+    rejection_rows,
+    trusted_row,
+    counts_duplicates,
+    validate_many,
+)
+from app.services.seen_keys import seen_keys
+
+# Colunas gravadas via COPY (mesma ordem das tuplas montadas abaixo)
+RAW_COLUMNS = (
+    "id", "source_id", "external_id", "schema_version", "event_timestamp", "payload_raw",
+    "payload_hash", "processing_status", "error_count", "request_id", "client_ip", "user_agent",
+)
+TRUSTED_COLUMNS = (
+    "raw_ingestion_id", "source_id", "external_id", "entity_id", "event_type", "event_status", "event_timestamp",
+)
+REJECTION_COLUMNS = ("raw_ingestion_id", "category", "field", "rule", "message", "severity")
+
+USER_AGENT = "bulk_load"
+
+# Tentativas por chunk quando a API grava a mesma chave durante a carga
+MAX_CHUNK_ATTEMPTS = 3
+
+
+# === Leitura dos arquivos ===
+
+def _open_text(path: Path):
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8", newline="")
+
+
+def _detect_format(path: Path) -> str:
+    suffixes = [s for s in path.suffixes if s != ".gz"]
+    return "csv" if suffixes and suffixes[-1] == ".csv" else "ndjson"
+
+
+def iter_records(path: Path, fmt: str) -> Iterator[tuple[int, dict | None, str | None]]:
+    # (número da linha/registro, registro bruto, erro de parse)
+    with _open_text(path) as f:
+        if fmt == "csv":
+            for line_no, row in enumerate(csv.DictReader(f), start=1):
+                record = {k: v for k, v in row.items() if v not in (None, "")}
+                try:
+                    if "attributes" in record:
+                        record["attributes"] = json.loads(record["attributes"])
+                except json.JSONDecodeError:
+                    yield line_no, None, "invalid_attributes_json"
+                    continue
+                yield line_no, record, None
+            return
+
+        for line_no, line in _iter_ndjson(f):
+            try:
+                yield line_no, json.loads(line), None
+            except json.JSONDecodeError:
+                yield line_no, None, "invalid_json"
+
+
+def _iter_ndjson(f) -> Iterator[tuple[int, str]]:
+    # Linhas não vazias com o número da linha no arquivo
+    for line_no, line in enumerate(f, start=1):
+        line = line.strip()
+        if line:
+            yield line_no, line
+
+
+def iter_ndjson_lines(path: Path) -> Iterator[tuple[int, str]]:
+    # Linhas cruas (parse no estágio de CPU)
+    with _open_text(path) as f:
+        yield from _iter_ndjson(f)
+
+
+# === Checkpoint ===
+
+def _checkpoint_path(path: Path) -> Path:
+    return path.with_name(path.name + ".ckpt")
+
+
+def load_checkpoint(path: Path) -> dict | None:
+    ckpt = _checkpoint_path(path)
+    if not ckpt.exists():
+        return None
+    return json.loads(ckpt.read_text())
+
+
+def save_checkpoint(path: Path, state: dict) -> None:
+    # Escrita atômica: o checkpoint só avança depois do commit do chunk
+    ckpt = _checkpoint_path(path)
+    tmp = ckpt.with_name(ckpt.name + ".tmp")
+    tmp.write_text(json.dumps(state))
+    os.replace(tmp, ckpt)
+
+
+# === Carga ===
+
+def _live_keys(db: Session, keys: set[tuple[int, str]], prefilter: bool) -> dict[tuple[int, str], str]:
+    # Chaves (fonte, external_id) que já têm RAW vivo no banco → payload_hash
+    # Script: aquecimento inline do filtro (fora do caminho das requisições)
+    probable = seen_keys.probable_hits(db, keys, wait=True) if prefilter else keys
+    live = _query_live_keys(db, probable)
+    if prefilter:
+        seen_keys.record_false_positives(len(probable) - len(live))
+    return live
+
+
+def _query_live_keys(db: Session, keys: set[tuple[int, str]]) -> dict[tuple[int, str], str]:
+    if not keys:
+        return {}
+    source_ids, external_ids = zip(*keys)
+    rows = db.execute(
+        text(
+            "SELECT r.source_id, r.external_id, r.payload_hash FROM raw_ingestion r "
+            "JOIN unnest(CAST(:source_ids AS bigint[]), CAST(:external_ids AS text[])) AS k(source_id, external_id) "
+            "ON r.source_id = k.source_id AND r.external_id = k.external_id "
+            "WHERE r.processing_status <> 'DUPLICATE'"
+        ),
+        {"source_ids": list(source_ids), "external_ids": list(external_ids)},
+    )
+    return {(r.source_id, r.external_id): r.payload_hash for r in rows}
+
+
+def _copy(cursor, table: str, columns: tuple[str, ...], rows: list[tuple]) -> None:
+    if not rows:
+        return
+    with cursor.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+        for row in rows:
+            copy.write_row(row)
+
+
+def load_chunk(
+    db: Session,
+    reqs: list[IngestRequest],
+    source_ids: dict[str, int],
+    prefilter: bool = True,
+    prepared: list[Prepared] | None = None,
+) -> dict:
+    """
+    Writes one chunk of validated requests in the current transaction.
+
+    With `prefilter`, only keys the Bloom filter may have seen are looked
+    up in raw_ingestion. `prepared` (from the CPU stage) supplies canonical
+    payloads and validation errors. Returns per-status counters. The
+    caller commits.
+    """
+    for name in {r.source for r in reqs} - source_ids.keys():
+        source_ids[name] = create_source_if_missing(db, name).id
+
+    live = _live_keys(
+        db,
+        {(source_ids[r.source], r.external_id) for r in reqs},
+        prefilter and settings.INGEST_BLOOM_ENABLED,
+    )
+
+    counter_mode = counts_duplicates()
+    keep_changed = settings.INGEST_DUPLICATE_KEEP_CHANGED
+
+    # 1) Classificação (mesma regra da API)
+    to_write: list[tuple[IngestRequest, int, dict, list[dict]]] = []
+    hits: dict[int, dict[str, tuple[int, str]]] = {}
+    counts = {"accepted": 0, "rejected": 0, "duplicates": 0}
+
+    # Validação por coluna dos eventos ainda sem RAW vivo
+    pending = [i for i, r in enumerate(reqs) if (source_ids[r.source], r.external_id) not in live]
+    if prepared is not None:
+        validated = {i: prepared[i][1] for i in pending}
+    else:
+        validated = dict(zip(pending, validate_many(db, [(source_ids[reqs[i].source], reqs[i]) for i in pending])))
+
+    for i, req in enumerate(reqs):
+        source_id = source_ids[req.source]
+        key = (source_id, req.external_id)
+
+        if key in live:
+            status, errors = "DUPLICATE", []
+        else:
+            errors = validated[i]
+            status = "REJECTED" if errors else "ACCEPTED"
+
+        row = _raw_row(
+            source_id,
+            req,
+            prepared[i][0] if prepared is not None else _canonical(req),
+            status,
+            len(errors),
+            new_request_id(),
+            None,
+            USER_AGENT,
+        )
+
+        if status == "DUPLICATE":
+            counts["duplicates"] += 1
+            # Modo contador: só incrementa duplicate_tracker
+            if counter_mode and not (keep_changed and live[key] != row["payload_hash"]):
+                count, _ = hits.setdefault(source_id, {}).get(req.external_id, (0, ""))
+                hits[source_id][req.external_id] = (count + 1, row["request_id"])
+                continue
+        else:
+            live[key] = row["payload_hash"]
+            seen_keys.add(source_id, req.external_id)
+            counts["accepted" if status == "ACCEPTED" else "rejected"] += 1
+
+        to_write.append((req, source_id, row, errors))
+
+    # 2) IDs do RAW pré-alocados: TRUSTED/REJEIÇÃO referenciam o RAW no mesmo COPY
+    raw_ids = db.execute(
+        text("SELECT nextval('raw_ingestion_id_seq') FROM generate_series(1, :n)"),
+        {"n": len(to_write)},
+    ).scalars().all()
+
+    raw_rows: list[tuple] = []
+    trusted_rows: list[tuple] = []
+    rejections: list[tuple] = []
+    for raw_id, (req, source_id, row, errors) in zip(raw_ids, to_write):
+        raw_rows.append((raw_id, *(row[c] for c in RAW_COLUMNS[1:])))
+        if row["processing_status"] == "ACCEPTED":
+            trusted = trusted_row(raw_id, source_id, req)
+            trusted_rows.append(tuple(trusted[c] for c in TRUSTED_COLUMNS))
+        elif row["processing_status"] == "REJECTED":
+            rejections.extend(
+                tuple(r[c] for c in REJECTION_COLUMNS) for r in rejection_rows(raw_id, errors)
+            )
+
+    for source_id, source_hits in hits.items():
+        record_duplicates(db, source_id, source_hits)
+
+    # COPY na conexão psycopg da própria sessão (mesma transação)
+    cursor = db.connection().connection.driver_connection.cursor()
+    _copy(cursor, "raw_ingestion", RAW_COLUMNS, raw_rows)
+    _copy(cursor, "trusted_event", TRUSTED_COLUMNS, trusted_rows)
+    _copy(cursor, "rejection", REJECTION_COLUMNS, rejections)
+
+    return counts
+
+
+def load_file(
+    db: Session,
+    path: Path,
+    fmt: str | None = None,
+    chunk_size: int = 10000,
+    restart: bool = False,
+    out=sys.stderr,
+    stage: CpuStage | None = None,
+) -> dict:
+    fmt = fmt or _detect_format(path)
+
+    state = None if restart else load_checkpoint(path)
+    if state is None:
+        state = {"line": 0, "done": False, "totals": {"accepted": 0, "rejected": 0, "duplicates": 0, "invalid": 0}}
+    if state["done"]:
+        print(f"{path}: already loaded (checkpoint), use --restart to reload", file=out)
+        return state["totals"]
+
+    totals = state["totals"]
+    source_ids: dict[str, int] = {}
+
+    def flush(chunk: list[IngestRequest], last_line: int, prepared: list[Prepared] | None = None) -> None:
+        for attempt in range(1, MAX_CHUNK_ATTEMPTS + 1):
+            try:
+                # Nova tentativa sem o Bloom: a chave conflitante foi gravada por outro processo
+                counts = load_chunk(db, chunk, source_ids, prefilter=attempt == 1, prepared=prepared)
+                db.commit()
+                break
+            except (IntegrityError, pg_errors.UniqueViolation):
+                # A API gravou a mesma chave durante a carga: recalcula o chunk
+                db.rollback()
+                source_ids.clear()
+                if attempt == MAX_CHUNK_ATTEMPTS:
+                    raise
+        for k, v in counts.items():
+            totals[k] += v
+        state["line"] = last_line
+        save_checkpoint(path, state)
+        print(f"{path}: line {last_line} {totals}", file=out)
+
+    def flush_lines(lines: list[tuple[int, str]], last_line: int) -> None:
+        # Estágio de CPU: parse, canonicalização, hash e validação nos workers
+        chunk: list[IngestRequest] = []
+        prepared: list[Prepared] = []
+        for (line_no, _), result in zip(lines, stage.prepare([line for _, line in lines])):
+            if result[0] == "INVALID":
+                totals["invalid"] += 1
+                print(f"{path}:{line_no}: {result[1]['error']}", file=out)
+                continue
+            chunk.append(to_request(result[1]))
+            prepared.append(to_prepared(result))
+        flush(chunk, last_line, prepared)
+
+    last_line = state["line"]
+    if stage is not None and stage.enabled and fmt == "ndjson":
+        lines: list[tuple[int, str]] = []
+        for line_no, line in iter_ndjson_lines(path):
+            if line_no <= state["line"]:
+                continue
+            last_line = line_no
+            lines.append((line_no, line))
+            if len(lines) >= chunk_size:
+                flush_lines(lines, last_line)
+                lines = []
+        if lines:
+            flush_lines(lines, last_line)
+
+        state["line"] = last_line
+        state["done"] = True
+        save_checkpoint(path, state)
+        return totals
+
+    chunk: list[IngestRequest] = []
+    for line_no, record, error in iter_records(path, fmt):
+        if line_no <= state["line"]:
+            continue
+        last_line = line_no
+
+        if error is None:
+            try:
+                chunk.append(IngestRequest.model_validate(record))
+            except ValidationError:
+                error = "validation_error"
+        if error is not None:
+            totals["invalid"] += 1
+            print(f"{path}:{line_no}: {error}", file=out)
+
+        if len(chunk) >= chunk_size:
+            flush(chunk, last_line)
+            chunk = []
+
+    if chunk:
+        flush(chunk, last_line)
+
+    state["line"] = last_line
+    state["done"] = True
+    save_checkpoint(path, state)
+    return totals
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Bulk backfill of events via COPY")
+    parser.add_argument("paths", nargs="+", type=Path, help="NDJSON/CSV files (.gz allowed)")
+    parser.add_argument("--format", choices=["ndjson", "csv"], default=None, help="default: by file extension")
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--restart", action="store_true", help="ignore existing checkpoints")
+    parser.add_argument(
+        "--workers", type=int, default=settings.INGEST_CPU_WORKERS,
+        help="processes for parsing/hashing/validation of NDJSON (0 = in-process)",
+    )
+    args = parser.parse_args(argv)
+
+    stage = CpuStage(args.workers, settings.INGEST_CPU_CHUNK_SIZE)
+    db = SessionLocal()
+    try:
+        for path in args.paths:
+            totals = load_file(db, path, args.format, args.chunk_size, args.restart, stage=stage)
+            print(f"{path}: done {totals}")
+    finally:
+        db.close()
+        stage.stop()
+
+
+if __name__ == "__main__":
+    main()
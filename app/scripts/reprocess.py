@@ -0,0 +1,155 @@
+"""
+Bulk reprocessing of rejected raw events.
+
+Re-runs the current validation over REJECTED raw_ingestion rows after a
+rule fix (see app.services.reprocess_service): passing events are promoted
+to trusted_event and their rejections superseded.
+
+The eligible id span is split into ranges processed by a process pool;
+each worker streams its range through a server-side cursor, commits one
+chunk at a time and checkpoints the last committed id, so an interrupted
+run resumes where each range stopped. The plan (filters + ranges) is kept
+in the checkpoint directory; use --restart to discard it.
+
+Usage:
+    docker compose exec api python -m app.scripts.reprocess --source partner_a
+    python -m app.scripts.reprocess --rule ALLOWED_TYPES --from 2026-02-01T00:00:00Z --workers 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+
+from app.infra.db.repositories.source_repo import get_source_by_name
+from app.infra.db.session import SessionLocal, engine
+from app.scripts.bulk_load import load_checkpoint, save_checkpoint
+from app.services.reprocess_service import ReprocessFilter, rejected_id_bounds, reprocess
+
+# Faixas por worker (faixas menores equilibram a carga entre processos)
+RANGES_PER_WORKER = 4
+
+
+def split_ranges(lo: int, hi: int, parts: int) -> list[tuple[int, int]]:
+    # Faixas (início exclusivo, fim inclusivo) cobrindo [lo, hi]
+    parts = max(1, min(parts, hi - lo + 1))
+    step = -(-(hi - lo + 1) // parts)
+    return [(start - 1, min(start + step - 1, hi)) for start in range(lo, hi + 1, step)]
+
+
+def _init_worker() -> None:
+    # Conexões herdadas do processo pai não podem ser usadas após o fork
+    engine.dispose(close=False)
+
+
+def run_range(flt: ReprocessFilter, after_id: int, until_id: int, chunk_size: int, ckpt: Path) -> dict:
+    # Retoma do checkpoint da faixa (último id já commitado)
+    state = load_checkpoint(ckpt) or {"last_id": after_id, "done": False, "totals": {}}
+    if state["done"]:
+        return state["totals"]
+
+    read_db = SessionLocal()
+    db = SessionLocal()
+    try:
+        def commit(last_id: int, totals: dict) -> None:
+            db.commit()
+            save_checkpoint(ckpt, {"last_id": last_id, "done": False, "totals": _add(state["totals"], totals)})
+
+        result = reprocess(read_db, db, flt, state["last_id"], until_id, chunk_size, on_chunk=commit)
+    finally:
+        read_db.close()
+        db.close()
+
+    totals = _add(state["totals"], {k: v for k, v in result.items() if k not in ("last_id", "done")})
+    save_checkpoint(ckpt, {"last_id": until_id, "done": True, "totals": totals})
+    return totals
+
+
+def _add(a: dict, b: dict) -> dict:
+    return {k: a.get(k, 0) + b.get(k, 0) for k in {*a, *b}}
+
+
+def _plan(flt: ReprocessFilter, ckpt_dir: Path, parts: int) -> list[tuple[int, int]] | None:
+    # Plano persistido: retomadas usam as mesmas faixas (os limites mudam conforme as promoções)
+    plan_path = ckpt_dir / "plan"
+    key = {k: (v.isoformat() if isinstance(v, datetime) else v) for k, v in asdict(flt).items()}
+    plan = load_checkpoint(plan_path)
+    if plan is not None:
+        if plan["filter"] != key:
+            raise SystemExit(f"{ckpt_dir}: checkpoint belongs to other filters, use --restart")
+        return [tuple(r) for r in plan["ranges"]]
+
+    db = SessionLocal()
+    try:
+        bounds = rejected_id_bounds(db, flt)
+    finally:
+        db.close()
+    if bounds is None:
+        return None
+    ranges = split_ranges(*bounds, parts)
+    save_checkpoint(plan_path, {"filter": key, "ranges": ranges})
+    return ranges
+
+
+def _parse_dt(value: str | None) -> datetime | None:
+    return datetime.fromisoformat(value.replace("Z", "+00:00")) if value else None
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Reprocess REJECTED raw events with the current rules")
+    parser.add_argument("--source", default=None, help="source name")
+    parser.add_argument("--from", dest="date_from", default=None, help="received_at >= (ISO)")
+    parser.add_argument("--to", dest="date_to", default=None, help="received_at <= (ISO)")
+    parser.add_argument("--rule", default=None, help="only events with a current rejection for this rule")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--checkpoint-dir", type=Path, default=Path(".reprocess"))
+    parser.add_argument("--restart", action="store_true", help="discard existing checkpoints")
+    args = parser.parse_args(argv)
+
+    source_id = None
+    if args.source:
+        db = SessionLocal()
+        try:
+            src = get_source_by_name(db, args.source)
+        finally:
+            db.close()
+        if src is None:
+            raise SystemExit(f"unknown source: {args.source}")
+        source_id = int(src.id)
+
+    flt = ReprocessFilter(source_id, _parse_dt(args.date_from), _parse_dt(args.date_to), args.rule)
+
+    if args.restart and args.checkpoint_dir.exists():
+        shutil.rmtree(args.checkpoint_dir)
+    args.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+
+    ranges = _plan(flt, args.checkpoint_dir, args.workers * RANGES_PER_WORKER)
+    if not ranges:
+        print("nothing to reprocess")
+        return
+
+    totals: dict = {}
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker) as pool:
+        futures = {
+            pool.submit(
+                run_range, flt, lo, hi, args.chunk_size, args.checkpoint_dir / f"range-{lo + 1}-{hi}"
+            ): (lo, hi)
+            for lo, hi in ranges
+        }
+        for future in as_completed(futures):
+            lo, hi = futures[future]
+            result = future.result()
+            totals = _add(totals, result)
+            print(f"ids {lo + 1}-{hi}: {result}", file=sys.stderr)
+
+    print(f"done {totals}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Weighted fair admission for ingest calls.
+
+Caps the number of ingest transactions running at once (roughly the DB
+connections the ingest path may hold). While there is a free slot and
+nobody is waiting, calls go straight through; under saturation waiting
+calls are queued per source and slots are handed out by deficit round
+robin: each turn a source earns `quantum * weight` events of credit and is
+served while its next call (costing one credit per event) fits. A burst
+from one source only lengthens that source's queue.
+
+Weights come from source_system.ingest_weight. Calls that wait longer than
+the timeout give up (AdmissionTimeout); a cancelled async wait leaves
+the queue, or hands back the slot if it was granted meanwhile. Per-source queue depth and wait
+times are exposed by the `ingest_admission` collector. Async handlers use
+`slot_async`, which waits on the event loop instead of a thread.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Iterator
+
+from app.core import pipeline_metrics
+from app.core.signal import Signal
+from app.core.settings import settings
+
+
+class AdmissionTimeout(Exception):
+    """No slot was granted within the admission timeout."""
+
+
+# Chamada aguardando um slot
+@dataclass
+class _Waiter:
+    cost: int
+    granted: Signal = field(default_factory=Signal)
+
+
+class FairAdmission:
+    def __init__(self, capacity: int, quantum: int, timeout_seconds: float) -> None:
+        self.capacity = max(1, int(capacity))
+        self.quantum = max(1, int(quantum))
+        self.timeout_seconds = timeout_seconds
+
+        self._lock = threading.Lock()
+        self._in_use = 0
+        # Filas por fonte e rodada do DRR (fontes com chamadas aguardando)
+        self._queues: dict[str, deque[_Waiter]] = {}
+        self._active: deque[str] = deque()
+        self._deficit: dict[str, int] = {}
+        self._weights: dict[str, int] = {}
+        # A fonte no início da rodada já recebeu o quantum desta vez
+        self._credited = False
+
+        self._stats: dict[str, dict] = {}
+
+    @contextmanager
+    def slot(self, source: str, weight: int = 1, cost: int = 1) -> Iterator[None]:
+        # Uso: with fair_admission.slot(nome, peso, eventos): ...
+        self.acquire(source, weight, cost)
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def slot_async(self, source: str, weight: int = 1, cost: int = 1) -> AsyncIterator[None]:
+        # Variante para handlers async: espera sem ocupar uma thread
+        await self.acquire_async(source, weight, cost)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def acquire(self, source: str, weight: int = 1, cost: int = 1) -> None:
+        start = time.monotonic()
+        waiter = self._enqueue(source, weight, cost)
+        if waiter is None:
+            return
+        if not waiter.granted.wait(self.timeout_seconds):
+            self._give_up(source, waiter)
+        self._granted(source, start)
+
+    async def acquire_async(self, source: str, weight: int = 1, cost: int = 1) -> None:
+        start = time.monotonic()
+        waiter = self._enqueue(source, weight, cost)
+        if waiter is None:
+            return
+        try:
+            granted = await waiter.granted.wait_async(self.timeout_seconds)
+        except BaseException:
+            # Cancelada (cliente desconectou): não pode deixar waiter nem slot para trás
+            self._abandon(source, waiter)
+            raise
+        if not granted:
+            self._give_up(source, waiter)
+        self._granted(source, start)
+
+    def _enqueue(self, source: str, weight: int, cost: int) -> _Waiter | None:
+        with self._lock:
+            # Caminho rápido: slot livre e ninguém na fila
+            if self._in_use < self.capacity and not self._active:
+                self._in_use += 1
+                self._record(source, 0.0)
+                return None
+
+            waiter = _Waiter(cost=max(1, int(cost)))
+            queue = self._queues.get(source)
+            if queue is None:
+                queue = self._queues[source] = deque()
+                self._active.append(source)
+                self._deficit[source] = 0
+            self._weights[source] = max(1, int(weight or 1))
+            queue.append(waiter)
+            self._dispatch()
+            return waiter
+
+    def _give_up(self, source: str, waiter: _Waiter) -> None:
+        with self._lock:
+            # Pode ter sido liberado entre o timeout e o lock
+            if not waiter.granted.is_set():
+                self._withdraw(source, waiter)
+                self._stat(source)["timeouts"] += 1
+                pipeline_metrics.incr("ingest_admission_timeouts_total")
+                raise AdmissionTimeout(source)
+
+    def _abandon(self, source: str, waiter: _Waiter) -> None:
+        with self._lock:
+            if waiter.granted.is_set():
+                # Slot concedido que ninguém vai usar: devolve e atende o próximo
+                self._in_use -= 1
+                self._dispatch()
+            else:
+                self._withdraw(source, waiter)
+
+    def _granted(self, source: str, start: float) -> None:
+        with self._lock:
+            self._record(source, (time.monotonic() - start) * 1000)
+
+    def release(self) -> None:
+        with self._lock:
+            self._in_use -= 1
+            self._dispatch()
+
+    def _dispatch(self) -> None:
+        # Deficit round robin sobre as fontes com chamadas aguardando
+        while self._in_use < self.capacity and self._active:
+            source = self._active[0]
+            if not self._credited:
+                self._deficit[source] += self.quantum * self._weights[source]
+                self._credited = True
+
+            queue = self._queues[source]
+            head = queue[0]
+            if head.cost <= self._deficit[source]:
+                queue.popleft()
+                self._deficit[source] -= head.cost
+                self._in_use += 1
+                head.granted.set()
+                if not queue:
+                    self._deactivate(source)
+                continue
+
+            # Crédito insuficiente: passa a vez (o saldo fica para a próxima rodada)
+            self._active.rotate(-1)
+            self._credited = False
+
+    def _withdraw(self, source: str, waiter: _Waiter) -> None:
+        queue = self._queues.get(source)
+        if queue is None:
+            return
+        queue.remove(waiter)
+        if not queue:
+            self._deactivate(source)
+
+    def _deactivate(self, source: str) -> None:
+        # Fila vazia: a fonte sai da rodada e perde o saldo acumulado
+        if self._active and self._active[0] == source:
+            self._credited = False
+        self._active.remove(source)
+        del self._queues[source]
+        del self._deficit[source]
+
+    def _stat(self, source: str) -> dict:
+        return self._stats.setdefault(
+            source, {"admitted": 0, "timeouts": 0, "waited": 0, "wait_ms_total": 0.0, "wait_ms_max": 0.0}
+        )
+
+    def _record(self, source: str, wait_ms: float) -> None:
+        stat = self._stat(source)
+        stat["admitted"] += 1
+        if wait_ms > 0:
+            stat["waited"] += 1
+            stat["wait_ms_total"] += wait_ms
+            stat["wait_ms_max"] = max(stat["wait_ms_max"], wait_ms)
+        pipeline_metrics.observe("ingest_admission_wait_ms", wait_ms)
+        pipeline_metrics.set_gauge("ingest_admission_in_use", self._in_use)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            sources = {}
+            for name, stat in self._stats.items():
+                waited = stat["waited"]
+                sources[name] = {
+                    "queued": len(self._queues.get(name, ())),
+                    "admitted": stat["admitted"],
+                    "timeouts": stat["timeouts"],
+                    "wait_ms_avg": round(stat["wait_ms_total"] / waited, 3) if waited else 0.0,
+                    "wait_ms_max": round(stat["wait_ms_max"], 3),
+                }
+            return {"capacity": self.capacity, "in_use": self._in_use, "sources": sources}
+
+
+fair_admission = FairAdmission(
+    capacity=settings.INGEST_ADMISSION_CONCURRENCY,
+    quantum=settings.INGEST_ADMISSION_QUANTUM,
+    timeout_seconds=settings.INGEST_ADMISSION_TIMEOUT_SECONDS,
+)
+pipeline_metrics.register_collector("ingest_admission", fair_admission.stats)
@@ -0,0 +1,189 @@
+"""
+Optional multi-process CPU stage for the stream and bulk ingest paths.
+
+Parsing (IngestRequest), canonicalization, payload_hash and validation
+are CPU-bound and, in threads, share one GIL. With INGEST_CPU_WORKERS > 0,
+chunks of raw NDJSON lines are handed to a process pool; workers return
+compact per-line results (event fields, canonical payload + hash and
+rejection tuples) to the process that does the DB writes, which no longer
+re-parses, re-hashes or re-validates them.
+
+Workers validate through their own copies of the rule/schema/reference
+registries. Those load on a cache miss through an engine without a pool,
+so a worker holds no DB connection between refreshes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Sequence
+
+from pydantic import ValidationError
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.api.schemas.ingest import IngestRequest
+from app.core import pipeline_metrics
+from app.core.settings import settings
+from app.infra.db.repositories.source_repo import source_registry
+from app.infra.db.session import DATABASE_URL, SessionLocal
+from app.services.ingest_service import Prepared, _canonical, validate_many
+
+# Campos do evento / da rejeição na ordem das tuplas devolvidas pelos workers
+EVENT_FIELDS = tuple(IngestRequest.model_fields)
+ERROR_FIELDS = ("category", "field", "rule", "message", "severity")
+
+# Sessões do worker (definidas no initializer; no próprio processo usa o pool padrão)
+_session_factory: Callable[[], Session] | None = None
+
+
+def _init_worker() -> None:
+    global _session_factory
+    # Conexões só durante a carga/refresh dos caches (sem pool no worker)
+    _session_factory = sessionmaker(bind=create_engine(DATABASE_URL, poolclass=NullPool), autoflush=False)
+
+
+def validation_error_detail(e: ValidationError) -> dict:
+    # Erro de uma linha no formato do /ingest/stream
+    if any(err["type"] == "json_invalid" for err in e.errors()):
+        return {"error": "invalid_json"}
+    return {
+        "error": "validation_error",
+        "detail": [
+            {"loc": list(err["loc"]), "msg": err["msg"], "type": err["type"]}
+            for err in e.errors()
+        ],
+    }
+
+
+def prepare_lines(lines: Sequence[bytes | str], source_id: int | None = None, source: str | None = None) -> list:
+    """
+    Worker task: parses, canonicalizes, hashes and validates NDJSON lines.
+
+    With `source` (stream), lines of another source are refused and
+    `source_id` scopes the validation; without it (bulk) each line's source
+    is resolved by name, unknown sources getting the global rules.
+    Returns per line ("OK", fields, payload_raw, payload_hash, errors) or
+    ("INVALID", error); fields follow EVENT_FIELDS, errors are tuples in
+    ERROR_FIELDS order.
+    """
+    out: list = [None] * len(lines)
+    parsed: list[tuple[int, IngestRequest]] = []
+    for i, line in enumerate(lines):
+        try:
+            req = IngestRequest.model_validate_json(line)
+        except ValidationError as e:
+            out[i] = ("INVALID", validation_error_detail(e))
+            continue
+        if source is not None and req.source != source:
+            out[i] = ("INVALID", {"error": "source_mismatch"})
+            continue
+        parsed.append((i, req))
+
+    if not parsed:
+        return out
+
+    db = (_session_factory or SessionLocal)()
+    try:
+        def scope(req: IngestRequest) -> int:
+            if source_id is not None:
+                return source_id
+            src = source_registry.resolve(db, req.source)
+            return src.id if src else 0
+
+        results = validate_many(db, [(scope(req), req) for _, req in parsed])
+    finally:
+        db.close()
+
+    for (i, req), errors in zip(parsed, results):
+        payload_raw, payload_hash = _canonical(req)
+        out[i] = (
+            "OK",
+            tuple(getattr(req, f) for f in EVENT_FIELDS),
+            payload_raw,
+            payload_hash,
+            [tuple(e.get(k) for k in ERROR_FIELDS) for e in errors],
+        )
+    return out
+
+
+def to_request(fields: tuple) -> IngestRequest:
+    # Campos já validados no worker: monta o modelo sem validar de novo
+    return IngestRequest.model_construct(**dict(zip(EVENT_FIELDS, fields)))
+
+
+def to_prepared(result: tuple) -> Prepared:
+    _, _, payload_raw, payload_hash, errors = result
+    return (payload_raw, payload_hash), [dict(zip(ERROR_FIELDS, e)) for e in errors]
+
+
+class CpuStage:
+    def __init__(self, workers: int, chunk_size: int) -> None:
+        self.workers = max(0, int(workers))
+        self.chunk_size = max(1, int(chunk_size))
+        self._pool: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # Pool criado no primeiro uso; "spawn" evita fork de um processo com threads
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+            return self._pool
+
+    def submit(
+        self,
+        lines: Sequence[bytes | str],
+        source_id: int | None = None,
+        source: str | None = None,
+    ) -> list[Future]:
+        # Um task por fatia de chunk_size linhas (fatias em paralelo nos workers)
+        pool = self._get_pool()
+        pipeline_metrics.incr("cpu_stage_lines_total", len(lines))
+        return [
+            pool.submit(prepare_lines, list(lines[i:i + self.chunk_size]), source_id, source)
+            for i in range(0, len(lines), self.chunk_size)
+        ]
+
+    def prepare(self, lines: Sequence[bytes | str], source_id: int | None = None, source: str | None = None) -> list:
+        start = time.perf_counter()
+        results = [r for f in self.submit(lines, source_id, source) for r in f.result()]
+        pipeline_metrics.observe("cpu_stage_chunk_ms", (time.perf_counter() - start) * 1000)
+        return results
+
+    async def prepare_async(
+        self,
+        lines: Sequence[bytes | str],
+        source_id: int | None = None,
+        source: str | None = None,
+    ) -> list:
+        # Aguarda os workers sem ocupar uma thread do threadpool
+        start = time.perf_counter()
+        parts = await asyncio.gather(*(asyncio.wrap_future(f) for f in self.submit(lines, source_id, source)))
+        pipeline_metrics.observe("cpu_stage_chunk_ms", (time.perf_counter() - start) * 1000)
+        return [r for part in parts for r in part]
+
+    def stop(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+cpu_stage = CpuStage(
+    workers=settings.INGEST_CPU_WORKERS,
+    chunk_size=settings.INGEST_CPU_CHUNK_SIZE,
+)
@@ -0,0 +1,271 @@
+"""
+Idempotency-Key handling for ingest calls.
+
+The first call with a given source + key claims a row in idempotency_key,
+runs the request and stores its response; retries get the stored response
+without running the ingest path again. An in-process LRU (TTLCache) sits in
+front of the table.
+
+Concurrent calls with a key that is still running wait for the first
+result: in the same process on a Signal (a thread or the event loop), across processes by polling the
+row until the owner stores its response (or abandons it after
+IDEMPOTENCY_LOCK_SECONDS). Reusing a key with a different request is a
+conflict, never a replay.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import threading
+import time
+from typing import Awaitable, Callable
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core import pipeline_metrics
+from app.core.cache import TTLCache
+from app.core.settings import settings
+from app.core.signal import Signal
+from app.core.utils import canonical_json
+from app.infra.db.repositories.idempotency_repo import (
+    claim_idempotency_key,
+    get_idempotency_key,
+    purge_expired_idempotency_keys,
+    release_idempotency_key,
+    store_idempotency_response,
+)
+
+# Intervalo entre consultas enquanto outro processo executa a mesma chave
+_POLL_SECONDS = 0.05
+
+# Tamanho máximo da chave (coluna idempotency_key.key)
+MAX_KEY_LENGTH = 200
+
+
+class IdempotencyError(Exception):
+    """Key cannot be used for this call (`reason` is the API error code)."""
+
+    def __init__(self, reason: str) -> None:
+        super().__init__(reason)
+        self.reason = reason
+
+
+def request_fingerprint(route: str, payloads: list[dict]) -> str:
+    # Rota + payloads canônicos: a mesma chave só vale para a mesma requisição
+    digest = hashlib.sha256(route.encode("utf-8"))
+    for payload in payloads:
+        digest.update(b"\n")
+        digest.update(canonical_json(payload))
+    return digest.hexdigest()
+
+
+class IdempotencyStore:
+    def __init__(
+        self,
+        max_entries: int,
+        cache_ttl_seconds: float,
+        ttl_seconds: float,
+        wait_seconds: float,
+        lock_seconds: float,
+    ) -> None:
+        # (source_id, key) → (request_hash, status_code, response)
+        self.cache = TTLCache(max_entries=max_entries, ttl_seconds=min(cache_ttl_seconds, ttl_seconds))
+        self.ttl_seconds = ttl_seconds
+        self.wait_seconds = wait_seconds
+        self.lock_seconds = lock_seconds
+
+        self._lock = threading.Lock()
+        self._inflight: dict[tuple[int, str], Signal] = {}
+        self._next_purge = 0.0
+
+    def run(
+        self,
+        db: Session,
+        source_id: int,
+        key: str,
+        fingerprint: str,
+        fn: Callable[[], dict],
+        status_code: int = 200,
+    ) -> tuple[int, dict, bool]:
+        """
+        Runs `fn` once per (source_id, key) and returns (status_code,
+        response, replayed). Raises IdempotencyError for invalid or reused
+        keys and when the first call does not finish in time.
+        """
+        cache_key = self._check_key(source_id, key)
+        deadline = time.monotonic() + self.wait_seconds
+        while True:
+            stored = self.cache.get(cache_key)
+            if stored is not None:
+                return self._replay(stored, fingerprint)
+
+            running, done = self._own(cache_key)
+            if running is not None:
+                pipeline_metrics.incr("idempotency_waits_total")
+                if not running.wait(max(0.0, deadline - time.monotonic())):
+                    raise IdempotencyError("idempotency_key_in_progress")
+                continue
+
+            try:
+                while True:
+                    claimed, stored = self._claim(db, source_id, key, fingerprint, deadline)
+                    if claimed or stored is not None:
+                        break
+                    time.sleep(_POLL_SECONDS)
+                if stored is not None:
+                    return self._replay(stored, fingerprint)
+
+                try:
+                    response = fn()
+                except BaseException:
+                    self._release(db, source_id, key)
+                    raise
+                return self._store(db, source_id, key, fingerprint, status_code, response)
+            finally:
+                self._disown(cache_key, done)
+
+    async def run_async(
+        self,
+        db: AsyncSession,
+        source_id: int,
+        key: str,
+        fingerprint: str,
+        fn: Callable[[], Awaitable[dict]],
+        status_code: int = 200,
+    ) -> tuple[int, dict, bool]:
+        """
+        Same contract as `run` for async handlers: waits and polls on the
+        event loop, and the repository calls go through `db.run_sync`.
+        """
+        cache_key = self._check_key(source_id, key)
+        deadline = time.monotonic() + self.wait_seconds
+        while True:
+            stored = self.cache.get(cache_key)
+            if stored is not None:
+                return self._replay(stored, fingerprint)
+
+            running, done = self._own(cache_key)
+            if running is not None:
+                pipeline_metrics.incr("idempotency_waits_total")
+                if not await running.wait_async(max(0.0, deadline - time.monotonic())):
+                    raise IdempotencyError("idempotency_key_in_progress")
+                continue
+
+            try:
+                while True:
+                    claimed, stored = await db.run_sync(self._claim, source_id, key, fingerprint, deadline)
+                    if claimed or stored is not None:
+                        break
+                    await asyncio.sleep(_POLL_SECONDS)
+                if stored is not None:
+                    return self._replay(stored, fingerprint)
+
+                try:
+                    response = await fn()
+                except BaseException:
+                    await db.run_sync(self._release, source_id, key)
+                    raise
+                return await db.run_sync(self._store, source_id, key, fingerprint, status_code, response)
+            finally:
+                self._disown(cache_key, done)
+
+    def _check_key(self, source_id: int, key: str) -> tuple[int, str]:
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise IdempotencyError("invalid_idempotency_key")
+        return source_id, key
+
+    def _own(self, cache_key: tuple[int, str]) -> tuple[Signal | None, Signal | None]:
+        # Uma execução por chave neste processo; as demais aguardam o resultado
+        with self._lock:
+            running = self._inflight.get(cache_key)
+            if running is not None:
+                return running, None
+            done = self._inflight[cache_key] = Signal()
+            return None, done
+
+    def _disown(self, cache_key: tuple[int, str], done: Signal) -> None:
+        with self._lock:
+            self._inflight.pop(cache_key, None)
+        done.set()
+
+    def _claim(
+        self,
+        db: Session,
+        source_id: int,
+        key: str,
+        fingerprint: str,
+        deadline: float,
+    ) -> tuple[bool, tuple[str, int, dict] | None]:
+        # (True, None) = chave reservada; (False, resposta) = já gravada; (False, None) = aguardar
+        row = get_idempotency_key(db, source_id, key)
+        if row is not None and row.response is not None:
+            stored = (row.request_hash, row.status_code, row.response)
+            self.cache.set((source_id, key), stored)
+            return False, stored
+
+        claimed = claim_idempotency_key(db, source_id, key, fingerprint, self.ttl_seconds, self.lock_seconds)
+        db.commit()
+        if claimed:
+            return True, None
+
+        # Outro processo está executando a chave: aguarda a resposta gravada
+        if row is not None and row.request_hash != fingerprint:
+            raise IdempotencyError("idempotency_key_reused")
+        if time.monotonic() >= deadline:
+            raise IdempotencyError("idempotency_key_in_progress")
+        return False, None
+
+    def _store(
+        self,
+        db: Session,
+        source_id: int,
+        key: str,
+        fingerprint: str,
+        status_code: int,
+        response: dict,
+    ) -> tuple[int, dict, bool]:
+        store_idempotency_response(db, source_id, key, status_code, response)
+        self._purge_expired(db)
+        db.commit()
+        self.cache.set((source_id, key), (fingerprint, status_code, response))
+        pipeline_metrics.incr("idempotency_stored_total")
+        return status_code, response, False
+
+    def _replay(self, stored: tuple[str, int, dict], fingerprint: str) -> tuple[int, dict, bool]:
+        request_hash, status_code, response = stored
+        if request_hash != fingerprint:
+            raise IdempotencyError("idempotency_key_reused")
+        pipeline_metrics.incr("idempotency_replays_total")
+        return status_code, response, True
+
+    def _release(self, db: Session, source_id: int, key: str) -> None:
+        # Falha na primeira chamada: a chave volta a ficar livre para o retry
+        try:
+            release_idempotency_key(db, source_id, key)
+            db.commit()
+        except SQLAlchemyError:
+            db.rollback()
+
+    def _purge_expired(self, db: Session) -> None:
+        # Limpeza oportunista de linhas expiradas (no máximo uma vez por minuto por processo)
+        now = time.monotonic()
+        if now < self._next_purge:
+            return
+        self._next_purge = now + 60
+        purge_expired_idempotency_keys(db)
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+
+idempotency_store = IdempotencyStore(
+    max_entries=settings.IDEMPOTENCY_CACHE_MAX_ENTRIES,
+    cache_ttl_seconds=settings.IDEMPOTENCY_CACHE_TTL_SECONDS,
+    ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS,
+    wait_seconds=settings.IDEMPOTENCY_WAIT_SECONDS,
+    lock_seconds=settings.IDEMPOTENCY_LOCK_SECONDS,
+)
+pipeline_metrics.register_collector("idempotency_cache", idempotency_store.cache.stats)
@@ -0,0 +1,190 @@
+"""
+Synchronous micro-batching for single-event ingestion.
+
+Concurrent POST /api/v1/ingest calls are queued and flushed by one
+background thread: events arriving within a short window (or up to a
+maximum batch size) share a single DB transaction, so commit/fsync cost is
+amortized across requests. Each caller blocks until its own batch commits
+and receives its own ACCEPTED/REJECTED/DUPLICATE result (async handlers
+await it via `submit_async` instead of blocking a thread).
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+from sqlalchemy.orm import Session
+
+from app.api.schemas.ingest import IngestRequest
+from app.core import pipeline_metrics
+from app.core.signal import Signal
+from app.core.settings import settings
+from app.infra.db.session import SessionLocal
+from app.services.ingest_service import ingest_one
+
+logger = logging.getLogger("app.ingest.coalescer")
+
+# Sentinela para encerrar a thread de flush
+_STOP = object()
+
+
+# Um evento aguardando o flush do lote
+@dataclass
+class _Pending:
+    req: IngestRequest
+    client_ip: str | None
+    user_agent: str | None
+    done: Signal = field(default_factory=Signal)
+    result: dict | None = None
+    error: BaseException | None = None
+
+
+class IngestCoalescer:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        window_ms: float,
+        max_batch: int,
+    ) -> None:
+        self._session_factory = session_factory
+        self._window = window_ms / 1000.0
+        self._max_batch = max(1, int(max_batch))
+
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        # Sobe a thread de flush sob demanda (uma por processo)
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name="ingest-coalescer",
+                    daemon=True,
+                )
+                self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        # Drena o que está na fila e encerra a thread (shutdown)
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def submit(
+        self,
+        req: IngestRequest,
+        client_ip: str | None,
+        user_agent: str | None,
+    ) -> dict:
+        # Enfileira o evento e bloqueia até o commit do lote
+        pending = self._enqueue(req, client_ip, user_agent)
+        pending.done.wait()
+        return self._outcome(pending)
+
+    async def submit_async(
+        self,
+        req: IngestRequest,
+        client_ip: str | None,
+        user_agent: str | None,
+    ) -> dict:
+        # Mesmo fluxo para handlers async: aguarda o commit sem ocupar uma thread
+        pending = self._enqueue(req, client_ip, user_agent)
+        await pending.done.wait_async()
+        return self._outcome(pending)
+
+    def _enqueue(self, req: IngestRequest, client_ip: str | None, user_agent: str | None) -> _Pending:
+        self.start()
+        pending = _Pending(req=req, client_ip=client_ip, user_agent=user_agent)
+        self._queue.put(pending)
+
+        depth = self._queue.qsize()
+        pipeline_metrics.set_gauge("ingest_coalesce_queue_depth", depth)
+        pipeline_metrics.observe("ingest_coalesce_queue_depth", depth)
+        return pending
+
+    @staticmethod
+    def _outcome(pending: _Pending) -> dict:
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+
+            # Junta eventos até fechar a janela ou atingir o tamanho máximo
+            batch = [first]
+            deadline = time.monotonic() + self._window
+            while len(batch) < self._max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._flush(batch)
+
+        # Shutdown: processa o que sobrou na fila antes de sair
+        leftovers = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                leftovers.append(item)
+        for i in range(0, len(leftovers), self._max_batch):
+            self._flush(leftovers[i:i + self._max_batch])
+
+    def _flush(self, batch: list[_Pending]) -> None:
+        pipeline_metrics.observe("ingest_coalesce_batch_size", len(batch))
+        pipeline_metrics.set_gauge("ingest_coalesce_queue_depth", self._queue.qsize())
+
+        db = self._session_factory()
+        try:
+            # SAVEPOINT por evento: a falha de um não derruba os demais
+            for p in batch:
+                try:
+                    with db.begin_nested():
+                        p.result = ingest_one(db, p.req, p.client_ip, p.user_agent)
+                except Exception as e:
+                    p.error = e
+
+            # Um único commit para o lote inteiro
+            db.commit()
+        except Exception as e:
+            logger.exception("coalesced ingest batch failed")
+            db.rollback()
+            for p in batch:
+                if p.error is None:
+                    p.result = None
+                    p.error = e
+        finally:
+            db.close()
+            for p in batch:
+                p.done.set()
+
+
+ingest_coalescer = IngestCoalescer(
+    session_factory=SessionLocal,
+    window_ms=settings.INGEST_COALESCE_WINDOW_MS,
+    max_batch=settings.INGEST_COALESCE_MAX_BATCH,
+)
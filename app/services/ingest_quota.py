@@ -0,0 +1,106 @@
+"""
+Per-source ingest quotas.
+
+Token bucket per source, configured on source_system
+(quota_rate_per_second / quota_burst, NULL rate = unlimited) and kept in
+Postgres (source_quota_bucket) so every uvicorn worker draws from the same
+bucket. Each admitted call costs one token per event; a denied call gets
+the number of seconds until enough tokens are refilled (Retry-After). A
+call costing more than the burst is refused outright: it could never be
+admitted, and capping its cost would let large batches bypass the rate.
+
+The bucket update is committed right away, before any ingest work, so
+the row lock is never held for the duration of an ingest transaction.
+"""
+
+from __future__ import annotations
+
+import math
+from threading import Lock
+
+from sqlalchemy.orm import Session
+
+from app.core import pipeline_metrics
+from app.core.settings import settings
+from app.infra.db.repositories.quota_repo import take_tokens
+from app.infra.db.repositories.source_repo import CachedSource
+
+
+def _limits(src: CachedSource) -> tuple[float, int] | None:
+    # (taxa, rajada) da fonte; None quando a cota não se aplica
+    rate = src.quota_rate_per_second
+    if not settings.INGEST_QUOTA_ENABLED or not rate or rate <= 0:
+        return None
+    # Rajada padrão: 1 segundo de cota
+    return rate, int(src.quota_burst or max(1, math.ceil(rate)))
+
+
+class QuotaCostExceedsBurst(Exception):
+    """The call costs more tokens than the source's bucket can ever hold."""
+
+    def __init__(self, cost: int, burst: int) -> None:
+        super().__init__(f"cost {cost} exceeds quota burst {burst}")
+        self.cost = cost
+        self.burst = burst
+
+
+class IngestQuota:
+    def __init__(self) -> None:
+        self._lock = Lock()
+        # Uso por fonte neste processo: admitidos, recusados e último saldo visto
+        self._usage: dict[str, dict] = {}
+
+    def max_cost(self, src: CachedSource) -> int | None:
+        """Largest cost a single call can be admitted with (None = no quota)."""
+        limits = _limits(src)
+        return None if limits is None else limits[1]
+
+    def acquire(self, db: Session, src: CachedSource, cost: int = 1) -> int | None:
+        """
+        Takes `cost` tokens from the source's bucket. Returns None when
+        admitted, or the Retry-After (seconds) when over quota. A call that
+        costs more than the burst can never be admitted and raises
+        QuotaCostExceedsBurst; cost 0 only checks that quotas apply.
+        """
+        limits = _limits(src)
+        if limits is None or cost <= 0:
+            return None
+        rate, burst = limits
+
+        # Lote maior que a rajada nunca caberia no bucket: recusa sem consumir
+        if cost > burst:
+            self._record(src, False, cost, None, burst)
+            raise QuotaCostExceedsBurst(cost, burst)
+
+        allowed, tokens = take_tokens(db, src.id, rate, burst, cost)
+        db.commit()
+
+        retry_after = None if allowed else max(1, math.ceil((cost - tokens) / rate))
+        self._record(src, allowed, cost, tokens, burst)
+        return retry_after
+
+    def _record(self, src: CachedSource, allowed: bool, cost: float, tokens: float | None, burst: float) -> None:
+        pipeline_metrics.incr("ingest_quota_admitted_total" if allowed else "ingest_quota_throttled_total")
+        with self._lock:
+            usage = self._usage.setdefault(src.name, {"admitted": 0, "throttled": 0, "tokens_used": 0})
+            if allowed:
+                usage["admitted"] += 1
+                usage["tokens_used"] += cost
+            else:
+                usage["throttled"] += 1
+            if tokens is not None:
+                usage["tokens_left"] = round(tokens, 3)
+            usage["rate_per_second"] = src.quota_rate_per_second
+            usage["burst"] = burst
+
+    def clear(self) -> None:
+        with self._lock:
+            self._usage.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {name: dict(usage) for name, usage in self._usage.items()}
+
+
+ingest_quota = IngestQuota()
+pipeline_metrics.register_collector("ingest_quota", ingest_quota.stats)
@@ -1,125 +1,531 @@
-import json
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 
 from app.api.schemas.ingest import IngestRequest
-from app.core.utils import new_request_id, payload_hash
-from app.domain.validation import validate_event
-
-from app.infra.db.models.raw_ingestion import RawIngestion
-from app.infra.db.models.trusted_event import TrustedEvent
-from app.infra.db.models.rejection import Rejection
+from app.core import pipeline_metrics
+from app.core.cache import TTLCache
+from app.core.settings import settings
+from app.core.utils import canonical_payload, new_request_id
 
 from app.infra.db.repositories.source_repo import create_source_if_missing
-from app.infra.db.repositories.raw_repo import find_raw_by_source_external, insert_raw
-from app.infra.db.repositories.trusted_repo import insert_trusted
+from app.infra.db.repositories.rule_repo import rule_registry
+from app.infra.db.repositories.schema_repo import schema_registry
+from app.infra.db.repositories.duplicate_repo import record_duplicates
+from app.infra.db.repositories.raw_repo import (
+    find_live_raws_by_external,
+    find_live_raws_by_hash,
+    get_raw_states,
+    insert_raw,
+    insert_raw_if_new,
+    insert_raw_many,
+    insert_raw_many_if_new,
+)
+from app.infra.db.repositories.trusted_repo import insert_trusted, insert_trusted_many
 from app.infra.db.repositories.rejection_repo import insert_rejections
+from app.services.seen_keys import seen_keys
+from app.services.shadow_validation import shadow_validator
 
 
-def ingest_event(
+# Resultados recentes por (fonte, hash do payload): um reenvio byte a byte
+# idêntico devolve o resultado original sem validar nem gravar de novo
+recent_outcomes = TTLCache(
+    max_entries=settings.INGEST_HASH_CACHE_SIZE,
+    ttl_seconds=settings.INGEST_HASH_CACHE_TTL_SECONDS,
+)
+pipeline_metrics.register_collector("ingest_hash_cache", recent_outcomes.stats)
+
+# Evento já preparado fora do caminho da requisição (estágio de CPU):
+# (payload canônico, hash) e erros de validação
+Prepared = tuple[tuple[str, str], list[dict]]
+
+# Resultados aguardando o commit da sessão para entrar no cache
+_PENDING_OUTCOMES = "ingest_pending_outcomes"
+
+
+def _remember_outcome(db: Session, source_id: int, digest: str, outcome: dict) -> None:
+    # Só entra no cache depois do commit (a transação ainda pode sofrer rollback)
+    if settings.INGEST_HASH_REPLAY_ENABLED:
+        db.info.setdefault(_PENDING_OUTCOMES, []).append(((source_id, digest), outcome))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_outcomes(session: Session) -> None:
+    for key, outcome in session.info.pop(_PENDING_OUTCOMES, []):
+        recent_outcomes.set(key, outcome)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_outcomes(session: Session) -> None:
+    session.info.pop(_PENDING_OUTCOMES, None)
+
+
+def _cached_outcomes(db: Session, source_id: int, digests: list[str]) -> dict[str, dict]:
+    """
+    Recent outcomes of a source by payload hash.
+
+    REJECTED outcomes can be superseded by reprocessing, which may run in
+    another process (app.scripts.reprocess) and only clears its own cache:
+    they are checked against the RAW row (one PK lookup for the call) and
+    dropped when its status or error count changed. ACCEPTED outcomes never
+    change, so they are replayed without a query.
+    """
+    found = {}
+    for digest in digests:
+        cached = recent_outcomes.get((source_id, digest))
+        if cached is not None:
+            found[digest] = cached
+
+    rejected = [o["raw_id"] for o in found.values() if o["status"] == "REJECTED"]
+    if rejected:
+        states = get_raw_states(db, rejected)
+        for digest, outcome in list(found.items()):
+            if outcome["status"] != "REJECTED":
+                continue
+            if states.get(outcome["raw_id"]) != ("REJECTED", outcome["error_count"]):
+                recent_outcomes.pop((source_id, digest))
+                del found[digest]
+                pipeline_metrics.incr("ingest_hash_replay_stale_total")
+    return found
+
+
+def _replay(outcome: dict, origin: str) -> dict:
+    # Resultado original do evento, marcado como reenvio
+    pipeline_metrics.incr(f"ingest_hash_replay_{origin}_total")
+    return {**outcome, "replayed": True}
+
+
+def _canonical(req: IngestRequest) -> tuple[str, str]:
+    # Payload normalizado → (texto canônico, hash)
+    return canonical_payload(req.model_dump(mode="json"))
+
+
+def _raw_row(
+    source_id: int,
+    req: IngestRequest,
+    payload: tuple[str, str],
+    status: str,
+    error_count: int,
+    request_id: str,
+    client_ip: str | None,
+    user_agent: str | None,
+) -> dict:
+    # Linha RAW já com o status final (sem UPDATE depois do INSERT)
+    # payload_raw e payload_hash saem da mesma serialização canônica
+    payload_raw, payload_digest = payload
+    return {
+        "source_id": source_id,
+        "external_id": req.external_id,
+        "schema_version": req.schema_version,
+        "event_timestamp": req.event_timestamp,
+        "payload_raw": payload_raw,
+        "payload_hash": payload_digest,
+        "processing_status": status,
+        "error_count": error_count,
+        "request_id": request_id,
+        "client_ip": client_ip,
+        "user_agent": user_agent,
+    }
+
+
+def trusted_row(raw_id: int, source_id: int, req: IngestRequest) -> dict:
+    return {
+        "raw_ingestion_id": raw_id,
+        "source_id": source_id,
+        "external_id": req.external_id,
+        "entity_id": req.entity_id,
+        "event_type": req.event_type,
+        "event_status": req.event_status,
+        "event_timestamp": req.event_timestamp,
+    }
+
+
+def rejection_rows(raw_id: int, errors: list[dict]) -> list[dict]:
+    # Converte erros de validação em linhas de rejeição
+    return [
+        {
+            "raw_ingestion_id": raw_id,
+            "category": e["category"],
+            "field": e.get("field"),
+            "rule": e.get("rule"),
+            "message": e["message"],
+            "severity": e.get("severity", "MEDIUM"),
+        }
+        for e in errors
+    ]
+
+
+def validate_many(db: Session, items: list[tuple[int, IngestRequest]]) -> list[list[dict]]:
+    """
+    Validates (source_id, request) pairs against the attribute schema
+    (SCHEMA errors) and the rule set of each source/schema_version,
+    evaluating each group in one pass (column-wise for rules).
+
+    Returns the errors of each item, in the same order.
+    """
+    groups: dict[tuple[int, str], list[int]] = {}
+    for pos, (source_id, req) in enumerate(items):
+        groups.setdefault((source_id, req.schema_version), []).append(pos)
+
+    errors: list[list[dict]] = [[] for _ in items]
+    for (source_id, schema_version), positions in groups.items():
+        reqs = [items[p][1] for p in positions]
+        validator = schema_registry.resolve(db, source_id, schema_version)
+        if validator is not None:
+            for pos, errs in zip(positions, validator.validate_batch([r.attributes for r in reqs])):
+                errors[pos].extend(errs)
+        rule_set = rule_registry.resolve(db, source_id, schema_version)
+        for pos, errs in zip(positions, rule_set.validate_batch(reqs)):
+            errors[pos].extend(errs)
+    return errors
+
+
+def validate_only(db: Session, source_id: int, reqs: list[IngestRequest]) -> list[dict]:
+    """
+    Dry-run: validates requests of one source exactly as ingestion would,
+    without writing anything (no RAW, no cache of outcomes).
+
+    Returns per item {"errors": [...], "duplicate": bool}. `duplicate` is a
+    hint: the external_id already has a live RAW (with INGEST_BLOOM_ENABLED
+    only seen_keys' probable hits are queried) or repeats an earlier item
+    of the same call.
+    """
+    errors = validate_many(db, [(source_id, req) for req in reqs])
+
+    # Pré-filtro Bloom (desligável): sem ele todos os external_ids vão ao banco
+    external_ids = list(dict.fromkeys(req.external_id for req in reqs))
+    if settings.INGEST_BLOOM_ENABLED:
+        probable = seen_keys.probable_hits(db, {(source_id, ext) for ext in external_ids})
+        external_ids = [ext for _, ext in probable]
+    known = set(find_live_raws_by_external(db, source_id, external_ids))
+    if settings.INGEST_BLOOM_ENABLED:
+        seen_keys.record_false_positives(len(external_ids) - len(known))
+
+    items: list[dict] = []
+    for req, errs in zip(reqs, errors):
+        items.append({"errors": errs, "duplicate": req.external_id in known})
+        known.add(req.external_id)
+
+    pipeline_metrics.incr("ingest_validate_items_total", len(reqs))
+    return items
+
+
+def counts_duplicates() -> bool:
+    # Modo contador: duplicados viram contador em duplicate_tracker, sem RAW completo
+    return settings.INGEST_DUPLICATE_MODE == "counter"
+
+
+def _split_duplicates(
+    db: Session,
+    source_id: int,
+    dups: list[tuple[int, dict]],
+    known: dict[str, tuple[int, str]],
+) -> tuple[list[int], dict[int, int]]:
+    """
+    Counter mode: decides which DUPLICATE raw rows are replaced by a
+    duplicate_tracker hit.
+
+    `dups` is [(index, raw_row)]; `known` maps external_id -> (raw_id,
+    payload_hash) of originals already known by the caller (same batch).
+    Returns the indexes still written as full DUPLICATE rows (payload
+    changed, with INGEST_DUPLICATE_KEEP_CHANGED) and {index: original
+    raw_id} for the counted ones.
+    """
+    missing = [r["external_id"] for _, r in dups if r["external_id"] not in known]
+    originals = {**find_live_raws_by_external(db, source_id, missing), **known}
+    keep_changed = settings.INGEST_DUPLICATE_KEEP_CHANGED
+
+    kept: list[int] = []
+    counted: dict[int, int] = {}
+    hits: dict[str, tuple[int, str]] = {}
+    for idx, row in dups:
+        original = originals.get(row["external_id"])
+        if original is None or (keep_changed and original[1] != row["payload_hash"]):
+            kept.append(idx)
+            continue
+        counted[idx] = original[0]
+        count, _ = hits.get(row["external_id"], (0, ""))
+        hits[row["external_id"]] = (count + 1, row["request_id"])
+
+    record_duplicates(db, source_id, hits)
+    if counted:
+        pipeline_metrics.incr("ingest_duplicates_counted_total", len(counted))
+    return kept, counted
+
+
+def ingest_one(
     db: Session,
     req: IngestRequest,
     client_ip: str | None,
     user_agent: str | None,
+    request_id: str | None = None,
 ):
+    """
+    Persists a single event without committing.
+
+    Used by ingest_event (one event, one commit), by the coalescer and by
+    the spool worker, which run several events inside one transaction.
+    `request_id` is passed when it was already handed to the client.
+    """
     # Identificador único da requisição
-    request_id = new_request_id()
+    request_id = request_id or new_request_id()
 
     # Payload normalizado para hash e persistência
-    payload_dict = req.model_dump(mode="json")
-    raw_hash = payload_hash(payload_dict)
+    payload = _canonical(req)
 
     # 1) Garante que a fonte exista
     src = create_source_if_missing(db, req.source)
 
-    # 2) Deduplicação simples (source + external_id)
-    existing = find_raw_by_source_external(db, src.id, req.external_id)
-    if existing:
-        raw = RawIngestion(
-            source_id=src.id,
-            external_id=req.external_id,
-            schema_version=req.schema_version,
-            event_timestamp=req.event_timestamp,
-            payload_raw=json.dumps(payload_dict, ensure_ascii=False),
-            payload_hash=raw_hash,
-            processing_status="DUPLICATE",
-            error_count=0,
-            request_id=request_id,
-            client_ip=client_ip,
-            user_agent=user_agent,
-        )
-        raw = insert_raw(db, raw)
-        return {
-            "status": "DUPLICATE",
-            "raw_id": raw.id,
-            "request_id": request_id,
-        }
+    # Reenvio idêntico recente: devolve o resultado original (sem validar/gravar)
+    replay = settings.INGEST_HASH_REPLAY_ENABLED
+    if replay:
+        cached = _cached_outcomes(db, src.id, [payload[1]]).get(payload[1])
+        if cached is not None:
+            return _replay(cached, "cache")
 
-    # 3) Sempre grava o RAW primeiro
-    raw = RawIngestion(
-        source_id=src.id,
-        external_id=req.external_id,
-        schema_version=req.schema_version,
-        event_timestamp=req.event_timestamp,
-        payload_raw=json.dumps(payload_dict, ensure_ascii=False),
-        payload_hash=raw_hash,
-        processing_status="REJECTED",  # default pessimista
-        error_count=0,
-        request_id=request_id,
-        client_ip=client_ip,
-        user_agent=user_agent,
+    # 2) Validação antes de gravar o RAW: schema de attributes + regras de negócio
+    #    (validadores compilados da fonte/schema_version)
+    errors = validate_many(db, [(src.id, req)])[0]
+
+    # 3) RAW gravado uma única vez, já com o status final.
+    #    A deduplicação (source + external_id) é garantida pelo índice único:
+    #    ON CONFLICT DO NOTHING não devolve id quando a chave já existe.
+    row = _raw_row(
+        src.id,
+        req,
+        payload,
+        "REJECTED" if errors else "ACCEPTED",
+        len(errors),
+        request_id,
+        client_ip,
+        user_agent,
     )
-    raw = insert_raw(db, raw)
+    raw_id = insert_raw_if_new(db, row)
+    if raw_id is not None:
+        seen_keys.add(src.id, req.external_id)
+        # Avaliação do conjunto candidato fora do caminho da requisição
+        if settings.SHADOW_VALIDATION_ENABLED:
+            shadow_validator.submit(src.id, [(req, errors)])
 
-    # 4) Validação de regras de negócio
-    errors = validate_event(req.event_type, req.event_status)
+    if raw_id is None:
+        # Mesmo payload do evento já gravado → resultado original (via índice do hash)
+        if replay:
+            original = find_live_raws_by_hash(db, src.id, [payload[1]]).get(payload[1])
+            if original is not None:
+                _remember_outcome(db, src.id, payload[1], original)
+                return _replay(original, "index")
 
-    if errors:
-        # Converte erros em registros de rejeição
-        rejs = [
-            Rejection(
-                raw_ingestion_id=raw.id,
-                category=e["category"],
-                field=e.get("field"),
-                rule=e.get("rule"),
-                message=e["message"],
-                severity=e.get("severity", "MEDIUM"),
-            )
-            for e in errors
-        ]
-        insert_rejections(db, rejs)
-
-        # Atualiza status do RAW
-        raw.error_count = len(rejs)
-        raw.processing_status = "REJECTED"
-        db.commit()
+        # Perdeu a corrida (ou é reenvio com payload diferente) → registra como DUPLICATE
+        row["processing_status"] = "DUPLICATE"
+        row["error_count"] = 0
+
+        # Modo contador: só incrementa duplicate_tracker (raw_id = RAW original)
+        if counts_duplicates():
+            _, counted = _split_duplicates(db, src.id, [(0, row)], {})
+            if counted:
+                return {
+                    "status": "DUPLICATE",
+                    "raw_id": counted[0],
+                    "request_id": request_id,
+                }
 
+        raw_id = insert_raw(db, row)
         return {
+            "status": "DUPLICATE",
+            "raw_id": raw_id,
+            "request_id": request_id,
+        }
+
+    if errors:
+        # Rejeições na mesma transação do RAW
+        insert_rejections(db, rejection_rows(raw_id, errors))
+        result = {
             "status": "REJECTED",
-            "raw_id": raw.id,
-            "error_count": len(rejs),
+            "raw_id": raw_id,
+            "error_count": len(errors),
+            "request_id": request_id,
+        }
+    else:
+        # 4) Evento validado vira TRUSTED (mesma transação do RAW)
+        trusted_id = insert_trusted(db, trusted_row(raw_id, src.id, req))
+        result = {
+            "status": "ACCEPTED",
+            "raw_id": raw_id,
+            "trusted_id": trusted_id,
             "request_id": request_id,
         }
 
-    # 5) Evento validado vira TRUSTED
-    trusted = TrustedEvent(
-        raw_ingestion_id=raw.id,
-        source_id=src.id,
-        external_id=req.external_id,
-        entity_id=req.entity_id,
-        event_type=req.event_type,
-        event_status=req.event_status,
-        event_timestamp=req.event_timestamp,
+    _remember_outcome(db, src.id, payload[1], result)
+    return result
+
+
+def ingest_event(
+    db: Session,
+    req: IngestRequest,
+    client_ip: str | None,
+    user_agent: str | None,
+):
+    # Um evento, uma transação
+    result = ingest_one(db, req, client_ip, user_agent)
+    db.commit()
+    return result
+
+
+def ingest_batch(
+    db: Session,
+    reqs: list[IngestRequest],
+    client_ip: str | None,
+    user_agent: str | None,
+    prepared: list[Prepared] | None = None,
+):
+    """
+    Set-based ingestion of a batch of events from a single source.
+
+    Validation happens before persistence (so RAW rows are written with
+    their final status), dedup is enforced by the database through a
+    multi-row INSERT ... ON CONFLICT, and RAW/TRUSTED/REJECTION rows are
+    written with multi-row inserts in a single transaction.
+
+    `prepared` (one per request, from the CPU stage) supplies the
+    canonical payloads and validation errors already computed elsewhere.
+    """
+    # 1) Garante que a fonte exista (lote é sempre de uma única fonte)
+    src = create_source_if_missing(db, reqs[0].source)
+    replay = settings.INGEST_HASH_REPLAY_ENABLED
+
+    # 2) Classificação e montagem das linhas RAW
+    #    (repetições dentro do próprio lote já saem como DUPLICATE;
+    #    reenvios idênticos recentes devolvem o resultado original)
+    seen: set[str] = set()
+    payloads: dict[int, tuple[str, str]] = {}
+    first_idx: list[int] = []
+    replayed: dict[int, dict] = {}
+    canonical = [prepared[idx][0] if prepared is not None else _canonical(req) for idx, req in enumerate(reqs)]
+    cached_by_hash = _cached_outcomes(db, src.id, [p[1] for p in canonical]) if replay else {}
+    for idx, req in enumerate(reqs):
+        payload = canonical[idx]
+        cached = cached_by_hash.get(payload[1])
+        if cached is not None:
+            replayed[idx] = _replay(cached, "cache")
+            continue
+
+        payloads[idx] = payload
+        if req.external_id not in seen:
+            seen.add(req.external_id)
+            first_idx.append(idx)
+
+    # Validação do lote inteiro por coluna (só a primeira ocorrência de cada chave)
+    if prepared is not None:
+        results = [prepared[i][1] for i in first_idx]
+    else:
+        results = validate_many(db, [(src.id, reqs[i]) for i in first_idx])
+    errors_by_index: dict[int, list[dict]] = {
+        idx: errors for idx, errors in zip(first_idx, results) if errors
+    }
+    first = set(first_idx)
+
+    raw_rows: dict[int, dict] = {}
+    for idx, payload in payloads.items():
+        errors = errors_by_index.get(idx, [])
+        if idx not in first:
+            status = "DUPLICATE"
+        else:
+            status = "REJECTED" if errors else "ACCEPTED"
+
+        raw_rows[idx] = _raw_row(
+            src.id,
+            reqs[idx],
+            payload,
+            status,
+            len(errors),
+            new_request_id(),
+            client_ip,
+            user_agent,
+        )
+
+    # 3) Deduplicação contra o banco no próprio INSERT multi-linha:
+    #    quem perde o ON CONFLICT vira DUPLICATE (ou reenvio, se o payload for idêntico)
+    live_idx = [i for i, r in raw_rows.items() if r["processing_status"] != "DUPLICATE"]
+    inserted = insert_raw_many_if_new(db, [raw_rows[i] for i in live_idx])
+
+    raw_ids: dict[int, int] = {}
+    losers = []
+    for i in live_idx:
+        raw_id = inserted.get(raw_rows[i]["external_id"])
+        if raw_id is None:
+            losers.append(i)
+        else:
+            raw_ids[i] = raw_id
+            seen_keys.add(src.id, raw_rows[i]["external_id"])
+    if settings.SHADOW_VALIDATION_ENABLED:
+        shadow_validator.submit(src.id, [(reqs[i], errors_by_index.get(i, [])) for i in raw_ids])
+
+    originals = (
+        find_live_raws_by_hash(db, src.id, [raw_rows[i]["payload_hash"] for i in losers])
+        if replay else {}
     )
-    trusted = insert_trusted(db, trusted)
+    for i in losers:
+        errors_by_index.pop(i, None)
+        original = originals.get(raw_rows[i]["payload_hash"])
+        if original is not None:
+            _remember_outcome(db, src.id, raw_rows[i]["payload_hash"], original)
+            replayed[i] = _replay(original, "index")
+            del raw_rows[i]
+        else:
+            raw_rows[i]["processing_status"] = "DUPLICATE"
+            raw_rows[i]["error_count"] = 0
+
+    # 4) DUPLICATEs em um único INSERT multi-linha
+    #    (no modo contador, só os que mudaram de payload, se configurado)
+    dup_idx = [i for i, r in raw_rows.items() if r["processing_status"] == "DUPLICATE"]
+    if counts_duplicates() and dup_idx:
+        known = {raw_rows[i]["external_id"]: (raw_ids[i], raw_rows[i]["payload_hash"]) for i in raw_ids}
+        dup_idx, counted = _split_duplicates(db, src.id, [(i, raw_rows[i]) for i in dup_idx], known)
+        raw_ids.update(counted)
+    raw_ids.update(zip(dup_idx, insert_raw_many(db, [raw_rows[i] for i in dup_idx])))
 
-    # Atualiza RAW como aceito
-    raw.processing_status = "ACCEPTED"
-    raw.error_count = 0
+    # 5) TRUSTED para os aceitos
+    accepted_idx = [i for i, r in raw_rows.items() if r["processing_status"] == "ACCEPTED"]
+    trusted_ids = insert_trusted_many(db, [
+        trusted_row(raw_ids[i], src.id, reqs[i]) for i in accepted_idx
+    ])
+    trusted_by_index = dict(zip(accepted_idx, trusted_ids))
+
+    # 6) Rejeições para os inválidos
+    insert_rejections(db, [
+        row
+        for i, errors in errors_by_index.items()
+        for row in rejection_rows(raw_ids[i], errors)
+    ])
+
+    # 7) Resultado por item, na ordem recebida
+    items = []
+    for idx in range(len(reqs)):
+        if idx in replayed:
+            items.append({"index": idx, **replayed[idx]})
+            continue
+
+        row = raw_rows[idx]
+        item = {
+            "index": idx,
+            "status": row["processing_status"],
+            "raw_id": raw_ids[idx],
+            "request_id": row["request_id"],
+        }
+        if idx in trusted_by_index:
+            item["trusted_id"] = trusted_by_index[idx]
+        if idx in errors_by_index:
+            item["error_count"] = row["error_count"]
+        if item["status"] != "DUPLICATE":
+            _remember_outcome(db, src.id, row["payload_hash"], {k: v for k, v in item.items() if k != "index"})
+        items.append(item)
+
+    # Uma única transação para o lote inteiro
     db.commit()
 
     return {
-        "status": "ACCEPTED",
-        "raw_id": raw.id,
-        "trusted_id": trusted.id,
-        "request_id": request_id,
+        "total": len(items),
+        "accepted": sum(1 for i in items if i["status"] == "ACCEPTED"),
+        "rejected": sum(1 for i in items if i["status"] == "REJECTED"),
+        "duplicates": sum(1 for i in items if i["status"] == "DUPLICATE"),
+        "items": items,
     }
@@ -0,0 +1,199 @@
+"""
+Reprocessing of rejected raw events.
+
+Streams REJECTED raw_ingestion rows (by source, received_at window and/or
+a rule of their current rejections) through a server-side cursor, rebuilds
+each event from payload_raw and runs the current validation again:
+- events that now pass are promoted to trusted_event (RAW becomes ACCEPTED)
+  and their rejections are marked as superseded;
+- events that still fail keep REJECTED; their rejections are replaced
+  (old ones superseded) only when the errors changed.
+
+Used by the admin endpoint (one capped transaction) and by the
+`app.scripts.reprocess` command (id ranges across a process pool).
+
+Promotion clears the replay cache of the running process only; the API
+processes check cached REJECTED outcomes against the RAW row before
+replaying them (see ingest_service._cached_outcomes).
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Iterator
+
+from pydantic import ValidationError
+from sqlalchemy import exists, func, select, update
+from sqlalchemy.orm import Session
+
+from app.api.schemas.ingest import IngestRequest
+from app.core import pipeline_metrics
+from app.infra.db.models.raw_ingestion import RawIngestion
+from app.infra.db.models.rejection import Rejection
+from app.infra.db.repositories.rejection_repo import insert_rejections
+from app.infra.db.repositories.trusted_repo import insert_trusted_many
+from app.services.ingest_service import recent_outcomes, rejection_rows, trusted_row, validate_many
+
+
+@dataclass(frozen=True)
+class ReprocessFilter:
+    source_id: int | None = None
+    received_from: datetime | None = None
+    received_to: datetime | None = None
+    rule: str | None = None
+
+
+def _rejected(flt: ReprocessFilter):
+    # Condições da seleção de RAWs REJECTED
+    conds = [RawIngestion.processing_status == "REJECTED"]
+    if flt.source_id is not None:
+        conds.append(RawIngestion.source_id == flt.source_id)
+    if flt.received_from is not None:
+        conds.append(RawIngestion.received_at >= flt.received_from)
+    if flt.received_to is not None:
+        conds.append(RawIngestion.received_at <= flt.received_to)
+    if flt.rule is not None:
+        conds.append(exists().where(
+            Rejection.raw_ingestion_id == RawIngestion.id,
+            Rejection.rule == flt.rule,
+            Rejection.superseded_at.is_(None),
+        ))
+    return conds
+
+
+def rejected_id_bounds(db: Session, flt: ReprocessFilter) -> tuple[int, int] | None:
+    # Menor e maior id elegíveis (base da divisão em faixas)
+    lo, hi = db.execute(select(func.min(RawIngestion.id), func.max(RawIngestion.id)).where(*_rejected(flt))).one()
+    return None if lo is None else (int(lo), int(hi))
+
+
+def iter_rejected(
+    db: Session,
+    flt: ReprocessFilter,
+    after_id: int = 0,
+    until_id: int | None = None,
+    chunk_size: int = 1000,
+) -> Iterator[list]:
+    # Cursor no servidor (yield_per): memória constante, chunks em ordem de id
+    conds = [*_rejected(flt), RawIngestion.id > after_id]
+    if until_id is not None:
+        conds.append(RawIngestion.id <= until_id)
+    result = db.execute(
+        select(RawIngestion.id, RawIngestion.source_id, RawIngestion.payload_raw, RawIngestion.payload_hash)
+        .where(*conds)
+        .order_by(RawIngestion.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    yield from result.partitions()
+
+
+def _active_errors(db: Session, raw_ids: list[int]) -> dict[int, set[tuple]]:
+    rows = db.execute(
+        select(Rejection.raw_ingestion_id, Rejection.category, Rejection.field, Rejection.rule)
+        .where(Rejection.raw_ingestion_id.in_(raw_ids), Rejection.superseded_at.is_(None))
+    )
+    current: dict[int, set[tuple]] = {}
+    for r in rows:
+        current.setdefault(r.raw_ingestion_id, set()).add((r.category, r.field, r.rule))
+    return current
+
+
+def _supersede(db: Session, raw_ids: list[int]) -> None:
+    if raw_ids:
+        db.execute(
+            update(Rejection)
+            .where(Rejection.raw_ingestion_id.in_(raw_ids), Rejection.superseded_at.is_(None))
+            .values(superseded_at=func.now())
+        )
+
+
+def reprocess_chunk(db: Session, rows: list) -> dict:
+    """
+    Re-validates one chunk of REJECTED raws (id, source_id, payload_raw,
+    payload_hash) and applies the outcome. Does not commit.
+    """
+    counts = {"scanned": len(rows), "promoted": 0, "still_rejected": 0, "changed": 0, "unparseable": 0}
+
+    # 1) Reconstrói os eventos a partir do payload canônico
+    parsed: list[tuple] = []
+    for row in rows:
+        try:
+            parsed.append((row, IngestRequest.model_validate(json.loads(row.payload_raw))))
+        except (ValueError, ValidationError):
+            counts["unparseable"] += 1
+
+    # 2) Validação atual (schema + regras), por coluna
+    results = validate_many(db, [(row.source_id, req) for row, req in parsed])
+
+    promoted = [(row, req) for (row, req), errors in zip(parsed, results) if not errors]
+    failing = [(row, errors) for (row, _), errors in zip(parsed, results) if errors]
+
+    # 3) Promovidos: TRUSTED + RAW ACCEPTED (só se ainda estiver REJECTED)
+    if promoted:
+        ids = db.execute(
+            update(RawIngestion)
+            .where(RawIngestion.id.in_([row.id for row, _ in promoted]), RawIngestion.processing_status == "REJECTED")
+            .values(processing_status="ACCEPTED", error_count=0)
+            .returning(RawIngestion.id)
+        ).scalars().all()
+        still = set(ids)
+        promoted = [(row, req) for row, req in promoted if row.id in still]
+        insert_trusted_many(db, [trusted_row(row.id, row.source_id, req) for row, req in promoted])
+        _supersede(db, [row.id for row, _ in promoted])
+        for row, _ in promoted:
+            # Reenvio idêntico não deve devolver o REJECTED antigo deste processo;
+            # os demais processos revalidam o REJECTED em cache contra o RAW no replay
+            recent_outcomes.pop((row.source_id, row.payload_hash))
+        counts["promoted"] = len(promoted)
+
+    # 4) Ainda inválidos: troca as rejeições só quando os erros mudaram
+    if failing:
+        current = _active_errors(db, [row.id for row, _ in failing])
+        changed = [
+            (row, errors) for row, errors in failing
+            if current.get(row.id, set()) != {(e["category"], e.get("field"), e.get("rule")) for e in errors}
+        ]
+        _supersede(db, [row.id for row, _ in changed])
+        insert_rejections(db, [r for row, errors in changed for r in rejection_rows(row.id, errors)])
+        for row, errors in changed:
+            db.execute(update(RawIngestion).where(RawIngestion.id == row.id).values(error_count=len(errors)))
+        counts["still_rejected"] = len(failing)
+        counts["changed"] = len(changed)
+
+    pipeline_metrics.incr("reprocess_promoted_total", counts["promoted"])
+    return counts
+
+
+def reprocess(
+    read_db: Session,
+    db: Session,
+    flt: ReprocessFilter,
+    after_id: int = 0,
+    until_id: int | None = None,
+    chunk_size: int = 1000,
+    max_rows: int | None = None,
+    on_chunk: Callable[[int, dict], None] | None = None,
+) -> dict:
+    """
+    Reprocesses eligible rows with id in (after_id, until_id].
+
+    Rows are read from `read_db` and written through `db`. `on_chunk(last_id,
+    totals)` runs after each chunk (the command commits and checkpoints
+    there); without it the caller commits once at the end, and `read_db`
+    may be `db` itself. Stops after `max_rows` (at a chunk boundary).
+    """
+    totals = {"scanned": 0, "promoted": 0, "still_rejected": 0, "changed": 0, "unparseable": 0}
+    last_id = after_id
+    done = True
+    for rows in iter_rejected(read_db, flt, after_id, until_id, chunk_size):
+        if max_rows is not None and totals["scanned"] >= max_rows:
+            done = False
+            break
+        for k, v in reprocess_chunk(db, rows).items():
+            totals[k] += v
+        last_id = rows[-1].id
+        if on_chunk is not None:
+            on_chunk(last_id, totals)
+    return {**totals, "last_id": last_id, "done": done}
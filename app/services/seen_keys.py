@@ -0,0 +1,181 @@
+"""
+Per-source prefilter of seen (source_id, external_id) keys.
+
+One scalable Bloom filter per source, warmed from raw_ingestion the first
+time the source is probed in this process and updated whenever a live RAW
+is written here. Explicit existence checks (bulk loader, dry-run
+validation) only go to the database for probable hits; keys the filter
+has never seen are treated as new without a query.
+
+The warm-up scans every live key of the source, so request paths never run
+it inline: a cold source is warmed by a background thread and, until it is
+ready, all its keys count as probable hits (the caller's query is exact,
+just not prefiltered). Scripts (bulk loader) pass `wait=True` and warm
+inline with their own session.
+
+The filter is per process: rows written by other processes after the
+warm-up are not in it, so callers must keep the database constraint as
+the final word (the ON CONFLICT insert) and treat a miss as "probably new".
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from threading import Lock
+from typing import Callable
+
+from sqlalchemy.orm import Session
+
+from app.core import pipeline_metrics
+from app.core.bloom import ScalableBloomFilter
+from app.core.settings import settings
+from app.infra.db.repositories.raw_repo import iter_live_external_ids
+from app.infra.db.session import SessionLocal
+
+logger = logging.getLogger("app.ingest.seen_keys")
+
+
+class SeenKeys:
+    def __init__(
+        self,
+        initial_capacity: int,
+        fp_rate: float,
+        session_factory: Callable[[], Session] = SessionLocal,
+    ) -> None:
+        self.initial_capacity = initial_capacity
+        self.fp_rate = fp_rate
+        self._session_factory = session_factory
+        self._filters: dict[int, ScalableBloomFilter] = {}
+        # Fontes em aquecimento → chaves gravadas durante a carga (entram no filtro ao final)
+        self._pending: dict[int, list[str]] = {}
+        # clear() invalida aquecimentos em andamento
+        self._generation = 0
+        self._lock = Lock()
+
+        # Observabilidade: consultas, prováveis hits e falsos positivos confirmados
+        self._probes = 0
+        self._hits = 0
+        self._false_positives = 0
+
+    def ensure_warm(self, db: Session, source_id: int) -> None:
+        # Aquecimento inline (scripts): carrega os external_ids vivos da fonte
+        with self._lock:
+            if source_id in self._filters:
+                return
+            generation = self._generation
+        self._load(db, source_id, generation)
+
+    def _load(self, db: Session, source_id: int, generation: int) -> None:
+        bloom = ScalableBloomFilter(self.initial_capacity, self.fp_rate)
+        for external_id in iter_live_external_ids(db, source_id):
+            bloom.add(external_id)
+        with self._lock:
+            if generation != self._generation:
+                return
+            for external_id in self._pending.get(source_id, ()):
+                bloom.add(external_id)
+            self._filters.setdefault(source_id, bloom)
+        pipeline_metrics.incr("seen_keys_warmed_sources_total")
+
+    def _warm_in_background(self, source_id: int) -> None:
+        # Uma thread por fonte fria; a requisição não espera a carga
+        with self._lock:
+            if source_id in self._filters or source_id in self._pending:
+                return
+            self._pending[source_id] = []
+            generation = self._generation
+        threading.Thread(
+            target=self._run_warm,
+            args=(source_id, generation),
+            name=f"seen-keys-warm-{source_id}",
+            daemon=True,
+        ).start()
+
+    def _run_warm(self, source_id: int, generation: int) -> None:
+        db = self._session_factory()
+        try:
+            self._load(db, source_id, generation)
+        except Exception:
+            # Fonte continua fria (sem pré-filtro); a próxima consulta tenta de novo
+            logger.warning("seen keys warm-up failed", exc_info=True, extra={"source_id": source_id})
+        finally:
+            db.close()
+            with self._lock:
+                if generation == self._generation:
+                    self._pending.pop(source_id, None)
+
+    def add(self, source_id: int, external_id: str) -> None:
+        # Só mantém fontes aquecidas ou em aquecimento (as demais são carregadas no primeiro uso)
+        with self._lock:
+            bloom = self._filters.get(source_id)
+            if bloom is None:
+                pending = self._pending.get(source_id)
+                if pending is not None:
+                    pending.append(external_id)
+                return
+        bloom.add(external_id)
+
+    def probable_hits(
+        self,
+        db: Session,
+        keys: set[tuple[int, str]],
+        wait: bool = False,
+    ) -> set[tuple[int, str]]:
+        """
+        Keys that MAY exist in the database (the others are new for sure).
+
+        Without `wait`, keys of a source whose filter is not ready are all
+        returned as probable hits and the warm-up runs in the background.
+        """
+        for source_id in {s for s, _ in keys}:
+            if wait:
+                self.ensure_warm(db, source_id)
+            elif source_id not in self._filters:
+                self._warm_in_background(source_id)
+                pipeline_metrics.incr("seen_keys_cold_probes_total")
+
+        hits = set()
+        for key in keys:
+            bloom = self._filters.get(key[0])
+            if bloom is None or bloom.might_contain(key[1]):
+                hits.add(key)
+        with self._lock:
+            self._probes += len(keys)
+            self._hits += len(hits)
+        return hits
+
+    def record_false_positives(self, n: int) -> None:
+        # Prováveis hits que o banco não confirmou
+        with self._lock:
+            self._false_positives += n
+
+    def clear(self) -> None:
+        with self._lock:
+            self._filters.clear()
+            self._pending.clear()
+            self._generation += 1
+            self._probes = self._hits = self._false_positives = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            filters = list(self._filters.values())
+            probes, hits, fps = self._probes, self._hits, self._false_positives
+        negatives = probes - (hits - fps)
+        return {
+            "sources": len(filters),
+            "keys": sum(len(f) for f in filters),
+            "memory_bytes": sum(f.memory_bytes() for f in filters),
+            "estimated_fp_rate": round(max((f.estimated_fp_rate() for f in filters), default=0.0), 6),
+            "probes": probes,
+            "probable_hits": hits,
+            "false_positives": fps,
+            "observed_fp_rate": round(fps / negatives, 6) if negatives else 0.0,
+        }
+
+
+seen_keys = SeenKeys(
+    initial_capacity=settings.INGEST_BLOOM_INITIAL_CAPACITY,
+    fp_rate=settings.INGEST_BLOOM_FP_RATE,
+)
+pipeline_metrics.register_collector("seen_keys", seen_keys.stats)
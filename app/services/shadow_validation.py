@@ -0,0 +1,174 @@
+"""
+Shadow validation of candidate rule sets.
+
+The ingest path hands each validated event (with its live errors) to a
+bounded queue without blocking; a background thread evaluates the
+candidate ("shadow") rule set of the event's source/schema_version and
+counts divergences from the live decision in shadow_divergence:
+- would_reject: live accepted, candidate rejects (per failing candidate rule);
+- would_accept: live rejected, candidate accepts (per live rule it clears).
+
+The candidate replaces the business rules only: SCHEMA errors from the
+live validation are kept. When the queue is full the work is dropped
+(counted in `shadow_dropped_total`), never waited on.
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from typing import Callable
+
+from sqlalchemy.orm import Session
+
+from app.api.schemas.ingest import IngestRequest
+from app.core import pipeline_metrics
+from app.core.settings import settings
+from app.infra.db.repositories.rule_repo import shadow_rule_registry
+from app.infra.db.repositories.shadow_repo import record_divergences
+from app.infra.db.session import SessionLocal
+
+logger = logging.getLogger("app.ingest.shadow")
+
+# Sentinela para encerrar a thread
+_STOP = object()
+
+# Contadores por (rule_set_id, versão, source_id, regra): [avaliados, would_reject, would_accept]
+Counters = dict[tuple[int, int, int, str], list[int]]
+
+
+class ShadowValidator:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        queue_size: int,
+        flush_seconds: float,
+    ) -> None:
+        self._session_factory = session_factory
+        self._flush_seconds = flush_seconds
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, int(queue_size)))
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="shadow-validation", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread.is_alive():
+            try:
+                self._queue.put_nowait(_STOP)
+            except queue.Full:
+                # Fila cheia: descarta trabalho pendente para conseguir parar
+                self._drain_queue()
+                self._queue.put_nowait(_STOP)
+            thread.join(timeout)
+
+    def submit(self, source_id: int, items: list[tuple[IngestRequest, list[dict]]]) -> None:
+        # Caminho da requisição: só um put_nowait (descarta se a fila estiver cheia)
+        if not settings.SHADOW_VALIDATION_ENABLED or not items:
+            return
+        try:
+            self._queue.put_nowait((source_id, items))
+        except queue.Full:
+            pipeline_metrics.incr("shadow_dropped_total", len(items))
+
+    def evaluate(self, db: Session, source_id: int, items: list[tuple[IngestRequest, list[dict]]], counters: Counters):
+        # Agrupa por schema_version (um conjunto candidato por escopo)
+        groups: dict[str, list[tuple[IngestRequest, list[dict]]]] = {}
+        for req, live_errors in items:
+            groups.setdefault(req.schema_version, []).append((req, live_errors))
+
+        for schema_version, group in groups.items():
+            candidate = shadow_rule_registry.resolve(db, source_id, schema_version)
+            if candidate is None:
+                continue
+            key = (candidate.rule_set_id, candidate.version, source_id)
+            results = candidate.validate_batch([req for req, _ in group])
+            for (req, live_errors), shadow_errors in zip(group, results):
+                schema_errors = [e for e in live_errors if e["category"] == "SCHEMA"]
+                live_ok = not live_errors
+                shadow_ok = not (schema_errors or shadow_errors)
+
+                _bump(counters, (*key, "*"), 0)
+                if live_ok and not shadow_ok:
+                    _bump(counters, (*key, "*"), 1)
+                    for rule in {e["rule"] for e in shadow_errors}:
+                        _bump(counters, (*key, rule), 1)
+                elif shadow_ok and not live_ok:
+                    _bump(counters, (*key, "*"), 2)
+                    for rule in {e["rule"] for e in live_errors}:
+                        _bump(counters, (*key, rule), 2)
+            pipeline_metrics.incr("shadow_evaluated_total", len(group))
+
+    def run_pending(self, db: Session) -> None:
+        # Processa o que está na fila e grava os contadores (testes / shutdown)
+        counters: Counters = {}
+        for source_id, items in self._drain_queue():
+            self.evaluate(db, source_id, items, counters)
+        record_divergences(db, counters)
+        db.commit()
+
+    def _drain_queue(self) -> list:
+        drained = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return drained
+            if item is not _STOP:
+                drained.append(item)
+
+    def _run(self) -> None:
+        counters: Counters = {}
+        next_flush = time.monotonic() + self._flush_seconds
+        stopping = False
+        while not stopping:
+            try:
+                item = self._queue.get(timeout=max(0.0, next_flush - time.monotonic()))
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                stopping = True
+            elif item is not None:
+                try:
+                    self._with_session(lambda db: self.evaluate(db, item[0], item[1], counters))
+                except Exception:
+                    logger.exception("shadow evaluation failed")
+
+            pipeline_metrics.set_gauge("shadow_queue_depth", self._queue.qsize())
+            # Contadores agregados em memória, gravados a cada flush_seconds
+            if stopping or time.monotonic() >= next_flush:
+                if counters:
+                    try:
+                        self._with_session(lambda db: (record_divergences(db, counters), db.commit()))
+                    except Exception:
+                        logger.exception("shadow flush failed")
+                    counters = {}
+                next_flush = time.monotonic() + self._flush_seconds
+
+    def _with_session(self, fn: Callable[[Session], object]) -> None:
+        db = self._session_factory()
+        try:
+            fn(db)
+        finally:
+            db.close()
+
+
+def _bump(counters: Counters, key: tuple, column: int) -> None:
+    row = counters.setdefault(key, [0, 0, 0])
+    row[column] += 1
+
+
+shadow_validator = ShadowValidator(
+    session_factory=SessionLocal,
+    queue_size=settings.SHADOW_QUEUE_SIZE,
+    flush_seconds=settings.SHADOW_FLUSH_SECONDS,
+)
@@ -0,0 +1,198 @@
+"""
+Background drain of the ingest spool into PostgreSQL.
+
+Reads sealed spool segments in order and persists their events through the
+regular ingest logic (ingest_one), one transaction per chunk, advancing a
+per-segment checkpoint after each commit. Transient database failures
+(outage, pool exhaustion) leave the chunk in place and are retried with
+backoff, so acknowledged events are never lost. The checkpoint file cannot
+be written atomically with the commit: a crash between the two replays
+that chunk on restart, so delivery is at least once, and the replayed
+events hit the (source, external_id) ON CONFLICT dedup (recorded as
+DUPLICATE, or as the original outcome with hash replay) instead of
+creating a second live RAW. Segments with damaged
+frames are kept in quarantine after their valid records are drained.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
+from pydantic import ValidationError
+from sqlalchemy.exc import OperationalError, TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session
+
+from app.api.schemas.ingest import IngestRequest
+from app.core import pipeline_metrics
+from app.core.settings import settings
+from app.infra.db.session import SessionLocal
+from app.infra.spool import Spool
+from app.services.ingest_service import ingest_one
+
+logger = logging.getLogger("app.ingest.spool")
+
+# Falhas transitórias do banco: o lote é mantido e reprocessado
+_TRANSIENT_ERRORS = (OperationalError, PoolTimeoutError)
+
+
+class SpoolWorker:
+    def __init__(
+        self,
+        spool: Spool,
+        session_factory: Callable[[], Session],
+        chunk_size: int,
+        seal_ms: float,
+        poll_ms: float = 50,
+        max_backoff_s: float = 5.0,
+    ) -> None:
+        self.spool = spool
+        self._session_factory = session_factory
+        self._chunk_size = max(1, int(chunk_size))
+        self._seal_s = seal_ms / 1000.0
+        self._poll_s = poll_ms / 1000.0
+        self._max_backoff_s = max_backoff_s
+
+        self._thread: threading.Thread | None = None
+        self._stopping = threading.Event()
+        self._drain_deadline = 0.0
+        self.started = False
+
+    # === Ciclo de vida ===
+
+    def start(self) -> None:
+        # Abre o spool (reivindica slot + sela sobras) e começa a drenar
+        if self.started:
+            return
+        self.spool.open()
+        # Varredura de slots órfãos (processo dono morreu sem ninguém reabrir o slot)
+        self.spool.adopt_orphans()
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="ingest-spool", daemon=True)
+        self._thread.start()
+        self.started = True
+
+    def stop(self, drain_timeout_s: float = 30.0) -> None:
+        # Shutdown: sela o segmento ativo e drena até o prazo; o restante fica em disco
+        if not self.started:
+            return
+        self.spool.seal()
+        self._drain_deadline = time.monotonic() + drain_timeout_s
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(drain_timeout_s + 1)
+        self.spool.close()
+        self.started = False
+
+    def enqueue(self, record: dict) -> None:
+        # Append durável (fsync) antes de responder 202
+        self.spool.append(record)
+        pipeline_metrics.incr("ingest_spool_appended_total")
+
+    # === Drenagem ===
+
+    def _run(self) -> None:
+        backoff = self._poll_s
+        while True:
+            if self._stopping.is_set() and time.monotonic() >= self._drain_deadline:
+                return
+
+            # Segmento ativo "velho" é selado para não segurar eventos em baixo tráfego
+            self.spool.seal(min_age_s=self._seal_s)
+
+            segments = self.spool.sealed_segments()
+            pipeline_metrics.set_gauge("ingest_spool_pending_segments", len(segments))
+            if not segments:
+                if self._stopping.is_set():
+                    return
+                time.sleep(self._poll_s)
+                continue
+
+            try:
+                for path in segments:
+                    self.drain_segment(path)
+                    if self._stopping.is_set() and time.monotonic() >= self._drain_deadline:
+                        return
+                self.spool.release_drained()
+                backoff = self._poll_s
+            except Exception:
+                # Banco indisponível / pool esgotado: espera e tenta de novo
+                pipeline_metrics.incr("ingest_spool_retry_total")
+                logger.warning("spool drain failed, retrying", exc_info=True)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, self._max_backoff_s)
+
+    def drain_segment(self, path: Path) -> None:
+        offset = Spool.load_checkpoint(path)
+        chunk: list[dict] = []
+        chunk_end = offset
+
+        corrupt: list[int] = []
+        for next_offset, record in Spool.read(path, offset, on_corrupt=corrupt.append):
+            chunk.append(record)
+            chunk_end = next_offset
+            if len(chunk) >= self._chunk_size:
+                self._persist(chunk)
+                # Crash entre o commit e o checkpoint: o chunk é reenviado (dedup por ON CONFLICT)
+                Spool.save_checkpoint(path, chunk_end)
+                chunk = []
+
+        if chunk:
+            self._persist(chunk)
+
+        if corrupt:
+            # Registros íntegros já foram gravados; o arquivo fica em quarentena
+            pipeline_metrics.incr("ingest_spool_corrupt_segments_total")
+            bad = Spool.quarantine(path)
+            logger.error("spool segment quarantined", extra={"path": str(bad), "offsets": corrupt})
+            return
+
+        Spool.discard(path)
+
+    def _persist(self, records: list[dict]) -> None:
+        db = self._session_factory()
+        try:
+            for record in records:
+                try:
+                    req = IngestRequest.model_validate(record["event"])
+                except (KeyError, ValidationError):
+                    # Registro ilegível não deve travar a fila
+                    pipeline_metrics.incr("ingest_spool_invalid_total")
+                    logger.error("invalid spool record dropped", extra={"request_id": record.get("request_id", "")})
+                    continue
+
+                try:
+                    with db.begin_nested():
+                        ingest_one(
+                            db,
+                            req,
+                            record.get("client_ip"),
+                            record.get("user_agent"),
+                            request_id=record.get("request_id"),
+                        )
+                except _TRANSIENT_ERRORS:
+                    raise
+                except Exception:
+                    # Erro definitivo de um evento: registra e segue com os demais
+                    pipeline_metrics.incr("ingest_spool_failed_total")
+                    logger.exception("spool record failed", extra={"request_id": record.get("request_id", "")})
+
+            # Uma transação por chunk
+            db.commit()
+            pipeline_metrics.incr("ingest_spool_drained_total", len(records))
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+spool_worker = SpoolWorker(
+    spool=Spool(settings.INGEST_SPOOL_DIR, settings.INGEST_SPOOL_SEGMENT_BYTES),
+    session_factory=SessionLocal,
+    chunk_size=settings.INGEST_SPOOL_CHUNK_SIZE,
+    seal_ms=settings.INGEST_SPOOL_SEAL_MS,
+)
@@ -18,9 +18,19 @@ from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
 from app.main import app
-from app.infra.db.session import get_db
-from app.core.security import hash_password
+from app.infra.db.session import get_async_db, get_db
+from app.core.security import hash_password, hash_api_key
 from app.core.login_attempts import reset_all
+from app.core.rate_limit import limiter
+from app.infra.db.repositories.source_repo import source_registry
+from app.infra.db.repositories.rule_repo import rule_registry, shadow_rule_registry
+from app.infra.db.repositories.reference_repo import reference_cache
+from app.infra.db.repositories.schema_repo import schema_registry
+from app.services.admission import fair_admission
+from app.services.idempotency import idempotency_store
+from app.services.ingest_quota import ingest_quota
+from app.services.ingest_service import recent_outcomes
+from app.services.seen_keys import seen_keys
 
 from app.infra.db.models.user_account import UserAccount
 from app.infra.db.models.trusted_event import TrustedEvent
@@ -62,15 +72,46 @@ def db_session():
         db.close()
 
 
+class AsyncSessionOverSync:
+    """
+    Interface de AsyncSession usada pelas rotas async, sobre o db_session do teste.
+
+    As rotas async enxergam a mesma transação (SAVEPOINT) que o teste;
+    a sessão async real é exercitada em test_async_session.py.
+    """
+
+    def __init__(self, db) -> None:
+        self.sync_session = db
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return fn(self.sync_session, *args, **kwargs)
+
+    async def execute(self, statement, *args, **kwargs):
+        return self.sync_session.execute(statement, *args, **kwargs)
+
+    async def commit(self) -> None:
+        self.sync_session.commit()
+
+    async def rollback(self) -> None:
+        self.sync_session.rollback()
+
+    async def close(self) -> None:
+        self.sync_session.close()
+
+
 @pytest.fixture()
 def client(db_session):
     """
-    Override do get_db do FastAPI para usar o db_session do teste.
+    Override do get_db / get_async_db do FastAPI para usar o db_session do teste.
     """
     def _override_get_db():
         yield db_session
 
+    async def _override_get_async_db():
+        yield AsyncSessionOverSync(db_session)
+
     app.dependency_overrides[get_db] = _override_get_db
+    app.dependency_overrides[get_async_db] = _override_get_async_db
     with TestClient(app) as c:
         yield c
     app.dependency_overrides.clear()
@@ -79,11 +120,41 @@ def client(db_session):
 @pytest.fixture(autouse=True)
 def _reset_login_attempts():
     """
-    Limpa o estado de brute force entre testes (in-memory).
+    Limpa o estado de brute force e o rate limit entre testes (in-memory).
     """
     reset_all()
+    limiter.reset()
     yield
     reset_all()
+    limiter.reset()
+
+
+@pytest.fixture(autouse=True)
+def _reset_source_cache():
+    """
+    Limpa os caches em memória entre testes (ids de fontes/eventos somem no rollback).
+    """
+    source_registry.clear()
+    recent_outcomes.clear()
+    seen_keys.clear()
+    rule_registry.clear()
+    shadow_rule_registry.clear()
+    reference_cache.clear()
+    schema_registry.clear()
+    idempotency_store.clear()
+    ingest_quota.clear()
+    fair_admission.clear()
+    yield
+    source_registry.clear()
+    recent_outcomes.clear()
+    seen_keys.clear()
+    rule_registry.clear()
+    shadow_rule_registry.clear()
+    reference_cache.clear()
+    schema_registry.clear()
+    idempotency_store.clear()
+    ingest_quota.clear()
+    fair_admission.clear()
 
 
 def ensure_user(db, username: str, password: str, role: str):
@@ -105,6 +176,32 @@ def ensure_user(db, username: str, password: str, role: str):
     return u
 
 
+def ensure_source(db, name: str, api_key: str):
+    src = db.query(SourceSystem).filter(SourceSystem.name == name).one_or_none()
+    if not src:
+        src = SourceSystem(name=name, status="active", api_key_hash=hash_api_key(api_key))
+        db.add(src)
+    else:
+        src.status = "active"
+        src.api_key_hash = hash_api_key(api_key)
+    db.flush()
+    return src
+
+
+def make_event(source: str, external_id: str, **overrides) -> dict:
+    ev = {
+        "source": source,
+        "external_id": external_id,
+        "entity_id": "ent-1",
+        "event_type": "ORDER",
+        "event_status": "NEW",
+        "event_timestamp": "2026-02-10T00:00:00Z",
+        "attributes": {"a": 1},
+    }
+    ev.update(overrides)
+    return ev
+
+
 def login(client: TestClient, username: str, password: str) -> str:
     r = client.post("/api/v1/auth/login", json={"username": username, "password": password})
     assert r.status_code == 200, r.text
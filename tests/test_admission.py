@@ -0,0 +1,147 @@
+"""
+Fair admission tests.
+
+Ensures waiting ingest calls are served per source by weighted deficit
+round robin, that calls give up after the admission timeout and that a
+cancelled wait leaves neither a waiter nor a slot behind.
+"""
+import asyncio
+from uuid import uuid4
+
+import pytest
+
+from app.core.settings import settings
+from app.services.admission import AdmissionTimeout, FairAdmission, fair_admission
+from tests.conftest import ensure_source, make_event
+
+
+async def _queue_waiters(adm: FairAdmission, plan: list[tuple[str, int]], order: list[str]) -> list[asyncio.Task]:
+    # Enfileira as chamadas na ordem do plano (uma task por chamada)
+    tasks = []
+    for source, weight in plan:
+        queued = sum(len(q) for q in adm._queues.values())
+
+        async def call(source=source, weight=weight):
+            async with adm.slot_async(source, weight):
+                order.append(source)
+
+        tasks.append(asyncio.ensure_future(call()))
+        while sum(len(q) for q in adm._queues.values()) == queued:
+            await asyncio.sleep(0.001)
+    return tasks
+
+
+def _serve(adm: FairAdmission, first: str, plan: list[tuple[str, int]]) -> list[str]:
+    # Slot ocupado por `first`: todo o plano entra na fila antes da liberação
+    order: list[str] = []
+
+    async def scenario():
+        await adm.acquire_async(first)
+        tasks = await _queue_waiters(adm, plan, order)
+        adm.release()
+        await asyncio.wait_for(asyncio.gather(*tasks), 5)
+
+    asyncio.run(scenario())
+    return order
+
+
+def test_burst_from_one_source_does_not_starve_the_other():
+    adm = FairAdmission(capacity=1, quantum=1, timeout_seconds=5)
+
+    order = _serve(adm, "noisy", [("noisy", 1)] * 5 + [("quiet", 1)] * 2)
+
+    assert order == ["noisy", "quiet", "noisy", "quiet", "noisy", "noisy", "noisy"]
+    stats = adm.stats()["sources"]
+    assert stats["quiet"]["admitted"] == 2
+    assert stats["quiet"]["wait_ms_max"] > 0
+
+
+def test_weights_share_slots_proportionally():
+    adm = FairAdmission(capacity=1, quantum=1, timeout_seconds=5)
+
+    order = _serve(adm, "a", [("a", 3)] * 6 + [("b", 1)] * 2)
+
+    assert order == ["a", "a", "a", "b", "a", "a", "a", "b"]
+
+
+def test_waiting_call_times_out_and_leaves_the_queue():
+    adm = FairAdmission(capacity=1, quantum=1, timeout_seconds=0.05)
+
+    async def scenario():
+        await adm.acquire_async("a")
+        with pytest.raises(AdmissionTimeout):
+            await adm.acquire_async("b")
+        adm.release()
+        # Sem fila pendurada: a próxima chamada passa direto
+        async with adm.slot_async("b"):
+            pass
+
+    asyncio.run(scenario())
+    assert adm.stats()["sources"]["b"]["timeouts"] == 1
+    assert adm.stats()["in_use"] == 0
+
+
+def test_sync_slot_times_out_and_leaves_the_queue():
+    # Caminho síncrono (scripts/threads) com o mesmo escalonamento
+    adm = FairAdmission(capacity=1, quantum=1, timeout_seconds=0.05)
+    adm.acquire("a")
+
+    with pytest.raises(AdmissionTimeout):
+        adm.acquire("b")
+
+    adm.release()
+    with adm.slot("b"):
+        pass
+    assert adm.stats()["sources"]["b"]["timeouts"] == 1
+    assert adm.stats()["in_use"] == 0
+
+
+def test_cancelled_wait_leaves_the_queue():
+    adm = FairAdmission(capacity=1, quantum=1, timeout_seconds=5)
+
+    async def scenario():
+        await adm.acquire_async("a")
+        task = asyncio.ensure_future(adm.acquire_async("b"))
+        while not adm._queues:
+            await asyncio.sleep(0.001)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+    assert adm._queues == {} and not adm._active
+    adm.release()
+    assert adm.stats()["in_use"] == 0
+
+
+def test_cancel_after_grant_hands_the_slot_back():
+    adm = FairAdmission(capacity=1, quantum=1, timeout_seconds=5)
+
+    async def scenario():
+        await adm.acquire_async("a")
+        task = asyncio.ensure_future(adm.acquire_async("b"))
+        while not adm._queues:
+            await asyncio.sleep(0.001)
+        # Cancelamento e concessão antes de a coroutine voltar a rodar
+        task.cancel()
+        adm.release()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+    assert adm.stats()["in_use"] == 0
+    assert adm._queues == {}
+
+
+def test_ingest_goes_through_admission_when_enabled(client, db_session, monkeypatch):
+    monkeypatch.setattr(settings, "INGEST_ADMISSION_ENABLED", True)
+    name = f"adm-src-{uuid4().hex}"
+    ensure_source(db_session, name, "adm-key")
+
+    r = client.post(
+        "/api/v1/ingest/batch",
+        json=[make_event(name, uuid4().hex) for _ in range(3)],
+        headers={"X-API-Key": "adm-key"},
+    )
+    assert r.status_code == 200, r.text
+    assert fair_admission.stats()["sources"][name]["admitted"] == 1
@@ -0,0 +1,152 @@
+"""
+Async session tests.
+
+Ensures the async engine (psycopg async) serves the async repositories and
+the sync ones through run_sync, that async waits (admission, in-flight
+idempotency keys) happen on the event loop, and that sync caches reached
+through run_sync never wait for a lock held across a query.
+"""
+import asyncio
+import threading
+from uuid import uuid4
+
+import pytest
+
+from app.api.routes import ingest as ingest_routes
+from app.core.signal import Signal
+from app.infra.db.repositories.reference_repo import ReferenceCache
+from app.infra.db.repositories.source_repo import source_registry
+from app.infra.db.repositories.trusted_repo import list_trusted
+from app.infra.db.session import AsyncSessionLocal, async_engine, get_async_db
+from app.services.admission import AdmissionTimeout, FairAdmission
+from app.services.idempotency import idempotency_store
+from tests.conftest import ensure_source, make_event
+
+
+def test_async_session_runs_async_and_sync_repositories():
+    name = f"async-src-{uuid4().hex}"
+
+    async def scenario():
+        agen = get_async_db()
+        db = await agen.__anext__()
+        try:
+            # Tudo numa transação sem commit (desfeita no rollback)
+            src = await db.run_sync(ensure_source, name, "async-key")
+            cached = await db.run_sync(source_registry.resolve, name)
+            total, rows = await list_trusted(db, source_id=src.id)
+            await db.rollback()
+            return src.id, cached, total, rows
+        finally:
+            await agen.aclose()
+            await async_engine.dispose()
+
+    source_id, cached, total, rows = asyncio.run(scenario())
+
+    assert cached.id == source_id
+    assert (total, list(rows)) == (0, [])
+
+
+def test_signal_wakes_coroutine_from_thread():
+    signal = Signal()
+
+    async def scenario():
+        threading.Timer(0.05, signal.set).start()
+        return await signal.wait_async(5), await Signal().wait_async(0.01)
+
+    assert asyncio.run(scenario()) == (True, False)
+    assert signal.is_set()
+
+
+def test_async_admission_waits_on_the_event_loop():
+    adm = FairAdmission(capacity=1, quantum=1, timeout_seconds=0.05)
+
+    async def scenario():
+        await adm.acquire_async("a")
+        with pytest.raises(AdmissionTimeout):
+            await adm.acquire_async("b")
+
+        # Liberação por outra thread acorda a coroutine na fila
+        adm.timeout_seconds = 5
+        threading.Timer(0.05, adm.release).start()
+        async with adm.slot_async("b"):
+            pass
+
+    asyncio.run(scenario())
+    sources = adm.stats()["sources"]
+    assert sources["b"]["timeouts"] == 1
+    assert sources["b"]["admitted"] == 1
+    assert adm.stats()["in_use"] == 0
+
+
+def test_run_async_waits_for_in_flight_key():
+    source_id = 10**9 + 11  # a espera em memória não consulta o banco
+    key = uuid4().hex
+    calls = []
+
+    # Outra chamada do processo é dona da chave e termina depois de 100ms
+    _, done = idempotency_store._own((source_id, key))
+
+    def owner_finishes():
+        idempotency_store.cache.set((source_id, key), ("fp", 200, {"status": "ACCEPTED"}))
+        idempotency_store._disown((source_id, key), done)
+
+    async def second_run():
+        calls.append("second")
+        return {}
+
+    async def scenario():
+        threading.Timer(0.1, owner_finishes).start()
+        return await idempotency_store.run_async(None, source_id, key, "fp", second_run)
+
+    assert asyncio.run(scenario()) == (200, {"status": "ACCEPTED"}, True)
+    assert calls == []
+
+
+def test_ingest_service_runs_off_the_event_loop(client, db_session, monkeypatch):
+    name = f"async-src-{uuid4().hex}"
+    ensure_source(db_session, name, "async-key")
+    loops = []
+
+    def spy(fn):
+        def wrapper(*args, **kwargs):
+            # Em run_sync haveria um loop rodando nesta thread
+            try:
+                loops.append(asyncio.get_running_loop())
+            except RuntimeError:
+                loops.append(None)
+            return fn(*args, **kwargs)
+        return wrapper
+
+    monkeypatch.setattr(ingest_routes, "ingest_event", spy(ingest_routes.ingest_event))
+    monkeypatch.setattr(ingest_routes, "ingest_batch", spy(ingest_routes.ingest_batch))
+    headers = {"X-API-Key": "async-key"}
+
+    assert client.post("/api/v1/ingest", json=make_event(name, uuid4().hex), headers=headers).status_code == 200
+    r = client.post("/api/v1/ingest/batch", json=[make_event(name, uuid4().hex)], headers=headers)
+    assert r.status_code == 200, r.text
+    assert loops == [None, None]
+
+
+def test_concurrent_reference_refresh_does_not_block_the_loop():
+    # refresh_seconds=0: toda chamada quer atualizar o cache
+    cache = ReferenceCache(refresh_seconds=0, full_reload_seconds=3600)
+    finished = []
+
+    async def refresh():
+        async with AsyncSessionLocal() as db:
+            await db.run_sync(cache.ensure_fresh)
+
+    async def scenario():
+        try:
+            for _ in range(2):  # primeira carga e refresh incremental
+                await asyncio.gather(*(refresh() for _ in range(4)))
+        finally:
+            await async_engine.dispose()
+        finished.append(True)
+
+    # Um deadlock trava a thread do loop: roda em outra thread com prazo
+    t = threading.Thread(target=asyncio.run, args=(scenario(),), daemon=True)
+    t.start()
+    t.join(10)
+
+    assert finished == [True]
@@ -0,0 +1,109 @@
+"""
+Attribute schema tests.
+
+Ensures attribute schemas compile once per (source, schema_version) and
+failures become SCHEMA rejections with the JSON path in `field`.
+"""
+from uuid import uuid4
+
+import pytest
+
+from app.domain.attribute_schema import SchemaError, compile_attribute_schema
+from app.infra.db.models.rejection import Rejection
+from app.infra.db.repositories.schema_repo import schema_registry
+from tests.conftest import ensure_source, ensure_user, login, make_event
+
+
+SCHEMA = {
+    "type": "object",
+    "required": ["amount", "currency"],
+    "properties": {
+        "amount": {"type": "number", "minimum": 0},
+        "currency": {"enum": ["BRL", "USD"]},
+        "items": {
+            "type": "array",
+            "items": {"type": "object", "required": ["sku"], "properties": {"sku": {"type": "string"}}},
+        },
+    },
+}
+
+
+def test_batch_validation_reports_json_paths():
+    validator = compile_attribute_schema(SCHEMA)
+    errors = validator.validate_batch([
+        {"amount": 10, "currency": "BRL"},
+        {"amount": "10", "currency": "BRL", "items": [{"sku": "a"}, {}]},
+    ])
+
+    assert errors[0] == []
+    assert [(e["category"], e["field"]) for e in errors[1]] == [
+        ("SCHEMA", "$.attributes.amount"),
+        ("SCHEMA", "$.attributes.items[1].sku"),
+    ]
+    assert validator.validate({"amount": 1, "currency": "BRL"}) == []
+
+
+def test_nested_values_are_not_coerced():
+    validator = compile_attribute_schema({
+        "type": "object",
+        "properties": {
+            "counts": {"type": "array", "items": {"type": "integer"}},
+            "flags": {"type": "object", "additionalProperties": {"type": "boolean"}},
+            "ratio": {"type": "number"},
+        },
+    })
+
+    assert validator.validate({"counts": [1, 2], "flags": {"a": True}, "ratio": 1}) == []
+    errors = validator.validate({"counts": [1, "2"], "flags": {"a": "true"}})
+    assert [e["field"] for e in errors] == ["$.attributes.counts[1]", "$.attributes.flags.a"]
+    assert validator.validate_batch([{"counts": ["1"]}])[0][0]["field"] == "$.attributes.counts[0]"
+
+
+def test_invalid_schema_is_rejected():
+    with pytest.raises(SchemaError):
+        compile_attribute_schema({"type": "object", "properties": {"a": {"type": "date"}}})
+
+
+def test_schema_per_version_applies_to_ingest(client, db_session):
+    ensure_user(db_session, "schema_admin", "Adm@123", "admin")
+    token = login(client, "schema_admin", "Adm@123")
+    auth = {"Authorization": f"Bearer {token}"}
+
+    name = f"schema-src-{uuid4().hex}"
+    ensure_source(db_session, name, "schema-key")
+    version = f"v{uuid4().hex[:8]}"
+    ext = uuid4().hex
+
+    r = client.put("/api/v1/schemas", json={"schema_version": version, "json_schema": {"type": "bogus"}}, headers=auth)
+    assert r.status_code == 422
+
+    r = client.put("/api/v1/schemas", json={"source": name, "schema_version": version, "json_schema": SCHEMA},
+                   headers=auth)
+    assert r.status_code == 200, r.text
+
+    r = client.post(
+        "/api/v1/ingest/batch",
+        json=[
+            make_event(name, f"{ext}-1", schema_version=version, attributes={"amount": 5, "currency": "USD"}),
+            make_event(name, f"{ext}-2", schema_version=version, attributes={"amount": -1}),
+            make_event(name, f"{ext}-3", attributes={"free": True}),
+        ],
+        headers={"X-API-Key": "schema-key"},
+    )
+    items = r.json()["items"]
+    assert [i["status"] for i in items] == ["ACCEPTED", "REJECTED", "ACCEPTED"]
+
+    rows = db_session.query(Rejection).filter(Rejection.raw_ingestion_id == items[1]["raw_id"]).all()
+    assert sorted((x.category, x.field) for x in rows) == [
+        ("SCHEMA", "$.attributes.amount"),
+        ("SCHEMA", "$.attributes.currency"),
+    ]
+
+    # Validador compilado uma vez e reutilizado
+    r = client.post(
+        "/api/v1/ingest",
+        json=make_event(name, f"{ext}-4", schema_version=version, attributes={"amount": 1, "currency": "BRL"}),
+        headers={"X-API-Key": "schema-key"},
+    )
+    assert r.json()["status"] == "ACCEPTED"
+    assert schema_registry.stats()["compiled"] == 1
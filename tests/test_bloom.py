@@ -0,0 +1,76 @@
+"""
+Bloom prefilter tests.
+
+Ensures the scalable Bloom filter has no false negatives and that the
+per-source prefilter only sends probable hits to the database.
+"""
+import io
+import json
+import time
+from uuid import uuid4
+
+from app.core.bloom import ScalableBloomFilter
+from app.scripts.bulk_load import load_file
+from app.services.seen_keys import seen_keys
+from tests.conftest import ensure_source, make_event
+
+
+def test_scalable_bloom_has_no_false_negatives_and_bounded_fp_rate():
+    bloom = ScalableBloomFilter(initial_capacity=1000, fp_rate=0.01)
+    keys = [f"evt-{i}" for i in range(10_000)]
+    for k in keys:
+        bloom.add(k)
+
+    # Cresceu além da capacidade inicial sem perder chaves
+    assert len(bloom) == 10_000
+    assert all(bloom.might_contain(k) for k in keys)
+
+    false_positives = sum(bloom.might_contain(f"new-{i}") for i in range(10_000))
+    assert false_positives / 10_000 < 0.02
+    assert bloom.estimated_fp_rate() < 0.02
+    assert bloom.memory_bytes() > 0
+
+
+def test_seen_keys_prefilter_skips_new_keys(client, db_session, tmp_path):
+    name = f"bloom-src-{uuid4().hex}"
+    src = ensure_source(db_session, name, "bloom-key")
+    ext = uuid4().hex
+
+    r = client.post("/api/v1/ingest", json=make_event(name, f"{ext}-old"), headers={"X-API-Key": "bloom-key"})
+    assert r.status_code == 200, r.text
+
+    # Aquecimento a partir do raw_ingestion
+    keys = {(src.id, f"{ext}-old"), (src.id, f"{ext}-new")}
+    assert seen_keys.probable_hits(db_session, keys, wait=True) >= {(src.id, f"{ext}-old")}
+
+    # Inserções do próprio processo atualizam o filtro
+    client.post("/api/v1/ingest", json=make_event(name, f"{ext}-late"), headers={"X-API-Key": "bloom-key"})
+    assert (src.id, f"{ext}-late") in seen_keys.probable_hits(db_session, {(src.id, f"{ext}-late")}, wait=True)
+
+    # Bulk loader continua classificando duplicados corretamente com o pré-filtro
+    path = tmp_path / "events.ndjson"
+    path.write_text("\n".join(json.dumps(make_event(name, f"{ext}-{s}")) for s in ["old", "x1", "x2"]))
+    totals = load_file(db_session, path, out=io.StringIO())
+    assert (totals["accepted"], totals["duplicates"]) == (2, 1)
+
+    stats = seen_keys.stats()
+    assert stats["sources"] == 1
+    assert stats["keys"] >= 4
+    assert stats["memory_bytes"] > 0
+    assert stats["probes"] >= 6
+
+
+def test_cold_source_is_warmed_off_the_request_path(db_session):
+    # Sem wait: nenhuma varredura na chamada, todas as chaves contam como prováveis hits
+    source_id = 10**9 + 13
+    keys = {(source_id, "a"), (source_id, "b")}
+    assert seen_keys.probable_hits(db_session, keys) == keys
+
+    # Chave gravada durante o aquecimento entra no filtro quando ele fica pronto
+    seen_keys.add(source_id, "a")
+    for _ in range(200):
+        if seen_keys.stats()["sources"] == 1:
+            break
+        time.sleep(0.01)
+    assert seen_keys.stats()["sources"] == 1
+    assert seen_keys.probable_hits(db_session, keys) == {(source_id, "a")}
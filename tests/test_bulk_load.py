@@ -0,0 +1,80 @@
+"""
+Bulk loader tests.
+
+Ensures the COPY loader applies API validation/dedup semantics and resumes
+from its checkpoint.
+"""
+import gzip
+import io
+import json
+from uuid import uuid4
+
+from sqlalchemy import select
+
+from app.infra.db.models.raw_ingestion import RawIngestion
+from app.infra.db.models.rejection import Rejection
+from app.infra.db.models.trusted_event import TrustedEvent
+from app.scripts.bulk_load import load_checkpoint, load_file, save_checkpoint
+from tests.conftest import make_event
+
+
+def _raw(db, ext):
+    return db.execute(select(RawIngestion).where(RawIngestion.external_id == ext)).scalars().all()
+
+
+def test_bulk_load_ndjson_gz_with_api_semantics(db_session, tmp_path):
+    name = f"bulk-src-{uuid4().hex}"
+    ext = uuid4().hex
+    path = tmp_path / "events.ndjson.gz"
+    lines = [
+        json.dumps(make_event(name, f"{ext}-1")),
+        json.dumps(make_event(name, f"{ext}-2", event_type="INVALID")),
+        "{broken",
+        json.dumps(make_event(name, f"{ext}-1")),
+        json.dumps(make_event(name, f"{ext}-3")),
+    ]
+    path.write_bytes(gzip.compress("\n".join(lines).encode()))
+
+    totals = load_file(db_session, path, chunk_size=2, out=io.StringIO())
+    assert totals == {"accepted": 2, "rejected": 1, "duplicates": 1, "invalid": 1}
+
+    statuses = sorted(r.processing_status for r in _raw(db_session, f"{ext}-1"))
+    assert statuses == ["ACCEPTED", "DUPLICATE"]
+
+    rejected = _raw(db_session, f"{ext}-2")[0]
+    assert rejected.processing_status == "REJECTED"
+    assert db_session.execute(
+        select(Rejection).where(Rejection.raw_ingestion_id == rejected.id)
+    ).scalars().first() is not None
+
+    trusted = db_session.execute(
+        select(TrustedEvent).where(TrustedEvent.external_id == f"{ext}-3")
+    ).scalar_one()
+    assert trusted.raw_ingestion_id == _raw(db_session, f"{ext}-3")[0].id
+
+    assert load_checkpoint(path)["done"] is True
+
+
+def test_bulk_load_csv_resumes_from_checkpoint(db_session, tmp_path):
+    name = f"bulk-src-{uuid4().hex}"
+    ext = uuid4().hex
+    path = tmp_path / "events.csv"
+    header = "source,external_id,entity_id,event_type,event_status,event_timestamp,attributes\n"
+    rows = "".join(
+        f'{name},{ext}-{i},ent-1,ORDER,NEW,2026-02-10T00:00:00Z,"{{""n"": {i}}}"\n' for i in range(1, 5)
+    )
+    path.write_text(header + rows)
+
+    # Execução anterior interrompida depois do registro 2
+    save_checkpoint(path, {
+        "line": 2,
+        "done": False,
+        "totals": {"accepted": 2, "rejected": 0, "duplicates": 0, "invalid": 0},
+    })
+
+    totals = load_file(db_session, path, out=io.StringIO())
+    assert totals["accepted"] == 4
+
+    assert _raw(db_session, f"{ext}-1") == []
+    raw = _raw(db_session, f"{ext}-4")[0]
+    assert json.loads(raw.payload_raw)["attributes"] == {"n": 4}
@@ -0,0 +1,93 @@
+"""
+CPU stage tests.
+
+Ensures lines prepared by the worker processes (parse, canonical payload,
+hash and validation) give the same ingest outcome as the in-process path.
+"""
+import io
+import json
+from uuid import uuid4
+
+import pytest
+
+from app.api.routes import ingest as ingest_routes
+from app.scripts.bulk_load import load_file
+from app.services.cpu_stage import CpuStage, prepare_lines, to_prepared, to_request
+from app.services.ingest_service import _canonical
+from tests.conftest import ensure_source, make_event
+
+
+@pytest.fixture
+def stage():
+    stage = CpuStage(workers=1, chunk_size=2)
+    yield stage
+    stage.stop()
+
+
+def test_prepare_lines_matches_in_process_path(db_session):
+    name = f"cpu-src-{uuid4().hex}"
+    ext = uuid4().hex
+    lines = [
+        json.dumps(make_event(name, f"{ext}-1")).encode(),
+        b"{broken",
+        json.dumps(make_event(name, f"{ext}-2", event_type="INVALID")).encode(),
+        json.dumps(make_event("other_source", f"{ext}-3")).encode(),
+    ]
+
+    ok, broken, rejected, other = prepare_lines(lines, source_id=0, source=name)
+
+    assert ok[0] == "OK" and ok[4] == []
+    req = to_request(ok[1])
+    assert (req.source, req.external_id) == (name, f"{ext}-1")
+    assert to_prepared(ok)[0] == _canonical(req)
+
+    assert broken == ("INVALID", {"error": "invalid_json"})
+    assert rejected[0] == "OK" and rejected[4]
+    assert other == ("INVALID", {"error": "source_mismatch"})
+
+
+def test_bulk_load_through_worker_processes(db_session, tmp_path, stage):
+    name = f"cpu-src-{uuid4().hex}"
+    ext = uuid4().hex
+    path = tmp_path / "events.ndjson"
+    path.write_text("\n".join([
+        json.dumps(make_event(name, f"{ext}-1")),
+        json.dumps(make_event(name, f"{ext}-2", event_type="INVALID")),
+        "{broken",
+        json.dumps(make_event(name, f"{ext}-1")),
+        json.dumps(make_event(name, f"{ext}-3")),
+    ]))
+
+    out = io.StringIO()
+    totals = load_file(db_session, path, chunk_size=2, out=out, stage=stage)
+
+    assert totals == {"accepted": 2, "rejected": 1, "duplicates": 1, "invalid": 1}
+    assert f"{path}:3: invalid_json" in out.getvalue()
+
+
+def test_ingest_stream_through_worker_processes(client, db_session, monkeypatch, stage):
+    monkeypatch.setattr(ingest_routes, "cpu_stage", stage)
+    name = f"cpu-src-{uuid4().hex}"
+    ensure_source(db_session, name, "cpu-key")
+    ext = uuid4().hex
+
+    body = "\n".join([
+        json.dumps(make_event(name, f"{ext}-1")),
+        "{not json",
+        json.dumps(make_event(name, f"{ext}-2", event_type="INVALID")),
+        json.dumps(make_event("other_source", f"{ext}-3")),
+        json.dumps(make_event(name, f"{ext}-1")),
+    ]).encode()
+
+    r = client.post(
+        f"/api/v1/ingest/stream?source={name}",
+        content=body,
+        headers={"X-API-Key": "cpu-key", "Content-Type": "application/x-ndjson"},
+    )
+    assert r.status_code == 200, r.text
+    data = r.json()
+
+    assert (data["accepted"], data["rejected"], data["duplicates"], data["invalid"]) == (1, 1, 1, 2)
+    errors = {e["line"]: e["error"] for e in data["errors"]}
+    assert errors[2] == "invalid_json"
+    assert errors[4] == "source_mismatch"
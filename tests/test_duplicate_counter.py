@@ -0,0 +1,57 @@
+"""
+Duplicate counter mode tests.
+
+Ensures duplicates increment duplicate_tracker instead of writing full
+DUPLICATE raw rows, and that metrics include the counted duplicates.
+"""
+from uuid import uuid4
+
+from app.core.settings import settings
+from app.infra.db.models.duplicate_tracker import DuplicateTracker
+from app.infra.db.models.raw_ingestion import RawIngestion
+from app.infra.db.repositories.metrics_repo import get_metrics
+from tests.conftest import ensure_source, make_event
+
+
+def test_duplicates_are_counted_instead_of_stored(client, db_session, monkeypatch):
+    monkeypatch.setattr(settings, "INGEST_DUPLICATE_MODE", "counter")
+    monkeypatch.setattr(settings, "INGEST_DUPLICATE_KEEP_CHANGED", True)
+
+    name = f"dup-src-{uuid4().hex}"
+    src = ensure_source(db_session, name, "dup-key")
+    headers = {"X-API-Key": "dup-key"}
+    ext = uuid4().hex
+
+    def raw_statuses():
+        return sorted(
+            r.processing_status for r in db_session.query(RawIngestion).filter(
+                RawIngestion.source_id == src.id, RawIngestion.external_id == ext
+            )
+        )
+
+    first = client.post("/api/v1/ingest", json=make_event(name, ext), headers=headers).json()
+    before = get_metrics(db_session, source_id=src.id)["duplicates"]
+
+    # Reenvio idêntico (single + lote com repetição interna) → só contador
+    r = client.post("/api/v1/ingest", json=make_event(name, ext), headers=headers).json()
+    assert (r["status"], r["raw_id"]) == ("DUPLICATE", first["raw_id"])
+
+    r = client.post(
+        "/api/v1/ingest/batch",
+        json=[make_event(name, ext), make_event(name, f"{ext}-b"), make_event(name, f"{ext}-b")],
+        headers=headers,
+    ).json()
+    assert [i["status"] for i in r["items"]] == ["DUPLICATE", "ACCEPTED", "DUPLICATE"]
+    assert r["items"][2]["raw_id"] == r["items"][1]["raw_id"]
+
+    assert raw_statuses() == ["ACCEPTED"]
+    tracker = db_session.get(DuplicateTracker, (src.id, ext))
+    assert tracker.duplicate_count == 2
+
+    # Payload diferente com KEEP_CHANGED → RAW DUPLICATE completo
+    r = client.post("/api/v1/ingest", json=make_event(name, ext, entity_id="ent-2"), headers=headers).json()
+    assert r["status"] == "DUPLICATE" and r["raw_id"] != first["raw_id"]
+    assert raw_statuses() == ["ACCEPTED", "DUPLICATE"]
+
+    # Métricas somam RAW DUPLICATE + contador
+    assert get_metrics(db_session, source_id=src.id)["duplicates"] == before + 4
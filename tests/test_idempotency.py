@@ -0,0 +1,156 @@
+"""
+Idempotency-Key tests.
+
+Ensures retries with the same key replay the stored response without
+running the ingest path again, and that keys are scoped per source.
+"""
+import asyncio
+import threading
+import time
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import func, select
+
+from app.infra.db.models.idempotency_key import IdempotencyKey
+from app.infra.db.models.raw_ingestion import RawIngestion
+from app.infra.db.models.source_system import SourceSystem
+from app.services import idempotency as idempotency_module
+from app.services.idempotency import IdempotencyError, idempotency_store
+from tests.conftest import AsyncSessionOverSync, ensure_source, make_event
+
+
+def _raw_count(db_session, external_id: str) -> int:
+    return db_session.execute(
+        select(func.count()).select_from(RawIngestion).where(RawIngestion.external_id == external_id)
+    ).scalar_one()
+
+
+def _source_id(db_session, name: str) -> int:
+    return db_session.execute(select(SourceSystem.id).where(SourceSystem.name == name)).scalar_one()
+
+
+def test_retry_with_same_key_replays_stored_response(client, db_session):
+    name = f"idem-src-{uuid4().hex}"
+    ensure_source(db_session, name, "idem-key")
+    ev = make_event(name, uuid4().hex)
+    headers = {"X-API-Key": "idem-key", "Idempotency-Key": uuid4().hex}
+
+    first = client.post("/api/v1/ingest", json=ev, headers=headers)
+    assert first.status_code == 200, first.text
+    assert "Idempotent-Replayed" not in first.headers
+
+    # Sem o LRU em memória: a resposta vem da tabela
+    idempotency_store.clear()
+    again = client.post("/api/v1/ingest", json=ev, headers=headers)
+    assert again.status_code == 200, again.text
+    assert again.headers["Idempotent-Replayed"] == "true"
+    assert again.json() == first.json()
+    assert again.json()["status"] == "ACCEPTED"
+
+    # Um único RAW: o retry não passou pela ingestão
+    assert _raw_count(db_session, ev["external_id"]) == 1
+    row = db_session.get(IdempotencyKey, (_source_id(db_session, name), headers["Idempotency-Key"]))
+    assert row.status_code == 200
+    assert row.response == first.json()
+
+
+def test_reused_key_with_other_payload_is_rejected(client, db_session):
+    name = f"idem-src-{uuid4().hex}"
+    ensure_source(db_session, name, "idem-key")
+    headers = {"X-API-Key": "idem-key", "Idempotency-Key": uuid4().hex}
+
+    assert client.post("/api/v1/ingest", json=make_event(name, uuid4().hex), headers=headers).status_code == 200
+
+    r = client.post("/api/v1/ingest", json=make_event(name, uuid4().hex), headers=headers)
+    assert r.status_code == 422
+    assert r.json()["detail"] == "idempotency_key_reused"
+
+
+def test_keys_are_scoped_per_source(client, db_session):
+    key = uuid4().hex
+    results = []
+    for n in range(2):
+        name = f"idem-src-{uuid4().hex}"
+        ensure_source(db_session, name, f"idem-key-{n}")
+        r = client.post(
+            "/api/v1/ingest/batch",
+            json=[make_event(name, uuid4().hex)],
+            headers={"X-API-Key": f"idem-key-{n}", "Idempotency-Key": key},
+        )
+        assert r.status_code == 200, r.text
+        assert "Idempotent-Replayed" not in r.headers
+        results.append(r.json())
+    assert results[0]["items"][0]["raw_id"] != results[1]["items"][0]["raw_id"]
+
+
+def test_concurrent_call_waits_for_in_flight_result(db_session, monkeypatch):
+    source_id = 10**9 + 7  # a espera em memória não consulta o banco
+    key = uuid4().hex
+    calls = []
+    second = {}
+
+    async def second_run():
+        calls.append("second")
+        return {}
+
+    async def first_run():
+        calls.append("first")
+        second["task"] = asyncio.ensure_future(
+            idempotency_store.run_async(None, source_id, key, "fp", second_run)
+        )
+        await asyncio.sleep(0.2)
+        return {"status": "ACCEPTED"}
+
+    # Dono da chave sem banco: claim/store simulados no repositório
+    monkeypatch.setattr(idempotency_module, "get_idempotency_key", lambda db, s, k: None)
+    monkeypatch.setattr(idempotency_module, "claim_idempotency_key", lambda *a: True)
+    monkeypatch.setattr(idempotency_module, "store_idempotency_response", lambda *a: None)
+    monkeypatch.setattr(idempotency_module, "purge_expired_idempotency_keys", lambda db: 0)
+
+    async def scenario():
+        first = await idempotency_store.run_async(AsyncSessionOverSync(db_session), source_id, key, "fp", first_run)
+        return first, await asyncio.wait_for(second["task"], 5)
+
+    first, waited = asyncio.run(scenario())
+
+    assert first == (200, {"status": "ACCEPTED"}, False)
+    assert waited == (200, {"status": "ACCEPTED"}, True)
+    assert calls == ["first"]
+
+
+def test_sync_run_waits_for_in_flight_result(db_session, monkeypatch):
+    source_id = 10**9 + 8  # a espera em memória não consulta o banco
+    key = uuid4().hex
+    calls = []
+    waiter_result = {}
+
+    def second_call():
+        waiter_result["value"] = idempotency_store.run(None, source_id, key, "fp", lambda: calls.append("second"))
+
+    def first_run():
+        calls.append("first")
+        t = threading.Thread(target=second_call)
+        t.start()
+        time.sleep(0.2)
+        waiter_result["thread"] = t
+        return {"status": "ACCEPTED"}
+
+    # Dono da chave sem banco: claim/store simulados no repositório
+    monkeypatch.setattr(idempotency_module, "get_idempotency_key", lambda db, s, k: None)
+    monkeypatch.setattr(idempotency_module, "claim_idempotency_key", lambda *a: True)
+    monkeypatch.setattr(idempotency_module, "store_idempotency_response", lambda *a: None)
+    monkeypatch.setattr(idempotency_module, "purge_expired_idempotency_keys", lambda db: 0)
+
+    status, body, replayed = idempotency_store.run(db_session, source_id, key, "fp", first_run)
+    waiter_result["thread"].join(5)
+
+    assert (status, body, replayed) == (200, {"status": "ACCEPTED"}, False)
+    assert waiter_result["value"] == (200, {"status": "ACCEPTED"}, True)
+    assert calls == ["first"]
+
+
+def test_invalid_key_is_rejected():
+    with pytest.raises(IdempotencyError) as exc:
+        asyncio.run(idempotency_store.run_async(None, 1, "x" * 201, "fp", dict))
+    assert exc.value.reason == "invalid_idempotency_key"
@@ -1,9 +1,17 @@
 """
 Ingestion tests.
 
-Ensures ingest endpoint requires API key.
+Ensures ingest endpoint requires API key and persists the final status.
 """
-from tests.conftest import ensure_user, login
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from tests.conftest import ensure_user, login, ensure_source, make_event
+from app.infra.db.models.raw_ingestion import RawIngestion
+from app.infra.db.models.rejection import Rejection
+from app.infra.db.repositories.raw_repo import insert_raw_if_new
+from app.core.settings import settings
+from app.services.ingest_service import recent_outcomes
 
 
 def test_ingest_still_works_requires_api_key(client, db_session):
@@ -19,4 +27,98 @@ def test_ingest_still_works_requires_api_key(client, db_session):
         "severity": "low",
         "payload": {"a": 1},
     })
-    assert r.status_code in (401, 422), r.text
\ No newline at end of file
+    assert r.status_code in (401, 422), r.text
+
+def test_ingest_writes_raw_once_with_final_status(client, db_session):
+    name = f"ing-src-{uuid4().hex}"
+    ensure_source(db_session, name, "ing-key")
+    headers = {"X-API-Key": "ing-key"}
+
+    # Evento válido → ACCEPTED com TRUSTED
+    r = client.post("/api/v1/ingest", json=make_event(name, "ok-1"), headers=headers)
+    assert r.status_code == 200, r.text
+    ok = r.json()
+    assert ok["status"] == "ACCEPTED" and ok["trusted_id"]
+    assert db_session.get(RawIngestion, ok["raw_id"]).processing_status == "ACCEPTED"
+
+    # Evento inválido → REJECTED com rejeições na mesma transação
+    r = client.post(
+        "/api/v1/ingest",
+        json=make_event(name, "bad-1", event_type="X", event_status="Y"),
+        headers=headers,
+    )
+    bad = r.json()
+    assert bad["status"] == "REJECTED" and bad["error_count"] == 2
+    raw = db_session.get(RawIngestion, bad["raw_id"])
+    assert (raw.processing_status, raw.error_count) == ("REJECTED", 2)
+    assert db_session.query(Rejection).filter(Rejection.raw_ingestion_id == raw.id).count() == 2
+
+    # Reenvio → DUPLICATE
+    r = client.post("/api/v1/ingest", json=make_event(name, "ok-1"), headers=headers)
+    assert r.json()["status"] == "DUPLICATE"
+
+
+def test_raw_live_key_is_unique_and_loser_gets_no_id(db_session):
+    src = ensure_source(db_session, f"ing-src-{uuid4().hex}", "ing-key")
+    row = {
+        "source_id": src.id,
+        "external_id": "race-1",
+        "event_timestamp": datetime.now(timezone.utc),
+        "payload_raw": "{}",
+        "payload_hash": "0" * 64,
+        "processing_status": "ACCEPTED",
+        "request_id": uuid4().hex,
+    }
+
+    # Primeira inserção vence; a segunda cai no ON CONFLICT (sem erro de unicidade)
+    assert insert_raw_if_new(db_session, row) is not None
+    assert insert_raw_if_new(db_session, dict(row, request_id=uuid4().hex)) is None
+
+
+def test_source_cache_is_invalidated_on_key_rotation(client, db_session):
+    name = f"ing-src-{uuid4().hex}"
+    ensure_source(db_session, name, "old-key")
+
+    # Primeira chamada popula o cache de fontes / chave verificada
+    r = client.post("/api/v1/ingest", json=make_event(name, "rot-1"), headers={"X-API-Key": "old-key"})
+    assert r.status_code == 200, r.text
+
+    # Rotação da chave (UPDATE via ORM) invalida a entrada em cache
+    ensure_source(db_session, name, "new-key")
+
+    r = client.post("/api/v1/ingest", json=make_event(name, "rot-2"), headers={"X-API-Key": "old-key"})
+    assert r.status_code == 401
+
+    r = client.post("/api/v1/ingest", json=make_event(name, "rot-3"), headers={"X-API-Key": "new-key"})
+    assert r.status_code == 200, r.text
+
+
+def test_identical_resend_replays_original_outcome(client, db_session, monkeypatch):
+    monkeypatch.setattr(settings, "INGEST_HASH_REPLAY_ENABLED", True)
+    name = f"ing-src-{uuid4().hex}"
+    src = ensure_source(db_session, name, "ing-key")
+    headers = {"X-API-Key": "ing-key"}
+    ext = uuid4().hex
+
+    first = client.post("/api/v1/ingest", json=make_event(name, ext), headers=headers).json()
+    assert first["status"] == "ACCEPTED"
+
+    def raw_count():
+        return db_session.query(RawIngestion).filter(
+            RawIngestion.source_id == src.id, RawIngestion.external_id == ext
+        ).count()
+
+    # Reenvio idêntico (cache em memória e, sem cache, pelo índice do hash)
+    for _ in range(2):
+        r = client.post("/api/v1/ingest", json=make_event(name, ext), headers=headers).json()
+        assert r["replayed"] is True
+        assert (r["status"], r["raw_id"], r["trusted_id"], r["request_id"]) == (
+            "ACCEPTED", first["raw_id"], first["trusted_id"], first["request_id"]
+        )
+        recent_outcomes.clear()
+    assert raw_count() == 1
+
+    # Mesmo external_id com payload diferente continua DUPLICATE
+    r = client.post("/api/v1/ingest", json=make_event(name, ext, entity_id="ent-2"), headers=headers).json()
+    assert r["status"] == "DUPLICATE"
+    assert raw_count() == 2
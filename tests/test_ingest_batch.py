@@ -0,0 +1,95 @@
+"""
+Batch ingestion tests.
+
+Ensures the batch endpoint authenticates once and classifies each item.
+"""
+from uuid import uuid4
+
+from app.core.settings import settings
+from tests.conftest import ensure_source, make_event
+
+
+def test_ingest_batch_returns_status_per_item(client, db_session):
+    name = f"batch-src-{uuid4().hex}"
+    ensure_source(db_session, name, "batch-key")
+    ext = uuid4().hex
+
+    r = client.post(
+        "/api/v1/ingest/batch",
+        json=[
+            make_event(name, f"{ext}-1"),
+            make_event(name, f"{ext}-2", event_type="INVALID"),
+            make_event(name, f"{ext}-1"),
+        ],
+        headers={"X-API-Key": "batch-key"},
+    )
+    assert r.status_code == 200, r.text
+    body = r.json()
+
+    assert body["total"] == 3
+    assert [i["status"] for i in body["items"]] == ["ACCEPTED", "REJECTED", "DUPLICATE"]
+    assert body["items"][0]["trusted_id"] is not None
+    assert body["items"][1]["error_count"] == 1
+    assert (body["accepted"], body["rejected"], body["duplicates"]) == (1, 1, 1)
+
+    # Reenvio do lote: tudo vira DUPLICATE
+    r = client.post(
+        "/api/v1/ingest/batch",
+        json=[make_event(name, f"{ext}-1"), make_event(name, f"{ext}-2")],
+        headers={"X-API-Key": "batch-key"},
+    )
+    assert r.status_code == 200, r.text
+    assert r.json()["duplicates"] == 2
+
+
+def test_ingest_batch_rejects_mixed_sources(client, db_session):
+    name = f"batch-src-{uuid4().hex}"
+    ensure_source(db_session, name, "batch-key")
+
+    r = client.post(
+        "/api/v1/ingest/batch",
+        json=[make_event(name, "x-1"), make_event("other_source", "x-2")],
+        headers={"X-API-Key": "batch-key"},
+    )
+    assert r.status_code == 400
+    assert r.json()["detail"] == "batch_mixed_sources"
+
+
+def test_ingest_batch_requires_api_key(client, db_session):
+    name = f"batch-src-{uuid4().hex}"
+    ensure_source(db_session, name, "batch-key")
+
+    r = client.post("/api/v1/ingest/batch", json=[make_event(name, "x-1")])
+    assert r.status_code == 401
+
+
+def test_ingest_batch_replays_identical_items(client, db_session, monkeypatch):
+    monkeypatch.setattr(settings, "INGEST_HASH_REPLAY_ENABLED", True)
+    name = f"batch-src-{uuid4().hex}"
+    ensure_source(db_session, name, "batch-key")
+    ext = uuid4().hex
+    headers = {"X-API-Key": "batch-key"}
+
+    first = client.post(
+        "/api/v1/ingest/batch",
+        json=[make_event(name, f"{ext}-1"), make_event(name, f"{ext}-2", event_type="INVALID")],
+        headers=headers,
+    ).json()
+
+    r = client.post(
+        "/api/v1/ingest/batch",
+        json=[
+            make_event(name, f"{ext}-1"),
+            make_event(name, f"{ext}-2", event_type="INVALID"),
+            make_event(name, f"{ext}-1", entity_id="ent-2"),
+        ],
+        headers=headers,
+    )
+    assert r.status_code == 200, r.text
+    items = r.json()["items"]
+
+    assert [(i["status"], i["replayed"]) for i in items] == [
+        ("ACCEPTED", True), ("REJECTED", True), ("DUPLICATE", False),
+    ]
+    assert [i["raw_id"] for i in items[:2]] == [i["raw_id"] for i in first["items"]]
+    assert items[1]["error_count"] == 1
@@ -0,0 +1,115 @@
+"""
+Compressed ingest body tests.
+
+Ensures ingest routes accept gzip/zstd and MessagePack/CBOR bodies
+and refuse decompression bombs.
+"""
+import gzip
+import json
+from uuid import uuid4
+
+import pytest
+
+from app.core.settings import settings
+from tests.conftest import ensure_source, make_event
+
+
+def test_ingest_batch_accepts_gzip_body(client, db_session):
+    name = f"gz-src-{uuid4().hex}"
+    ensure_source(db_session, name, "gz-key")
+    ext = uuid4().hex
+
+    body = gzip.compress(json.dumps([make_event(name, f"{ext}-{i}") for i in range(3)]).encode())
+    r = client.post(
+        "/api/v1/ingest/batch",
+        content=body,
+        headers={"X-API-Key": "gz-key", "Content-Type": "application/json", "Content-Encoding": "gzip"},
+    )
+    assert r.status_code == 200, r.text
+    assert r.json()["accepted"] == 3
+
+
+def test_ingest_stream_accepts_zstd_body(client, db_session):
+    zstandard = pytest.importorskip("zstandard")
+
+    name = f"zstd-src-{uuid4().hex}"
+    ensure_source(db_session, name, "zstd-key")
+    ext = uuid4().hex
+
+    lines = "\n".join(json.dumps(make_event(name, f"{ext}-{i}")) for i in range(5)).encode()
+    r = client.post(
+        f"/api/v1/ingest/stream?source={name}",
+        content=zstandard.ZstdCompressor().compress(lines),
+        headers={"X-API-Key": "zstd-key", "Content-Type": "application/x-ndjson", "Content-Encoding": "zstd"},
+    )
+    assert r.status_code == 200, r.text
+    assert r.json()["accepted"] == 5
+
+
+def test_ingest_rejects_bombs_and_unknown_encodings(client, db_session, monkeypatch):
+    name = f"gz-src-{uuid4().hex}"
+    ensure_source(db_session, name, "gz-key")
+    headers = {"X-API-Key": "gz-key", "Content-Type": "application/json"}
+
+    # Corpo descomprimido acima de MAX_BODY_BYTES
+    monkeypatch.setattr(settings, "MAX_BODY_BYTES", 10_000)
+    bomb = gzip.compress(b"[" + b" " * 1_000_000 + b"]")
+    r = client.post("/api/v1/ingest/batch", content=bomb, headers={**headers, "Content-Encoding": "gzip"})
+    assert r.status_code == 413
+    assert r.json()["detail"] == "decompressed_body_too_large"
+
+    # Stream sem teto absoluto continua limitado pela razão de descompressão
+    r = client.post(
+        f"/api/v1/ingest/stream?source={name}",
+        content=gzip.compress(b"\n" * 5_000_000),
+        headers={**headers, "Content-Type": "application/x-ndjson", "Content-Encoding": "gzip"},
+    )
+    assert r.status_code == 413
+    assert r.json()["detail"] == "decompression_ratio_exceeded"
+
+    r = client.post("/api/v1/ingest/batch", content=b"[]", headers={**headers, "Content-Encoding": "br"})
+    assert r.status_code == 415
+
+    r = client.post("/api/v1/ingest/batch", content=b"not gzip", headers={**headers, "Content-Encoding": "gzip"})
+    assert r.status_code == 400
+
+
+def test_ingest_accepts_msgpack_and_cbor_bodies(client, db_session):
+    msgpack = pytest.importorskip("msgpack")
+    cbor2 = pytest.importorskip("cbor2")
+
+    name = f"bin-src-{uuid4().hex}"
+    ensure_source(db_session, name, "bin-key")
+    ext = uuid4().hex
+
+    r = client.post(
+        "/api/v1/ingest",
+        content=msgpack.packb(make_event(name, f"{ext}-1")),
+        headers={"X-API-Key": "bin-key", "Content-Type": "application/msgpack"},
+    )
+    assert r.status_code == 200, r.text
+    assert r.json()["status"] == "ACCEPTED"
+
+    # Lote em CBOR + gzip: mesma validação e mesmo caminho de persistência
+    body = gzip.compress(cbor2.dumps([make_event(name, f"{ext}-1"), make_event(name, f"{ext}-2")]))
+    r = client.post(
+        "/api/v1/ingest/batch",
+        content=body,
+        headers={"X-API-Key": "bin-key", "Content-Type": "application/cbor", "Content-Encoding": "gzip"},
+    )
+    assert r.status_code == 200, r.text
+    assert [i["status"] for i in r.json()["items"]] == ["DUPLICATE", "ACCEPTED"]
+
+    # Schema inválido continua 422; corpo ilegível é 400
+    r = client.post(
+        "/api/v1/ingest",
+        content=msgpack.packb({"source": name}),
+        headers={"X-API-Key": "bin-key", "Content-Type": "application/msgpack"},
+    )
+    assert r.status_code == 422
+    r = client.post(
+        "/api/v1/ingest",
+        content=b"\xc1",
+        headers={"X-API-Key": "bin-key", "Content-Type": "application/msgpack"},
+    )
+    assert r.status_code == 400
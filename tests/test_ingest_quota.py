@@ -0,0 +1,135 @@
+"""
+Per-source ingest quota tests.
+
+Ensures the token bucket admits up to the burst, answers 429 with
+Retry-After when exhausted, charges every event (batch, validate and
+stream), never charges an Idempotency-Key replay and only throttles the
+noisy source.
+"""
+import json
+from uuid import uuid4
+
+from app.core import pipeline_metrics
+from app.infra.db.models.raw_ingestion import RawIngestion
+from tests.conftest import ensure_source, make_event
+
+
+def _source_with_quota(db_session, api_key: str, rate: float | None, burst: int | None) -> str:
+    name = f"quota-src-{uuid4().hex}"
+    src = ensure_source(db_session, name, api_key)
+    src.quota_rate_per_second = rate
+    src.quota_burst = burst
+    db_session.flush()
+    return name
+
+
+def test_over_quota_returns_429_with_retry_after(client, db_session):
+    name = _source_with_quota(db_session, "quota-key", rate=0.1, burst=2)
+    headers = {"X-API-Key": "quota-key"}
+
+    for _ in range(2):
+        r = client.post("/api/v1/ingest", json=make_event(name, uuid4().hex), headers=headers)
+        assert r.status_code == 200, r.text
+
+    r = client.post("/api/v1/ingest", json=make_event(name, uuid4().hex), headers=headers)
+    assert r.status_code == 429
+    assert r.json()["detail"] == "quota_exceeded"
+    # 1 token a 0.1/s → ~10 s até a recarga
+    assert 1 <= int(r.headers["Retry-After"]) <= 10
+
+    usage = pipeline_metrics.snapshot()["collectors"]["ingest_quota"][name]
+    assert (usage["admitted"], usage["throttled"]) == (2, 1)
+
+
+def test_batch_costs_one_token_per_event(client, db_session):
+    name = _source_with_quota(db_session, "quota-key", rate=0.01, burst=3)
+    headers = {"X-API-Key": "quota-key"}
+
+    r = client.post(
+        "/api/v1/ingest/batch",
+        json=[make_event(name, uuid4().hex) for _ in range(2)],
+        headers=headers,
+    )
+    assert r.status_code == 200, r.text
+
+    r = client.post(
+        "/api/v1/ingest/batch",
+        json=[make_event(name, uuid4().hex) for _ in range(2)],
+        headers=headers,
+    )
+    assert r.status_code == 429
+
+
+def test_batch_larger_than_burst_is_refused(client, db_session):
+    name = _source_with_quota(db_session, "quota-key", rate=100, burst=3)
+    headers = {"X-API-Key": "quota-key"}
+
+    events = [make_event(name, uuid4().hex) for _ in range(4)]
+    r = client.post("/api/v1/ingest/batch", json=events, headers=headers)
+    assert r.status_code == 413
+    assert r.json()["detail"] == "batch_exceeds_quota_burst"
+
+    r = client.post("/api/v1/ingest/validate", json=events, headers=headers)
+    assert r.status_code == 413
+
+    r = client.post("/api/v1/ingest/batch", json=events[:3], headers=headers)
+    assert r.status_code == 200, r.text
+
+
+def test_validate_costs_one_token_per_item(client, db_session):
+    name = _source_with_quota(db_session, "quota-key", rate=0.01, burst=3)
+    headers = {"X-API-Key": "quota-key"}
+
+    events = [make_event(name, uuid4().hex) for _ in range(2)]
+    assert client.post("/api/v1/ingest/validate", json=events, headers=headers).status_code == 200
+    assert client.post("/api/v1/ingest/validate", json=events, headers=headers).status_code == 429
+
+
+def test_stream_is_charged_per_chunk(client, db_session):
+    name = _source_with_quota(db_session, "quota-key", rate=0.01, burst=2)
+    ids = [uuid4().hex for _ in range(5)]
+    body = "\n".join(json.dumps(make_event(name, ext)) for ext in ids).encode()
+
+    # Chunks limitados à rajada: o primeiro consome o bucket, o segundo é recusado
+    r = client.post(
+        f"/api/v1/ingest/stream?source={name}",
+        content=body,
+        headers={"X-API-Key": "quota-key", "Content-Type": "application/x-ndjson"},
+    )
+    assert r.status_code == 429
+    assert r.json()["detail"] == "quota_exceeded"
+    assert db_session.query(RawIngestion).filter(RawIngestion.external_id.in_(ids)).count() == 2
+
+
+def test_idempotent_replay_is_served_after_the_bucket_is_exhausted(client, db_session):
+    name = _source_with_quota(db_session, "quota-key", rate=0.01, burst=1)
+    event = make_event(name, uuid4().hex)
+    headers = {"X-API-Key": "quota-key", "Idempotency-Key": uuid4().hex}
+
+    first = client.post("/api/v1/ingest", json=event, headers=headers)
+    assert first.status_code == 200, first.text
+
+    # Bucket vazio: o retry da mesma chave recebe a resposta gravada, sem 429
+    retry = client.post("/api/v1/ingest", json=event, headers=headers)
+    assert retry.status_code == 200, retry.text
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json()
+
+    r = client.post("/api/v1/ingest", json=make_event(name, uuid4().hex), headers={"X-API-Key": "quota-key"})
+    assert r.status_code == 429
+
+
+def test_quota_only_throttles_its_source(client, db_session):
+    noisy = _source_with_quota(db_session, "noisy-key", rate=0.01, burst=1)
+    quiet = _source_with_quota(db_session, "quiet-key", rate=None, burst=None)
+
+    assert client.post(
+        "/api/v1/ingest", json=make_event(noisy, uuid4().hex), headers={"X-API-Key": "noisy-key"}
+    ).status_code == 200
+    assert client.post(
+        "/api/v1/ingest", json=make_event(noisy, uuid4().hex), headers={"X-API-Key": "noisy-key"}
+    ).status_code == 429
+
+    for _ in range(3):
+        r = client.post("/api/v1/ingest", json=make_event(quiet, uuid4().hex), headers={"X-API-Key": "quiet-key"})
+        assert r.status_code == 200, r.text
@@ -0,0 +1,199 @@
+"""
+Ingest spool tests.
+
+Covers CRC-framed segment round trip, torn-tail tolerance, corrupt-frame
+resync and quarantine, orphaned slot adoption, restart
+recovery of open segments and draining into the database (a chunk
+replayed after a crash before its checkpoint is deduplicated).
+"""
+from uuid import uuid4
+
+from sqlalchemy.orm import Session
+
+from tests.conftest import engine, ensure_source, make_event
+from app.infra.db.models.raw_ingestion import RawIngestion
+from app.infra.spool import Spool
+from app.services.spool_worker import SpoolWorker
+
+
+def test_spool_round_trip_and_torn_tail(tmp_path):
+    spool = Spool(str(tmp_path), segment_bytes=1 << 20)
+    spool.open()
+    spool.append({"n": 1})
+    spool.append({"n": 2, "txt": "ação"})
+    spool.seal()
+
+    [segment] = spool.sealed_segments()
+
+    # Simula crash no meio de um append: cauda truncada é ignorada
+    with open(segment, "ab") as f:
+        f.write(b"\x00\x00\x00\x10\x00")
+
+    records = [r for _, r in Spool.read(segment)]
+    assert records == [{"n": 1}, {"n": 2, "txt": "ação"}]
+
+    # Checkpoint retoma a partir do offset salvo
+    first_offset, _ = next(Spool.read(segment))
+    Spool.save_checkpoint(segment, first_offset)
+    assert [r for _, r in Spool.read(segment, Spool.load_checkpoint(segment))] == [{"n": 2, "txt": "ação"}]
+    spool.close()
+
+
+def test_spool_reopen_seals_leftover_open_segment(tmp_path):
+    spool = Spool(str(tmp_path), segment_bytes=1 << 20)
+    spool.open()
+    spool.append({"n": 1})
+
+    # "Crash": o segmento fica .open e o lock é liberado
+    spool._active.close()
+    spool._active = None
+    spool.close()
+
+    restarted = Spool(str(tmp_path), segment_bytes=1 << 20)
+    restarted.open()
+    assert restarted.dir == spool.dir
+    assert len(restarted.sealed_segments()) == 1
+    restarted.close()
+
+
+def test_corrupt_frame_resyncs_and_segment_is_quarantined(tmp_path):
+    worker = SpoolWorker(spool=Spool(str(tmp_path), segment_bytes=1 << 20), session_factory=None,
+                         chunk_size=10, seal_ms=0)
+    worker.spool.open()
+    for n in range(3):
+        worker.spool.append({"n": n})
+    worker.spool.seal()
+    [segment] = worker.spool.sealed_segments()
+
+    # Corrompe um byte do payload do registro do meio
+    data = bytearray(segment.read_bytes())
+    first_end, _ = next(Spool.read(segment))
+    data[first_end + 10] ^= 0xFF
+    segment.write_bytes(bytes(data))
+
+    corrupt = []
+    assert [r for _, r in Spool.read(segment, on_corrupt=corrupt.append)] == [{"n": 0}, {"n": 2}]
+    assert corrupt == [first_end]
+
+    # Registros íntegros são gravados e o arquivo fica em quarentena (não é apagado)
+    persisted = []
+    worker._persist = persisted.extend
+    worker.drain_segment(segment)
+    assert persisted == [{"n": 0}, {"n": 2}]
+    assert not segment.exists()
+    assert len(list(segment.parent.glob(f"{segment.stem}.*.bad"))) == 1
+    assert worker.spool.sealed_segments() == []
+
+    # Mesmo número de segmento corrompido de novo: a primeira quarentena é preservada
+    segment.write_bytes(bytes(data))
+    worker.drain_segment(segment)
+    assert len(list(segment.parent.glob(f"{segment.stem}.*.bad"))) == 2
+    worker.spool.close()
+
+
+def test_orphaned_slot_is_adopted_and_released(tmp_path):
+    survivor = Spool(str(tmp_path), segment_bytes=1 << 20)
+    survivor.open()
+
+    # Outro processo grava e morre sem drenar (lock liberado, segmento .open no disco)
+    dead = Spool(str(tmp_path), segment_bytes=1 << 20)
+    dead.open()
+    dead.append({"n": 1})
+    dead._active.close()
+    dead._active = None
+    dead.close()
+
+    assert survivor.adopt_orphans() == [dead.dir]
+    [segment] = survivor.sealed_segments()
+    assert segment.parent == dead.dir and segment.suffix == ".log"
+
+    # Enquanto adotado, o slot não é reivindicado por um novo processo
+    newcomer = Spool(str(tmp_path), segment_bytes=1 << 20)
+    newcomer.open()
+    assert newcomer.dir not in (survivor.dir, dead.dir)
+    newcomer.close()
+
+    Spool.discard(segment)
+    survivor.release_drained()
+    assert survivor._adopted == {}
+    survivor.close()
+
+
+def test_spool_worker_drains_into_db(tmp_path):
+    conn = engine.connect()
+    outer = conn.begin()
+    try:
+        with Session(bind=conn, join_transaction_mode="create_savepoint") as setup:
+            name = f"spool-src-{uuid4().hex}"
+            ensure_source(setup, name, "spool-key")
+            setup.commit()
+
+        worker = SpoolWorker(
+            spool=Spool(str(tmp_path), segment_bytes=1 << 20),
+            session_factory=lambda: Session(bind=conn, join_transaction_mode="create_savepoint"),
+            chunk_size=2,
+            seal_ms=0,
+        )
+        worker.spool.open()
+        rids = [uuid4().hex for _ in range(3)]
+        for i, rid in enumerate(rids):
+            worker.enqueue({"request_id": rid, "client_ip": None, "user_agent": "pytest",
+                            "event": make_event(name, f"sp-{i}")})
+        worker.spool.seal()
+
+        for segment in worker.spool.sealed_segments():
+            worker.drain_segment(segment)
+        assert worker.spool.sealed_segments() == []
+
+        with Session(bind=conn, join_transaction_mode="create_savepoint") as check:
+            stored = {
+                r.request_id: r.processing_status
+                for r in check.query(RawIngestion).filter(RawIngestion.request_id.in_(rids))
+            }
+        assert stored == {rid: "ACCEPTED" for rid in rids}
+        worker.spool.close()
+    finally:
+        outer.rollback()
+        conn.close()
+
+
+def test_chunk_replayed_after_crash_is_deduplicated(tmp_path, monkeypatch):
+    conn = engine.connect()
+    outer = conn.begin()
+    try:
+        with Session(bind=conn, join_transaction_mode="create_savepoint") as setup:
+            name = f"spool-src-{uuid4().hex}"
+            ensure_source(setup, name, "spool-key")
+            setup.commit()
+
+        worker = SpoolWorker(
+            spool=Spool(str(tmp_path), segment_bytes=1 << 20),
+            session_factory=lambda: Session(bind=conn, join_transaction_mode="create_savepoint"),
+            chunk_size=2,
+            seal_ms=0,
+        )
+        worker.spool.open()
+        exts = [f"sp-{uuid4().hex}" for _ in range(3)]
+        for ext in exts:
+            worker.enqueue({"request_id": uuid4().hex, "client_ip": None, "user_agent": "pytest",
+                            "event": make_event(name, ext)})
+        worker.spool.seal()
+        [segment] = worker.spool.sealed_segments()
+
+        # "Crash" logo após cada commit: nem checkpoint nem descarte chegam ao disco
+        with monkeypatch.context() as m:
+            m.setattr(Spool, "save_checkpoint", staticmethod(lambda path, offset: None))
+            m.setattr(Spool, "discard", staticmethod(lambda path: None))
+            worker.drain_segment(segment)
+        worker.drain_segment(segment)
+        assert worker.spool.sealed_segments() == []
+
+        with Session(bind=conn, join_transaction_mode="create_savepoint") as check:
+            live = check.query(RawIngestion).filter(
+                RawIngestion.external_id.in_(exts), RawIngestion.processing_status != "DUPLICATE"
+            ).count()
+        assert live == 3
+        worker.spool.close()
+    finally:
+        outer.rollback()
+        conn.close()
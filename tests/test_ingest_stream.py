@@ -0,0 +1,90 @@
+"""
+NDJSON streaming ingestion tests.
+
+Ensures the stream endpoint persists valid lines in chunks and reports
+per-line errors without aborting the rest of the stream.
+"""
+import asyncio
+import json
+from uuid import uuid4
+
+from app.api.ndjson import iter_lines
+from app.core.settings import settings
+from tests.conftest import ensure_source, make_event
+
+
+def _ndjson(*lines) -> bytes:
+    return "\n".join(json.dumps(line) if isinstance(line, dict) else line for line in lines).encode("utf-8")
+
+
+def test_ingest_stream_summary_with_line_errors(client, db_session, monkeypatch):
+    # Chunk pequeno para exercitar vários commits no mesmo stream
+    monkeypatch.setattr(settings, "INGEST_STREAM_CHUNK_SIZE", 2)
+
+    name = f"stream-src-{uuid4().hex}"
+    ensure_source(db_session, name, "stream-key")
+    ext = uuid4().hex
+
+    body = _ndjson(
+        make_event(name, f"{ext}-1"),
+        "{not json",
+        make_event(name, f"{ext}-2", event_type="INVALID"),
+        "",
+        {"source": name, "external_id": f"{ext}-3"},
+        make_event("other_source", f"{ext}-4"),
+        make_event(name, f"{ext}-1"),
+        make_event(name, f"{ext}-5"),
+    )
+
+    r = client.post(
+        f"/api/v1/ingest/stream?source={name}",
+        content=body,
+        headers={"X-API-Key": "stream-key", "Content-Type": "application/x-ndjson"},
+    )
+    assert r.status_code == 200, r.text
+    data = r.json()
+
+    assert data["total"] == 7
+    assert (data["accepted"], data["rejected"], data["duplicates"], data["invalid"]) == (2, 1, 1, 3)
+
+    errors = {e["line"]: e for e in data["errors"]}
+    assert errors[2]["error"] == "invalid_json"
+    assert errors[3]["error"] == "REJECTED"
+    assert errors[3]["raw_id"] is not None
+    assert errors[5]["error"] == "validation_error"
+    assert errors[6]["error"] == "source_mismatch"
+
+
+def test_ingest_stream_requires_ndjson_and_api_key(client, db_session):
+    name = f"stream-src-{uuid4().hex}"
+    ensure_source(db_session, name, "stream-key")
+
+    r = client.post(
+        f"/api/v1/ingest/stream?source={name}",
+        content=b"{}",
+        headers={"X-API-Key": "stream-key", "Content-Type": "application/json"},
+    )
+    assert r.status_code == 415
+
+    r = client.post(
+        f"/api/v1/ingest/stream?source={name}",
+        content=_ndjson(make_event(name, "x-1")),
+        headers={"X-API-Key": "wrong", "Content-Type": "application/x-ndjson"},
+    )
+    assert r.status_code == 401
+
+
+def test_iter_lines_splits_across_chunks_and_bounds_line_size():
+    async def chunks():
+        for part in [b'{"a"', b':1}\n\n{"b":2}\nxxxxxxxx', b"xxxxxxxx\n", b'{"c":3}']:
+            yield part
+
+    async def collect():
+        return [item async for item in iter_lines(chunks(), max_line_bytes=10)]
+
+    assert asyncio.run(collect()) == [
+        (1, b'{"a":1}'),
+        (3, b'{"b":2}'),
+        (4, None),
+        (5, b'{"c":3}'),
+    ]
@@ -0,0 +1,95 @@
+"""
+Dry-run validation tests.
+
+Ensures /ingest/validate reports per-item results without writing RAW rows.
+"""
+from uuid import uuid4
+
+from sqlalchemy import func, select
+
+from app.core.settings import settings
+from app.infra.db.models.raw_ingestion import RawIngestion
+from app.services.seen_keys import seen_keys
+from tests.conftest import ensure_source, make_event
+
+
+def _raw_count(db_session) -> int:
+    return db_session.execute(select(func.count()).select_from(RawIngestion)).scalar_one()
+
+
+def test_validate_reports_each_item_without_writing(client, db_session):
+    name = f"dry-src-{uuid4().hex}"
+    ensure_source(db_session, name, "dry-key")
+    ext = uuid4().hex
+    before = _raw_count(db_session)
+
+    invalid = make_event(name, f"{ext}-3")
+    del invalid["entity_id"]
+    r = client.post(
+        "/api/v1/ingest/validate",
+        json=[
+            make_event(name, f"{ext}-1"),
+            make_event(name, f"{ext}-2", event_type="INVALID"),
+            invalid,
+            make_event(name, f"{ext}-1"),
+        ],
+        headers={"X-API-Key": "dry-key"},
+    )
+    assert r.status_code == 200, r.text
+    body = r.json()
+
+    assert [i["status"] for i in body["items"]] == ["VALID", "REJECTED", "INVALID", "VALID"]
+    assert body["items"][1]["errors"][0]["rule"] == "ALLOWED_TYPES"
+    assert body["items"][2]["detail"][0]["loc"] == ["entity_id"]
+    # Segundo item com o mesmo external_id: dica de duplicado
+    assert [i["duplicate"] for i in body["items"]] == [False, False, False, True]
+    assert (body["valid"], body["rejected"], body["invalid"], body["duplicates"]) == (2, 1, 1, 1)
+
+    assert _raw_count(db_session) == before
+
+
+def test_validate_single_event_flags_known_external_id(client, db_session):
+    name = f"dry-src-{uuid4().hex}"
+    ensure_source(db_session, name, "dry-key")
+    ev = make_event(name, uuid4().hex)
+    headers = {"X-API-Key": "dry-key"}
+
+    assert client.post("/api/v1/ingest", json=ev, headers=headers).status_code == 200
+
+    r = client.post("/api/v1/ingest/validate", json=ev, headers=headers)
+    assert r.status_code == 200, r.text
+    item = r.json()["items"][0]
+    assert item["status"] == "VALID"
+    assert item["duplicate"] is True
+
+
+def test_validate_without_bloom_skips_the_prefilter(client, db_session, monkeypatch):
+    monkeypatch.setattr(settings, "INGEST_BLOOM_ENABLED", False)
+    name = f"dry-src-{uuid4().hex}"
+    ensure_source(db_session, name, "dry-key")
+    ev = make_event(name, uuid4().hex)
+    headers = {"X-API-Key": "dry-key"}
+
+    assert client.post("/api/v1/ingest", json=ev, headers=headers).status_code == 200
+    r = client.post("/api/v1/ingest/validate", json=[ev, make_event(name, uuid4().hex)], headers=headers)
+    assert [i["duplicate"] for i in r.json()["items"]] == [True, False]
+
+    # Nenhum filtro consultado nem aquecido
+    assert seen_keys.stats()["probes"] == 0
+    assert not seen_keys._pending and not seen_keys._filters
+
+
+def test_validate_requires_api_key_and_single_source(client, db_session):
+    name = f"dry-src-{uuid4().hex}"
+    ensure_source(db_session, name, "dry-key")
+
+    r = client.post("/api/v1/ingest/validate", json=[make_event(name, "x-1")])
+    assert r.status_code == 401
+
+    r = client.post(
+        "/api/v1/ingest/validate",
+        json=[make_event(name, "x-1"), make_event("other_source", "x-2")],
+        headers={"X-API-Key": "dry-key"},
+    )
+    assert r.status_code == 400
+    assert r.json()["detail"] == "batch_mixed_sources"
@@ -0,0 +1,70 @@
+"""
+Canonical payload serialization tests.
+
+Ensures payload hashes stay byte-compatible with rows written before the
+canonical encoder (json.dumps sort_keys/compact/ensure_ascii=False).
+"""
+import hashlib
+import json
+import random
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core import utils
+from app.core.utils import canonical_json, canonical_payload, payload_hash
+
+
+def _legacy_hash(payload: dict) -> str:
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _random_value(rnd: random.Random, depth: int = 0):
+    kind = rnd.randrange(8 if depth < 3 else 6)
+    if kind == 0:
+        return rnd.choice([0, -1, 2**63 - 1, -(2**63), 2**64, 10**30, 123])
+    if kind == 1:
+        return rnd.choice([0.1, -0.0, 1e16, 1e-5, 1.5e-7, 1e300, 0.0001, 123456.789, 1e15])
+    if kind == 2:
+        return rnd.choice(["", "ação", "emoji 😀", "ctrl \x1f\n\t", 'quote "x" \\', " ", "1e5"])
+    if kind == 3:
+        return rnd.choice([True, False, None])
+    if kind == 4:
+        return datetime(2026, 2, 10, 12, 30, tzinfo=timezone.utc)
+    if kind == 5:
+        return "ORDER"
+    if kind == 6:
+        return [_random_value(rnd, depth + 1) for _ in range(rnd.randrange(4))]
+    return {f"k{rnd.randrange(50)}é": _random_value(rnd, depth + 1) for _ in range(rnd.randrange(5))}
+
+
+PAYLOADS = [
+    {
+        "source": "partner_a",
+        "external_id": "evt-1",
+        "schema_version": "v1",
+        "entity_id": "ent-1",
+        "event_type": "ORDER",
+        "event_status": "NEW",
+        "event_timestamp": "2026-02-10T00:00:00Z",
+        "attributes": {"b": 1, "a": [1.5, "ç"], "z": None},
+    },
+    *({"attributes": _random_value(random.Random(seed))} for seed in range(300)),
+]
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_canonical_hash_matches_legacy_rows(monkeypatch, use_orjson):
+    if use_orjson:
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(utils, "orjson", None)
+
+    for payload in PAYLOADS:
+        assert payload_hash(payload) == _legacy_hash(payload)
+
+        text, digest = canonical_payload(payload)
+        assert digest == _legacy_hash(payload)
+        assert text.encode("utf-8") == canonical_json(payload)
+        assert json.loads(text) == json.loads(json.dumps(payload, default=str))
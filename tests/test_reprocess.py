@@ -0,0 +1,103 @@
+"""
+Reprocessing tests.
+
+Ensures REJECTED raws are re-validated with the current rules, promoted to
+TRUSTED when they pass, and their old rejections superseded.
+"""
+from uuid import uuid4
+
+from sqlalchemy import update
+
+from app.core.settings import settings
+from app.infra.db.models.raw_ingestion import RawIngestion
+from app.infra.db.models.rejection import Rejection
+from app.infra.db.models.trusted_event import TrustedEvent
+from app.scripts.reprocess import split_ranges
+from tests.conftest import ensure_source, ensure_user, login, make_event
+
+
+def test_split_ranges_cover_the_id_span():
+    ranges = split_ranges(10, 25, 4)
+    assert ranges[0][0] == 9 and ranges[-1][1] == 25
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+    assert split_ranges(5, 5, 8) == [(4, 5)]
+
+
+def test_reprocess_promotes_events_after_rule_fix(client, db_session):
+    ensure_user(db_session, "reproc_admin", "Adm@123", "admin")
+    token = login(client, "reproc_admin", "Adm@123")
+    auth = {"Authorization": f"Bearer {token}"}
+
+    name = f"reproc-src-{uuid4().hex}"
+    ensure_source(db_session, name, "reproc-key")
+    ext = uuid4().hex
+
+    r = client.post(
+        "/api/v1/ingest/batch",
+        json=[
+            make_event(name, f"{ext}-1", event_type="REFUND"),
+            make_event(name, f"{ext}-2", event_type="REFUND"),
+            make_event(name, f"{ext}-3", event_type="BOGUS"),
+        ],
+        headers={"X-API-Key": "reproc-key"},
+    )
+    raw_ids = [i["raw_id"] for i in r.json()["items"]]
+    assert r.json()["rejected"] == 3
+
+    # Correção da regra: REFUND passa a ser permitido para a fonte
+    r = client.put("/api/v1/rules", json={"source": name, "rules": [
+        {"type": "allowed_values", "field": "event_type", "values": ["ORDER", "REFUND"], "rule": "ALLOWED_TYPES"},
+    ]}, headers=auth)
+    assert r.status_code == 200, r.text
+
+    r = client.post("/api/v1/reprocess", json={"source": name, "max_rows": 2}, headers=auth)
+    assert r.status_code == 200, r.text
+    first = r.json()
+    assert (first["scanned"], first["done"]) == (2, False)
+
+    r = client.post("/api/v1/reprocess", json={"source": name, "after_id": first["last_id"]}, headers=auth)
+    second = r.json()
+    assert second["done"] is True
+    assert first["promoted"] + second["promoted"] == 2
+    assert first["still_rejected"] + second["still_rejected"] == 1
+
+    statuses = dict(db_session.query(RawIngestion.id, RawIngestion.processing_status)
+                    .filter(RawIngestion.id.in_(raw_ids)).all())
+    assert [statuses[i] for i in raw_ids] == ["ACCEPTED", "ACCEPTED", "REJECTED"]
+    assert db_session.query(TrustedEvent).filter(TrustedEvent.raw_ingestion_id.in_(raw_ids)).count() == 2
+
+    # Rejeições antigas dos promovidos ficam registradas como substituídas
+    superseded = db_session.query(Rejection).filter(
+        Rejection.raw_ingestion_id.in_(raw_ids[:2]), Rejection.superseded_at.is_(None)
+    ).count()
+    assert superseded == 0
+    assert db_session.query(Rejection).filter(
+        Rejection.raw_ingestion_id == raw_ids[2], Rejection.superseded_at.is_(None)
+    ).count() == 1
+
+
+def test_replay_revalidates_rejected_outcome_reprocessed_elsewhere(client, db_session, monkeypatch):
+    monkeypatch.setattr(settings, "INGEST_HASH_REPLAY_ENABLED", True)
+    name = f"reproc-src-{uuid4().hex}"
+    ensure_source(db_session, name, "reproc-key")
+    headers = {"X-API-Key": "reproc-key"}
+    event = make_event(name, uuid4().hex, event_type="BOGUS")
+
+    first = client.post("/api/v1/ingest", json=event, headers=headers).json()
+    assert first["status"] == "REJECTED"
+    again = client.post("/api/v1/ingest", json=event, headers=headers).json()
+    assert (again["status"], again["replayed"]) == ("REJECTED", True)
+
+    # Promoção por outro processo: o cache deste processo não é limpo
+    db_session.execute(
+        update(RawIngestion)
+        .where(RawIngestion.id == first["raw_id"])
+        .values(processing_status="ACCEPTED", error_count=0)
+    )
+    db_session.flush()
+
+    r = client.post("/api/v1/ingest", json=event, headers=headers).json()
+    assert (r["status"], r["raw_id"], r["replayed"]) == ("ACCEPTED", first["raw_id"], True)
+
+    r = client.post("/api/v1/ingest/batch", json=[event], headers=headers).json()
+    assert (r["items"][0]["status"], r["items"][0]["raw_id"]) == ("ACCEPTED", first["raw_id"])
@@ -0,0 +1,76 @@
+"""
+Shadow validation tests.
+
+Ensures candidate rule sets never change ingest responses and that their
+divergences from the live decision are counted per rule and source.
+"""
+from uuid import uuid4
+
+from app.core.settings import settings
+from app.services.shadow_validation import shadow_validator
+from tests.conftest import ensure_source, ensure_user, login, make_event
+
+
+def test_shadow_rule_set_records_divergences(client, db_session, monkeypatch):
+    monkeypatch.setattr(settings, "SHADOW_VALIDATION_ENABLED", True)
+    ensure_user(db_session, "shadow_admin", "Adm@123", "admin")
+    token = login(client, "shadow_admin", "Adm@123")
+    auth = {"Authorization": f"Bearer {token}"}
+
+    name = f"shadow-src-{uuid4().hex}"
+    ensure_source(db_session, name, "shadow-key")
+    ext = uuid4().hex
+
+    # Candidato: aceita REFUND, deixa de aceitar SHIPMENT
+    r = client.put("/api/v1/rules", json={"source": name, "stage": "shadow", "rules": [
+        {"type": "allowed_values", "field": "event_type", "values": ["ORDER", "REFUND"], "rule": "CANDIDATE_TYPES"},
+    ]}, headers=auth)
+    assert r.status_code == 200, r.text
+    rule_set_id = r.json()["id"]
+
+    r = client.post(
+        "/api/v1/ingest/batch",
+        json=[
+            make_event(name, f"{ext}-1"),
+            make_event(name, f"{ext}-2", event_type="SHIPMENT"),
+            make_event(name, f"{ext}-3", event_type="REFUND"),
+        ],
+        headers={"X-API-Key": "shadow-key"},
+    )
+    # Respostas seguem as regras live
+    assert [i["status"] for i in r.json()["items"]] == ["ACCEPTED", "ACCEPTED", "REJECTED"]
+
+    r = client.post("/api/v1/ingest", json=make_event(name, f"{ext}-4", event_type="SHIPMENT"),
+                    headers={"X-API-Key": "shadow-key"})
+    assert r.json()["status"] == "ACCEPTED"
+
+    shadow_validator.run_pending(db_session)
+
+    r = client.get("/api/v1/rules/shadow", params={"rule_set_id": rule_set_id}, headers=auth)
+    rows = {row["rule"]: row for row in r.json()}
+    assert (rows["*"]["evaluated"], rows["*"]["would_reject"], rows["*"]["would_accept"]) == (4, 2, 1)
+    assert rows["CANDIDATE_TYPES"]["would_reject"] == 2
+    assert rows["ALLOWED_TYPES"]["would_accept"] == 1
+    assert rows["*"]["source"] == name
+
+
+def test_shadow_submit_drops_when_queue_is_full(monkeypatch):
+    monkeypatch.setattr(settings, "SHADOW_VALIDATION_ENABLED", True)
+    validator = type(shadow_validator)(session_factory=None, queue_size=1, flush_seconds=1)
+
+    validator.submit(1, [(None, [])])
+    validator.submit(1, [(None, []), (None, [])])
+
+    assert len(validator._drain_queue()) == 1
+
+
+def test_single_ingest_skips_shadow_when_disabled(client, db_session, monkeypatch):
+    monkeypatch.setattr(settings, "SHADOW_VALIDATION_ENABLED", False)
+    submitted = []
+    monkeypatch.setattr(shadow_validator, "submit", lambda *a: submitted.append(a))
+    name = f"shadow-src-{uuid4().hex}"
+    ensure_source(db_session, name, "shadow-key")
+
+    r = client.post("/api/v1/ingest", json=make_event(name, uuid4().hex), headers={"X-API-Key": "shadow-key"})
+    assert r.status_code == 200, r.text
+    assert submitted == []
@@ -0,0 +1,203 @@
+"""
+Validation rule engine tests.
+
+Ensures declarative rules compile, batch evaluation matches per-event
+evaluation, and rule sets stored per source apply to ingestion.
+"""
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import func, select
+
+from app.domain.rules import RuleError, compile_rules
+from app.domain.validation import validate_event
+from app.infra.db.repositories.reference_repo import ReferenceCache, upsert_reference_values
+from app.infra.db.models.reference_value import ReferenceValue
+from app.infra.db.models.rejection import Rejection
+from tests.conftest import ensure_source, ensure_user, login, make_event
+
+
+RULES = [
+    {"type": "allowed_values", "field": "event_type", "values": ["ORDER", "PAYMENT"], "rule": "TYPES"},
+    {"type": "regex", "field": "entity_id", "pattern": "ent-[0-9]+"},
+    {"type": "range", "field": "attributes.amount", "min": 0, "max": 1000},
+    {"type": "required", "keys": ["currency"], "when": {"field": "event_type", "equals": "PAYMENT"}},
+    {"type": "compare", "field": "attributes.paid", "op": "<=", "other": "attributes.amount"},
+]
+
+
+def test_default_rules_keep_validate_event_errors():
+    assert validate_event("ORDER", "NEW") == []
+    errors = validate_event("X", "Y")
+    assert [(e["field"], e["rule"], e["message"], e["severity"]) for e in errors] == [
+        ("event_type", "ALLOWED_TYPES", "event_type inválido", "HIGH"),
+        ("event_status", "ALLOWED_STATUS", "event_status inválido", "HIGH"),
+    ]
+    assert all(e["category"] == "BUSINESS" for e in errors)
+
+
+def test_batch_evaluation_matches_single_event():
+    rule_set = compile_rules(RULES)
+    events = [
+        make_event("s", "1", entity_id="ent-1", attributes={"amount": 10}),
+        make_event("s", "2", event_type="SHIPMENT", entity_id="bad"),
+        make_event("s", "3", event_type="PAYMENT", attributes={"amount": 5000, "paid": 1}),
+        make_event("s", "4", attributes={"amount": 10, "paid": 20}),
+    ]
+
+    batch = rule_set.validate_batch(events)
+    assert batch == [rule_set.validate(e) for e in events]
+    assert [[e["rule"] for e in errs] for errs in batch] == [
+        [],
+        ["TYPES", "REGEX"],
+        ["RANGE", "REQUIRED"],
+        ["COMPARE"],
+    ]
+    assert batch[2][1]["field"] == "attributes.currency"
+
+
+def test_invalid_rules_are_rejected_at_compile_time():
+    with pytest.raises(RuleError):
+        compile_rules([{"type": "regex", "field": "entity_id", "pattern": "("}])
+    with pytest.raises(RuleError):
+        compile_rules([{"type": "nope", "field": "x"}])
+
+
+def test_unhashable_values_fail_rules_instead_of_crashing():
+    rule_set = compile_rules([
+        {"type": "allowed_values", "field": "attributes.kind", "values": ["a", "b"], "rule": "KIND"},
+        {"type": "required", "keys": ["currency"], "when": {"field": "attributes.mode", "in": ["x"]}, "rule": "CUR"},
+    ])
+    events = [
+        make_event("s", "1", attributes={"kind": ["a"]}),
+        make_event("s", "2", attributes={"kind": {"a": 1}, "mode": {"x": 1}}),
+        make_event("s", "3", attributes={"kind": "a", "mode": ["x"]}),
+    ]
+
+    batch = rule_set.validate_batch(events)
+    assert batch == [rule_set.validate(e) for e in events]
+    # Lista/objeto não pertence ao conjunto; condição "in" com lista/objeto não se aplica
+    assert [[e["rule"] for e in errs] for errs in batch] == [["KIND"], ["KIND"], []]
+
+    with pytest.raises(RuleError):
+        compile_rules([{"type": "allowed_values", "field": "event_type", "values": [["ORDER"]]}])
+
+
+def test_rule_set_per_source_applies_without_deploy(client, db_session):
+    ensure_user(db_session, "rules_admin", "Adm@123", "admin")
+    token = login(client, "rules_admin", "Adm@123")
+    auth = {"Authorization": f"Bearer {token}"}
+
+    name = f"rules-src-{uuid4().hex}"
+    ensure_source(db_session, name, "rules-key")
+    ext = uuid4().hex
+
+    # Regras padrão: SHIPMENT é aceito
+    r = client.post("/api/v1/ingest", json=make_event(name, f"{ext}-1", event_type="SHIPMENT"),
+                    headers={"X-API-Key": "rules-key"})
+    assert r.json()["status"] == "ACCEPTED"
+
+    r = client.put("/api/v1/rules", json={"source": name, "rules": [{"type": "nope"}]}, headers=auth)
+    assert r.status_code == 422
+
+    r = client.put("/api/v1/rules", json={"source": name, "rules": RULES}, headers=auth)
+    assert r.status_code == 200, r.text
+    assert r.json()["version"] == 1
+
+    # Novo conjunto vale imediatamente para a fonte (avulso e lote)
+    r = client.post("/api/v1/ingest", json=make_event(name, f"{ext}-2", event_type="SHIPMENT"),
+                    headers={"X-API-Key": "rules-key"})
+    assert r.json()["status"] == "REJECTED"
+
+    r = client.post(
+        "/api/v1/ingest/batch",
+        json=[make_event(name, f"{ext}-3"), make_event(name, f"{ext}-4", event_type="PAYMENT")],
+        headers={"X-API-Key": "rules-key"},
+    )
+    assert [i["status"] for i in r.json()["items"]] == ["ACCEPTED", "REJECTED"]
+
+    r = client.get("/api/v1/rules", headers=auth)
+    assert any(item["source"] == name for item in r.json())
+
+
+def test_reference_rules_use_cached_reference_data(client, db_session):
+    ensure_user(db_session, "ref_admin", "Adm@123", "admin")
+    token = login(client, "ref_admin", "Adm@123")
+    auth = {"Authorization": f"Bearer {token}"}
+
+    name = f"ref-src-{uuid4().hex}"
+    ensure_source(db_session, name, "ref-key")
+    catalog = f"catalog-{uuid4().hex[:8]}"
+    types = f"types-{uuid4().hex[:8]}"
+    ext = uuid4().hex
+
+    r = client.post(f"/api/v1/reference/{catalog}", json={"add": ["ent-1", "ent-2"]}, headers=auth)
+    assert r.status_code == 200, r.text
+    client.post(f"/api/v1/reference/{types}", json={"source": name, "add": ["ORDER"]}, headers=auth)
+
+    r = client.put("/api/v1/rules", json={"source": name, "rules": [
+        {"type": "reference", "field": "entity_id", "dataset": catalog, "rule": "ENTITY_EXISTS"},
+        {"type": "reference", "field": "event_type", "dataset": types, "rule": "SOURCE_EVENT_TYPES"},
+    ]}, headers=auth)
+    assert r.status_code == 200, r.text
+
+    r = client.post(
+        "/api/v1/ingest/batch",
+        json=[
+            make_event(name, f"{ext}-1"),
+            make_event(name, f"{ext}-2", entity_id="ent-9", event_type="PAYMENT"),
+        ],
+        headers={"X-API-Key": "ref-key"},
+    )
+    assert [i["status"] for i in r.json()["items"]] == ["ACCEPTED", "REJECTED"]
+    assert r.json()["items"][1]["error_count"] == 2
+
+    rows = db_session.query(Rejection).filter(Rejection.raw_ingestion_id == r.json()["items"][1]["raw_id"]).all()
+    assert sorted((x.category, x.rule) for x in rows) == [
+        ("REFERENCE", "ENTITY_EXISTS"),
+        ("REFERENCE", "SOURCE_EVENT_TYPES"),
+    ]
+
+    # Remoção é vista pelo cache no próximo uso (refresh incremental)
+    client.post(f"/api/v1/reference/{catalog}", json={"remove": ["ent-1"]}, headers=auth)
+    r = client.post("/api/v1/ingest", json=make_event(name, f"{ext}-3"), headers={"X-API-Key": "ref-key"})
+    assert r.json()["status"] == "REJECTED"
+
+    stats = client.get("/api/v1/metrics", headers=auth).json()["pipeline"]["collectors"]["reference_cache"]
+    assert stats["hits"] >= 2 and stats["misses"] >= 3
+
+
+def test_reference_upsert_of_many_values(db_session):
+    dataset = f"catalog-{uuid4().hex[:8]}"
+    values = [f"ent-{n}" for n in range(12)]
+
+    # executemany com statement preparado: o alvo do ON CONFLICT tem de casar com o índice
+    for _ in range(2):
+        assert upsert_reference_values(db_session, dataset, None, values) == 12
+        db_session.flush()
+    assert upsert_reference_values(db_session, dataset, None, values[:6], is_active=False) == 6
+    db_session.flush()
+
+    active = db_session.execute(
+        select(func.count()).select_from(ReferenceValue).where(
+            ReferenceValue.dataset == dataset, ReferenceValue.is_active.is_(True)
+        )
+    ).scalar_one()
+    assert active == 6
+
+
+def test_reference_lookup_of_unhashable_value_is_a_miss():
+    cache = ReferenceCache(refresh_seconds=60, full_reload_seconds=600)
+    cache._values = {("catalog", None): {"ent-1"}, ("catalog", 7): {"ent-2"}}
+
+    assert cache.contains("catalog", 7, "ent-2")
+    assert not cache.contains("catalog", 7, ["ent-1"])
+    assert not cache.contains("catalog", None, {"id": "ent-1"})
+
+    rule_set = compile_rules(
+        [{"type": "reference", "field": "attributes.entity", "dataset": "catalog", "rule": "ENTITY_EXISTS"}],
+        references=lambda dataset, value: cache.contains(dataset, 7, value),
+    )
+    event = make_event("s", "1", attributes={"entity": ["ent-1"]})
+    assert [e["rule"] for e in rule_set.validate(event)] == ["ENTITY_EXISTS"]
+    assert rule_set.validate_batch([event]) == [rule_set.validate(event)]